@@ -0,0 +1,468 @@
+"""Pass/fail analysis of sensor readings for the Sensor Analysis Dashboard.
+
+Kept free of Streamlit so the same analysis runs in the app and in worker
+processes (bulk report generation).
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# ==================== CONFIGURATION ====================
+# Define threshold sets
+THRESHOLDS = {
+    'Standard': {
+        'min_120s': 1.50,
+        'max_120s': 4.9,
+        'min_pct_change': -6.00,
+        'max_pct_change': 30.00,
+        'max_std_dev': 0.3
+    },
+    'High Range': {
+        'min_120s': 0.55,
+        'max_120s': 1.0,
+        'min_pct_change': 0.00,
+        'max_pct_change': 75.00,
+        'max_std_dev': 0.5
+    }
+}
+
+TIME_POINTS = ['0', '5', '15', '30', '60', '90', '120']  # Reading columns, as in app.py
+
+PROGRESS_EVERY_SENSORS = 250  # How often determine_pass_fail() reports progress
+FUZZY_CANDIDATES = 50  # Job numbers sharing the most trigrams, re-ranked by edit distance for suggestions
+CONFIDENCE_Z = 1.96  # 95% confidence intervals for rates estimated from part of a job
+
+PASSED_STATUSES = ['PASS', 'OT-', 'TT', 'OT+']  # Counted as passed in pass rates
+FAILED_STATUSES = ['FL', 'FH']
+
+# ==================== JOB DATA ====================
+class JobNotFoundError(LookupError):
+    """No readings match the requested job number."""
+
+    def __init__(self, job_number):
+        super().__init__(f"No data found for Job # {job_number}")
+        self.job_number = job_number
+
+def get_job_data(df, job_number):
+    """Get data for a specific job number or all jobs starting with that number."""
+    job_number_str = str(job_number).strip()
+
+    # Try exact match first
+    job_data = df[df['Job #'] == job_number_str].copy()
+
+    # If no match, try stripping whitespace
+    if len(job_data) == 0:
+        job_data = df[df['Job #'].str.strip() == job_number_str].copy()
+
+    # If still no match, try matching jobs that start with the number
+    if len(job_data) == 0:
+        job_data = df[df['Job #'].str.strip().str.startswith(job_number_str)].copy()
+
+    # If still no match, try case-insensitive
+    if len(job_data) == 0:
+        job_data = df[df['Job #'].str.lower().str.strip().str.startswith(job_number_str.lower())].copy()
+
+    return job_data
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def trigrams(text):
+    """Case-insensitive character trigrams of text, padded so short strings and prefixes have some."""
+    padded = f'  {text.lower()} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class JobIndex:
+    """Row and sensor counts per job, sorted by job number, for sizing job queries and suggesting job numbers."""
+
+    def __init__(self, df):
+        counts = df.groupby('Job #', sort=False).agg(rows=('Job #', 'size'), sensors=('Serial Number', 'nunique'))
+        stripped = counts.index.astype(str).str.strip()
+        order = np.argsort(stripped.to_numpy(dtype=str), kind='stable')
+        self.jobs = counts.index.to_numpy(dtype=object)[order]
+        self.stripped = stripped.to_numpy(dtype=str)[order]
+        self.rows = counts['rows'].to_numpy(dtype=np.int64)[order]
+        self.sensors = counts['sensors'].to_numpy(dtype=np.int64)[order]
+        self._trigram_index = None  # Built on the first suggest()
+
+    def _prefix_range(self, prefix):
+        """(start, stop) positions of the job numbers starting with prefix; they are contiguous when sorted."""
+        start = np.searchsorted(self.stripped, prefix, side='left')
+        stop = np.searchsorted(self.stripped, prefix + '\U0010ffff', side='left')
+        return int(start), int(stop)
+
+    def match(self, job_number):
+        """Positions of the jobs get_job_data() would match, trying its fallbacks in the same order."""
+        job_number_str = str(job_number).strip()
+        exact = np.flatnonzero(self.jobs == job_number_str)
+        if len(exact) == 0:
+            exact = np.flatnonzero(self.stripped == job_number_str)
+        if len(exact) > 0:
+            return exact
+        start, stop = self._prefix_range(job_number_str)
+        if stop > start:
+            return np.arange(start, stop)
+        lowered = np.char.lower(self.stripped)
+        return np.flatnonzero(np.char.startswith(lowered, job_number_str.lower()))
+
+    def estimate(self, job_number):
+        """{'jobs', 'rows', 'sensors'} a query for job_number would analyze (sensors may count repeats across jobs)."""
+        matched = self.match(job_number)
+        return {'jobs': len(matched), 'rows': int(self.rows[matched].sum()),
+                'sensors': int(self.sensors[matched].sum())}
+
+    def neighbors(self, job_number):
+        """(previous, next) job numbers in sorted order around the jobs job_number matches; None past either end."""
+        matched = self.match(job_number)
+        if len(matched) == 0:
+            return None, None
+        first, last = matched.min(), matched.max()
+        previous = str(self.stripped[first - 1]) if first > 0 else None
+        following = str(self.stripped[last + 1]) if last + 1 < len(self.stripped) else None
+        return previous, following
+
+    def complete(self, prefix, limit):
+        """(up to limit job numbers starting with prefix, how many there are), in sorted order."""
+        prefix = str(prefix).strip()
+        start, stop = self._prefix_range(prefix)
+        if stop > start:
+            matched = np.arange(start, stop)
+        else:
+            matched = np.flatnonzero(np.char.startswith(np.char.lower(self.stripped), prefix.lower()))
+        jobs = list(dict.fromkeys(str(job) for job in self.stripped[matched[:limit]]))
+        return jobs, len(matched)
+
+    def suggest(self, job_number, limit):
+        """Up to limit job numbers closest to job_number by edit distance, found through a trigram index."""
+        if self._trigram_index is None:
+            index = {}
+            for position, job in enumerate(self.stripped):
+                for gram in trigrams(job):
+                    index.setdefault(gram, []).append(position)
+            self._trigram_index = index
+        query = str(job_number).strip().lower()
+        shared = Counter()
+        for gram in trigrams(query):
+            shared.update(self._trigram_index.get(gram, ()))
+        candidates = [position for position, _ in shared.most_common(FUZZY_CANDIDATES)]
+        candidates.sort(key=lambda position: (edit_distance(query, self.stripped[position].lower()),
+                                              -shared[position], position))
+        return list(dict.fromkeys(str(self.stripped[position]) for position in candidates))[:limit]
+
+def judge_query(estimate, limits):
+    """Verdict on an estimate() with 'seconds' added, under limits {'warn_rows', 'max_rows', 'time_budget_s'}.
+
+    'refuse' (sampled preview only) past the row limit or time budget, 'warn' (confirm first)
+    past the warning row count, else 'ok'.
+    """
+    if estimate['rows'] > limits['max_rows'] or estimate['seconds'] > limits['time_budget_s']:
+        return 'refuse'
+    if estimate['rows'] > limits['warn_rows']:
+        return 'warn'
+    return 'ok'
+
+# ==================== METRICS ====================
+def calculate_metrics(df):
+    """Calculate key metrics for sensor readings."""
+    metrics = df.copy()
+
+    # Calculate percentage change: (120s - 90s) / (90s - 0s) * 100
+    if '0' in df.columns and '90' in df.columns and '120' in df.columns:
+        denominator = df['90'] - df['0']
+        # Avoid division by zero
+        denominator = denominator.replace(0, np.nan)
+        metrics['pct_change_90_120'] = ((df['120'] - df['90']) / denominator * 100).replace([np.inf, -np.inf], np.nan)
+
+    return metrics
+
+# ==================== OPTIMIZED DETERMINE_PASS_FAIL ====================
+def determine_pass_fail(df, threshold_set='Standard', progress=None):
+    """Optimized determination of Pass/Fail status based on thresholds.
+    
+    progress, if given, is called as progress(sensors done, total sensors) every
+    PROGRESS_EVERY_SENSORS sensors; it may raise to abandon the analysis.
+    """
+    thresholds = THRESHOLDS[threshold_set]
+    
+    # Group by serial number once
+    grouped = df.groupby('Serial Number')
+    
+    results = []
+    status_priority = {'FL': 1, 'FH': 2, 'OT-': 3, 'TT': 4, 'OT+': 5, 'DM': 6, 'PASS': 7}
+    
+    for sensor_idx, (serial, group) in enumerate(grouped):
+        if progress is not None and sensor_idx % PROGRESS_EVERY_SENSORS == 0:
+            progress(sensor_idx, grouped.ngroups)
+        
+        # Now process pre-grouped data
+        readings_120 = group['120'].dropna()
+        
+        if len(readings_120) == 0:
+            continue
+            
+        std_dev_120 = readings_120.std() if len(readings_120) > 1 else 0
+        
+        serial_row = {
+            'Serial Number': serial,
+            'Channel': group.iloc[0].get('Channel', ''),
+        }
+        
+        all_failure_codes = []
+        
+        # Process each test
+        for test_idx, (_, row) in enumerate(group.iterrows(), 1):
+            test_prefix = f'T{test_idx}'
+            
+            # Add readings
+            serial_row[f'0s({test_prefix})'] = row.get('0', np.nan)
+            serial_row[f'90s({test_prefix})'] = row.get('90', np.nan)
+            serial_row[f'120s({test_prefix})'] = row.get('120', np.nan)
+            
+            # Check failures
+            pct_change = row.get('pct_change_90_120', np.nan)
+            if pd.notna(pct_change):
+                serial_row[f'%Chg({test_prefix})'] = f"{pct_change:.1f}%"
+            else:
+                serial_row[f'%Chg({test_prefix})'] = np.nan
+            
+            failure_codes = []
+            reading_120 = row['120']
+            
+            if pd.notna(reading_120):
+                if reading_120 < thresholds['min_120s']:
+                    failure_codes.append('FL')
+                if reading_120 > thresholds['max_120s']:
+                    failure_codes.append('FH')
+            else:
+                failure_codes.append('DM')
+            
+            if pd.notna(pct_change):
+                if pct_change < thresholds['min_pct_change']:
+                    failure_codes.append('OT-')
+                if pct_change > thresholds['max_pct_change']:
+                    failure_codes.append('OT+')
+            
+            test_status = 'PASS' if len(failure_codes) == 0 else ','.join(sorted(set(failure_codes)))
+            serial_row[f'Status({test_prefix})'] = test_status
+            all_failure_codes.extend(failure_codes)
+        
+        # Check std dev
+        if std_dev_120 > thresholds['max_std_dev']:
+            all_failure_codes.append('TT')
+        
+        # Determine status
+        if len(all_failure_codes) == 0:
+            status = 'PASS'
+        else:
+            unique_failures = list(set(all_failure_codes))
+            unique_failures.sort(key=lambda x: status_priority.get(x, 99))
+            status = unique_failures[0]
+        
+        serial_row['Pass/Fail'] = status
+        serial_row['120s(St.Dev.)'] = std_dev_120
+        results.append(serial_row)
+    
+    # Create DataFrame
+    results_df = pd.DataFrame(results)
+    
+    # Reorder columns
+    base_cols = ['Serial Number', 'Channel', 'Pass/Fail', '120s(St.Dev.)']
+    test_cols = [col for col in results_df.columns if col not in base_cols]
+    results_df = results_df[base_cols + test_cols]
+    
+    return results_df
+
+# ==================== SUMMARY STATISTICS ====================
+def summarize_results(results):
+    """Sensor counts, pass/fail rates and per-status counts for a determine_pass_fail() result."""
+    statuses = results['Pass/Fail'] if len(results) > 0 else pd.Series(dtype=object)
+    total_sensors = len(results)
+    passed_sensors = int(statuses.isin(PASSED_STATUSES).sum())
+    failed_sensors = int(statuses.isin(FAILED_STATUSES).sum())
+    dm_sensors = int((statuses == 'DM').sum())
+    counted_sensors = passed_sensors + failed_sensors
+
+    # Count each status code
+    status_counts = {'FL': 0, 'FH': 0, 'OT-': 0, 'TT': 0, 'OT+': 0, 'DM': 0, 'PASS': 0}
+    for status, count in statuses.value_counts().items():
+        if status in status_counts:
+            status_counts[status] = int(count)
+
+    return {
+        'total_sensors': total_sensors,
+        'passed_sensors': passed_sensors,
+        'failed_sensors': failed_sensors,
+        'dm_sensors': dm_sensors,
+        'pass_rate': (passed_sensors / counted_sensors * 100) if counted_sensors > 0 else 0,
+        'fail_rate': (failed_sensors / counted_sensors * 100) if counted_sensors > 0 else 0,
+        'status_counts': status_counts
+    }
+
+def analyze_job_rows(job_data, threshold_set='Standard'):
+    """Full analysis of one job's rows: metrics, pass/fail results and summary statistics."""
+    results = determine_pass_fail(calculate_metrics(job_data), threshold_set)
+    return {
+        'matched_jobs': sorted(job_data['Job #'].unique()),
+        'thresholds': THRESHOLDS[threshold_set],
+        'threshold_set': threshold_set,
+        **summarize_results(results),
+        'results': results
+    }
+
+# ==================== PROGRESSIVE ANALYSIS ====================
+def stratified_serial_order(df, seed=0):
+    """Serial numbers in an order whose every leading run is a random sample stratified by job.
+    
+    Each job's serials are shuffled and spread evenly over the order, so the first n
+    serials hold every job in proportion to its sensor count.
+    """
+    serial_jobs = df.drop_duplicates('Serial Number')[['Serial Number', 'Job #']]
+    rng = np.random.default_rng(seed)
+    shuffled = serial_jobs.iloc[rng.permutation(len(serial_jobs))]
+    by_job = shuffled.groupby('Job #', sort=False)
+    rank = by_job.cumcount().to_numpy()
+    size = by_job['Serial Number'].transform('size').to_numpy()
+    position = (rank + rng.random(len(shuffled))) / size
+    return shuffled['Serial Number'].to_numpy()[np.argsort(position, kind='stable')]
+
+def combine_results(chunks):
+    """determine_pass_fail() results of disjoint sensor chunks, laid out as one call over all of them."""
+    results = pd.concat(chunks, ignore_index=True).sort_values('Serial Number', kind='stable', ignore_index=True)
+    base_cols = ['Serial Number', 'Channel', 'Pass/Fail', '120s(St.Dev.)']
+    tests = 0
+    while f'Status(T{tests + 1})' in results.columns:
+        tests += 1
+    test_cols = [f'{reading}(T{test})' for test in range(1, tests + 1)
+                 for reading in ('0s', '90s', '120s', '%Chg', 'Status')]
+    return results[base_cols + test_cols]
+
+def rate_interval(count, n, population, z=CONFIDENCE_Z):
+    """(low, high) percent confidence interval for a rate seen count times in n of population items.
+    
+    Wilson score interval with a finite population correction, so it closes to the
+    exact rate once every item has been seen.
+    """
+    if n == 0:
+        return 0.0, 100.0
+    fpc = np.sqrt(max(population - n, 0) / (population - 1)) if population > 1 else 0.0
+    z = z * fpc
+    p = count / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return float(max(center - half, 0.0)) * 100, float(min(center + half, 1.0)) * 100
+
+def result_population(df):
+    """Number of sensors determine_pass_fail() gives a result: those with a 120s reading."""
+    return df.loc[df['120'].notna(), 'Serial Number'].nunique()
+
+def estimate_rates(results, population):
+    """summarize_results() of part of a job plus confidence intervals for the whole job's rates.
+    
+    population is the job's result_population(); adds 'population', 'pass_rate_ci' and 'fail_rate_ci'.
+    """
+    summary = summarize_results(results)
+    n = summary['total_sensors']
+    counted = summary['passed_sensors'] + summary['failed_sensors']
+    counted_population = round(population * counted / n) if n else 0
+    return {
+        **summary,
+        'population': population,
+        'pass_rate_ci': rate_interval(summary['passed_sensors'], counted, counted_population),
+        'fail_rate_ci': rate_interval(summary['failed_sensors'], counted, counted_population),
+    }
+
+# ==================== SERIAL LOOKUPS ====================
+def build_serial_row_ranges(job_data):
+    """Sort a job's rows by serial (then test) once and map each serial to its (start, stop) rows."""
+    sort_cols = ['Serial Number'] + (['Test #'] if 'Test #' in job_data.columns else [])
+    sorted_rows = job_data.sort_values(sort_cols, kind='stable').reset_index(drop=True)
+    if len(sorted_rows) == 0:
+        return sorted_rows, {}
+    
+    serials = sorted_rows['Serial Number'].to_numpy()
+    boundaries = np.flatnonzero(serials[1:] != serials[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [len(serials)]))
+    return sorted_rows, dict(zip(serials[starts], zip(starts.tolist(), stops.tolist())))
+
+class SerialSearchIndex:
+    """Trigram index over an analysis result's serial numbers for case-insensitive partial matching."""
+    
+    GRAM = 3
+    
+    def __init__(self, serials):
+        self.serials = np.array([str(s).lower() for s in serials], dtype=object)
+        postings = {}
+        for pos, serial in enumerate(self.serials):
+            for gram in {serial[i:i + self.GRAM] for i in range(len(serial) - self.GRAM + 1)}:
+                postings.setdefault(gram, []).append(pos)
+        self.postings = {gram: np.array(positions, dtype=np.int64) for gram, positions in postings.items()}
+    
+    def match_term(self, term):
+        """Sorted row positions whose serial contains term."""
+        term = term.lower()
+        if len(term) < self.GRAM:
+            # Too short for trigrams - scan, as these queries are rare and only last one keystroke
+            return np.flatnonzero([term in serial for serial in self.serials])
+        
+        grams = sorted({term[i:i + self.GRAM] for i in range(len(term) - self.GRAM + 1)},
+                       key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = self.postings.get(grams[0])
+        if candidates is None:
+            return np.empty(0, dtype=np.int64)
+        for gram in grams[1:]:
+            # Probe the larger sorted posting list for each candidate: O(candidates * log(postings))
+            postings = self.postings.get(gram)
+            if postings is None:
+                return np.empty(0, dtype=np.int64)
+            slots = np.searchsorted(postings, candidates).clip(max=len(postings) - 1)
+            candidates = candidates[postings[slots] == candidates]
+            if len(candidates) == 0:
+                return candidates
+        
+        # Trigrams can match out of order; confirm the substring on the few survivors
+        if len(term) > self.GRAM:
+            candidates = candidates[[term in self.serials[pos] for pos in candidates]]
+        return candidates
+    
+    def search(self, query):
+        """Row positions matching any comma-separated term in query, in original order."""
+        terms = [t.strip() for t in query.split(',') if t.strip()]
+        if not terms:
+            return np.arange(len(self.serials))
+        matches = [self.match_term(term) for term in terms]
+        return np.unique(np.concatenate(matches)) if len(matches) > 1 else matches[0]
+
+class GlobalSerialIndex:
+    """Whole dataset sorted by serial, for exact or prefix lookups across every job."""
+    
+    HISTORY_COLUMNS = ['Serial Number', 'Job #', 'Test #', 'Channel'] + TIME_POINTS + ['Timestamp', 'Initials']
+    
+    def __init__(self, df):
+        df = df[df['Serial Number'].notna()]  # Rows without a serial cannot be looked up
+        sort_cols = ['_key'] + [c for c in ['Job #', 'Test #'] if c in df.columns]
+        rows = df[[c for c in self.HISTORY_COLUMNS if c in df.columns]].assign(
+            _key=df['Serial Number'].astype(str).str.strip().str.lower()
+        ).sort_values(sort_cols, kind='stable')
+        self.keys = rows['_key'].to_numpy(dtype=str)
+        self.rows = rows.drop(columns='_key').reset_index(drop=True)
+    
+    def lookup(self, query, exact=False):
+        """All rows for a serial (or serial prefix), as a slice of the serial-sorted frame."""
+        key = query.strip().lower()
+        if not key:
+            return self.rows.iloc[0:0]
+        start = np.searchsorted(self.keys, key, side='left')
+        if exact:
+            stop = np.searchsorted(self.keys, key, side='right')
+        else:
+            stop = np.searchsorted(self.keys, key + '\U0010ffff', side='left')
+        return self.rows.iloc[start:stop]
@@ -4,17 +4,36 @@ import sqlite3
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 import matplotlib.patheffects as path_effects
 import io
 import re
 import json
 import os
 import time
+import hashlib
+import cProfile
+import pstats
+import tracemalloc
+import threading
+import functools
+import itertools
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from contextlib import contextmanager
 from pathlib import Path
 
+import analysis
+import background
+import dashboard_summary
+import exports
+import figures
+import render_worker
+import reports
+import writeback
+from analysis import (THRESHOLDS, JobNotFoundError, calculate_metrics, determine_pass_fail, get_job_data,
+                      summarize_results)
+
 # ==================== PERSISTENCE HELPER FUNCTIONS ====================
 
 # Job history file location
@@ -62,6 +81,115 @@ def set_query_param(key, value):
     except:
         pass
 
+# ==================== ON-DEMAND PROFILING ====================
+
+# Profiles and allocation reports are written here, one pair per profiled rerun
+PROFILE_DIR = Path.home() / '.sensor_analysis_profiles'
+PROFILE_TOP_N = 30  # Functions / allocation sites kept in the JSON summary
+
+def profiling_requested():
+    """Profile this rerun if enabled in Settings or via the ?profile=1 query parameter."""
+    if st.session_state.get('profile_reruns'):
+        return True
+    return str(get_query_param('profile', '')).lower() in ('1', 'true', 'yes', 'on')
+
+def begin_rerun_profile():
+    """Start cProfile and tracemalloc for this rerun when profiling is requested."""
+    if st.session_state.get('active_profile'):
+        # Previous profiled rerun was cut short by st.rerun(); keep what it captured
+        finish_rerun_profile(st.session_state.get('df'), completed=False)
+    
+    if not profiling_requested():
+        return
+    
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Only one profiler can be active per process (e.g. another session is profiling)
+        st.session_state.profile_error = "Another rerun is already being profiled on this server"
+        return
+    
+    owns_tracemalloc = not tracemalloc.is_tracing()
+    if owns_tracemalloc:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    
+    st.session_state.active_profile = {
+        'profiler': profiler,
+        'started': time.perf_counter(),
+        'owns_tracemalloc': owns_tracemalloc
+    }
+
+def finish_rerun_profile(df, completed=True):
+    """Stop profiling and save the .prof file plus a JSON summary. Returns the .prof path."""
+    active = st.session_state.get('active_profile')
+    if not active:
+        return None
+    st.session_state.active_profile = None
+    
+    profiler = active['profiler']
+    profiler.disable()
+    rerun_ms = (time.perf_counter() - active['started']) * 1000
+    
+    snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+    current_bytes, peak_bytes = tracemalloc.get_traced_memory() if snapshot else (0, 0)
+    if active['owns_tracemalloc']:
+        tracemalloc.stop()
+    
+    job = st.session_state.get('current_job')
+    fingerprint = get_dataset_fingerprint(df) if df is not None else 'none'
+    safe_job = re.sub(r'[^A-Za-z0-9.-]', '_', str(job)) if job else 'none'
+    stem = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_job-{safe_job}_{fingerprint[:12]}"
+    
+    # Top functions by cumulative time
+    stats = pstats.Stats(profiler)
+    top_functions = []
+    for (filename, line, func), (_, ncalls, tottime, cumtime, _) in sorted(
+            stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_N]:
+        top_functions.append({
+            'function': f"{filename}:{line}({func})",
+            'calls': ncalls,
+            'tottime_ms': round(tottime * 1000, 2),
+            'cumtime_ms': round(cumtime * 1000, 2)
+        })
+    
+    # Top allocation sites still alive at the end of the rerun
+    top_allocations = []
+    if snapshot is not None:
+        for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N]:
+            frame = stat.traceback[0]
+            top_allocations.append({
+                'site': f"{frame.filename}:{frame.lineno}",
+                'size_kb': round(stat.size / 1024, 1),
+                'blocks': stat.count
+            })
+    
+    summary = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'job': job,
+        'threshold_set': st.session_state.get('current_threshold'),
+        'dataset_fingerprint': fingerprint,
+        'dataset_rows': len(df) if df is not None else 0,
+        'rerun_ms': round(rerun_ms, 2),
+        'completed': completed,
+        'traced_current_mb': round(current_bytes / 1024 / 1024, 2),
+        'traced_peak_mb': round(peak_bytes / 1024 / 1024, 2),
+        'note': "tracemalloc is process-wide: allocations from concurrent sessions are included",
+        'top_functions': top_functions,
+        'top_allocations': top_allocations
+    }
+    
+    try:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        prof_path = PROFILE_DIR / f"{stem}.prof"
+        profiler.dump_stats(str(prof_path))
+        with open(PROFILE_DIR / f"{stem}.json", 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+        return prof_path
+    except Exception:
+        return None
+
 # Page configuration with custom theme
 st.set_page_config(
     page_title="Sensor Analysis Dashboard", 
@@ -72,14 +200,22 @@ st.set_page_config(
     }
 )
 
+# Opt-in cProfile + tracemalloc capture of this whole rerun (finished at the end of the script)
+begin_rerun_profile()
+
 # ==================== CONFIGURATION CONSTANTS ====================
 # Anomaly Detection
 ANOMALY_VOLTAGE_DELTA_THRESHOLD = 3.0  # Volts
 ANOMALY_STD_DEV_MULTIPLIER = 2.0  # Times normal threshold
 
 # Plotting
-PLOT_FIGURE_SIZE = (15, 6)  # Width, Height in inches
-PLOT_VOLTAGE_LIMITS = (0, 5)  # Min, Max voltage for plots
+# (figure sizes and voltage limits live in figures.py with the figure builders)
+FIGURE_CACHE_MAX_MB = 64  # Rendered figure images kept in memory across reruns and sessions
+FIGURE_CACHE_DPI = 200  # Same resolution st.pyplot renders at
+FIGURE_MAX_WIDTH_PX = 1460  # Streamlit downsizes (and re-encodes) wider images on every display
+FIGURE_RENDER_WORKERS = min(4, os.cpu_count() or 1)  # Matplotlib worker processes; 0 renders in the script thread
+SENSOR_GRID_PAGE_SIZE = 12  # Hard cap on sensors drawn per drilldown page
+BAND_APPROX_MIN_ROWS = 500_000  # Jobs this large get sampled trend percentiles (figures.BAND_SAMPLE_SIZE rows)
 
 # History & Caching
 MAX_JOB_HISTORY = 50  # Number of historical jobs to compare
@@ -89,18 +225,57 @@ PRINT_DIALOG_DELAY_MS = 250  # Delay before triggering print
 MAX_JOB_NUMBER_LENGTH = 50  # Maximum characters in job number
 MAX_CSV_SIZE_MB = 100  # Maximum CSV upload size
 
+# Data table
+TABLE_PAGE_SIZES = [50, 100, 250, 500]  # Rows per page options
+TABLE_DEFAULT_PAGE_SIZE = 100
+
+# Sensor history (cross-job serial lookup)
+SENSOR_HISTORY_MAX_ROWS = 500  # Rows shown for broad prefix lookups
+SENSOR_HISTORY_PLOT_MAX_TESTS = 20  # Curves drawn for a single sensor's history
+
+# Bulk reports
+BULK_REPORT_MAX_JOBS = 500  # Jobs rendered per bulk request
+
+# Job number suggestions
+JOB_SUGGESTIONS = 8  # Completions shown under the job number input, and closest matches for a missing job
+
+# Query guardrails (row and time limits are adjustable per session in Settings)
+QUERY_WARN_ROWS = 200_000  # Ask before analyzing more rows than this
+QUERY_MAX_ROWS = 2_000_000  # Analyze no more rows than this at once; offer a sampled preview instead
+QUERY_TIME_BUDGET_S = 120  # Refuse analyses estimated to take longer, and stop any that run over
+QUERY_SAMPLE_SENSORS = 2_000  # Sensors picked at random for a sampled preview
+ANALYSIS_DEFAULT_SENSORS_PER_S = 1_000  # Assumed analysis throughput until one has been timed on this server
+
+# Progressive results (preliminary rates shown while large jobs are analyzed)
+PROGRESSIVE_MIN_SENSORS = 2_000  # Jobs with more sensors than this show preliminary results
+PROGRESSIVE_PREVIEW_SENSORS = 300  # First chunk: a stratified sample small enough to analyze in under a second
+PROGRESSIVE_CHUNK_SENSORS = 2_000  # Later chunks; preliminary results refine after each one
+
+# Background work
+BACKGROUND_WORKERS = 2  # Threads running analyses and report builds for every session
+TASK_POLL_S = 0.5  # How often a page waiting on a background task refreshes its progress
+TASK_RESULT_TTL_S = 600  # Finished results nobody collected (e.g. tab closed) are dropped after this
+PREFETCH_WORKERS = 1  # Threads analyzing Recent Jobs and neighboring jobs ahead of time; 0 disables prefetching
+PREFETCH_MAX_QUEUED = 8  # Prefetches waiting for a thread; more are skipped
+
+# Performance diagnostics
+TIMING_LOG_FILE = Path.home() / '.sensor_analysis_timings.jsonl'
+TIMING_LOG_MAX_MB = 10  # Rotate the timing log to .1 beyond this size
+METRICS_FILE = Path.home() / '.sensor_analysis_metrics.prom'  # Prometheus text exposition
+METRICS_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # Seconds
+
 # ==================== STATUS BADGE CLASS ====================
 class StatusBadge:
     """Centralized status badge management."""
     
     STYLES = {
-        'PASS': {'class': 'status-pass', 'icon': '✓', 'color': '#10b981'},
-        'FL': {'class': 'status-fail', 'icon': '✗', 'color': '#ef4444'},
-        'FH': {'class': 'status-fail', 'icon': '✗', 'color': '#dc2626'},
-        'OT-': {'class': 'status-warning', 'icon': '⚠', 'color': '#f59e0b'},
-        'TT': {'class': 'status-warning', 'icon': '⚠', 'color': '#eab308'},
-        'OT+': {'class': 'status-warning', 'icon': '⚠', 'color': '#fb923c'},
-        'DM': {'class': 'status-info', 'icon': '•', 'color': '#6b7280'},
+        'PASS': {'class': 'status-pass', 'icon': '✓', 'color': '#10b981', 'marker': '🟢'},
+        'FL': {'class': 'status-fail', 'icon': '✗', 'color': '#ef4444', 'marker': '🔴'},
+        'FH': {'class': 'status-fail', 'icon': '✗', 'color': '#dc2626', 'marker': '🔴'},
+        'OT-': {'class': 'status-warning', 'icon': '⚠', 'color': '#f59e0b', 'marker': '🟠'},
+        'TT': {'class': 'status-warning', 'icon': '⚠', 'color': '#eab308', 'marker': '🟠'},
+        'OT+': {'class': 'status-warning', 'icon': '⚠', 'color': '#fb923c', 'marker': '🟠'},
+        'DM': {'class': 'status-info', 'icon': '•', 'color': '#6b7280', 'marker': '⚪'},
     }
     
     @classmethod
@@ -114,6 +289,11 @@ class StatusBadge:
     def get_color(cls, status):
         """Get color for status."""
         return cls.STYLES.get(status, cls.STYLES['DM'])['color']
+    
+    @classmethod
+    def get_label(cls, status):
+        """Plain-text status with colored marker, for table cells."""
+        return f"{cls.STYLES.get(status, cls.STYLES['DM'])['marker']} {status}"
 
 # ==================== CONTEXT MANAGER FOR PLOTS ====================
 @contextmanager
@@ -125,6 +305,402 @@ def create_plot(*args, **kwargs):
     finally:
         plt.close(fig)
 
+# ==================== RENDERED FIGURE CACHE ====================
+@st.cache_resource
+def get_figure_cache():
+    """Single figure cache for this server process."""
+    return figures.FigureCache(FIGURE_CACHE_MAX_MB * 1024 * 1024)
+
+@st.cache_resource
+def get_render_pool():
+    """Pool of headless matplotlib worker processes shared by every session (None if disabled)."""
+    if FIGURE_RENDER_WORKERS <= 0:
+        return None
+    # spawn, not fork: the Streamlit server is multi-threaded. Workers start as charts are submitted
+    return render_worker.start_pool(FIGURE_RENDER_WORKERS)
+
+def map_in_render_pool(func, tasks, progress=None):
+    """Call func(*args) for each {key: args} task in the render pool, in-process if it is unavailable.
+    
+    progress, if given, is called as progress(tasks done, total) as they complete.
+    Returns ({key: result}, {key: error message}).
+    """
+    results, errors, inline = {}, {}, []
+    
+    def record(key, run):
+        try:
+            results[key] = run()
+        except Exception as e:
+            errors[key] = str(e)
+        if progress is not None:
+            progress(len(results) + len(errors), len(tasks))
+    
+    futures = {}
+    pool = get_render_pool()
+    for key, args in tasks.items():
+        if pool is not None:
+            try:
+                futures[pool.submit(func, *args)] = key
+                continue
+            except (BrokenProcessPool, RuntimeError):
+                get_render_pool.clear()
+                pool = None
+        inline.append(key)
+    
+    for future in as_completed(futures):
+        if isinstance(future.exception(), BrokenProcessPool):
+            get_render_pool.clear()
+            inline.append(futures[future])
+        else:
+            record(futures[future], future.result)
+    
+    for key in inline:
+        record(key, lambda key=key: func(*tasks[key]))
+    
+    return results, errors
+
+def submit_figure(kind, key, build_figure, **kwargs):
+    """Start rendering a figure in the worker pool unless it is already cached.
+    
+    build_figure is a figures.py builder called with kwargs. key must identify everything
+    the figure depends on (e.g. dataset fingerprint, job, threshold set); the theme is
+    added here. Submitting every figure a page needs before showing any of them lets
+    them render in parallel. Returns a handle for show_figure().
+    """
+    cache_key = figures.figure_key(kind, st.get_option('theme.base'), key)
+    image = get_figure_cache().get(cache_key)
+    get_metrics_registry().inc('sensor_cache_requests_total', cache=f'figure.{kind}',
+                               result='miss' if image is None else 'hit')
+    handle = {'key': cache_key, 'image': image, 'future': None,
+              'args': (build_figure, kwargs, FIGURE_MAX_WIDTH_PX, FIGURE_CACHE_DPI)}
+    if image is not None:
+        return handle
+    
+    pool = get_render_pool()
+    if pool is not None:
+        try:
+            handle['future'] = pool.submit(figures.render_png, *handle['args'])
+        except (BrokenProcessPool, RuntimeError):
+            # A worker died or the pool was shut down - start a fresh pool next time
+            get_render_pool.clear()
+    return handle
+
+def show_figure(handle):
+    """Display a figure from submit_figure(), waiting for its worker if needed.
+    
+    Returns False if the builder had nothing to draw.
+    """
+    image = handle['image']
+    if image is None:
+        rendered = False
+        if handle['future'] is not None:
+            try:
+                image = handle['future'].result()
+                rendered = True
+            except BrokenProcessPool:
+                get_render_pool.clear()
+        if not rendered:
+            # No pool, or it broke mid-render: draw in the script thread instead
+            image = figures.render_png(*handle['args'])
+        if image is None:
+            return False
+        get_figure_cache().put(handle['key'], image)
+        handle['image'] = image
+    
+    st.image(image, use_container_width=True)
+    return True
+
+def render_cached_figure(kind, key, build_figure, **kwargs):
+    """Render (or reuse) a single figure and display it."""
+    return show_figure(submit_figure(kind, key, build_figure, **kwargs))
+
+def get_status_colors():
+    """Status -> color mapping for the figure builders."""
+    return {status: style['color'] for status, style in StatusBadge.STYLES.items()}
+
+# ==================== METRICS REGISTRY ====================
+class MetricsRegistry:
+    """Process-wide counters and histograms, rendered in Prometheus text format."""
+    
+    METRICS = {
+        'sensor_rows_loaded_total': ('counter', "Rows read from the database or uploaded CSVs"),
+        'sensor_cache_requests_total': ('counter', "Cache lookups by cache and hit/miss"),
+        'sensor_analyze_job_seconds': ('histogram', "Wall time of analyze_job"),
+        'sensor_report_seconds': ('histogram', "Wall time of report generation by report"),
+        'sensor_rerun_seconds': ('histogram', "Wall time of full script reruns"),
+    }
+    
+    def __init__(self, buckets=METRICS_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+    
+    def inc(self, name, amount=1, **labels):
+        """Increase a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def observe(self, name, seconds, **labels):
+        """Record one observation in a histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            hist = self.histograms.setdefault(key, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist['buckets'][i] += 1
+            hist['sum'] += seconds
+            hist['count'] += 1
+    
+    @staticmethod
+    def _format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+    
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: {**h, 'buckets': list(h['buckets'])} for key, h in self.histograms.items()}
+        
+        lines = []
+        for name, (kind, help_text) in self.METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{self._format_labels(labels)} {value}")
+            else:
+                for (metric, labels), hist in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in zip(self.buckets, hist['buckets']):
+                        lines.append(f"{name}_bucket{self._format_labels(labels, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{self._format_labels(labels, [('le', '+Inf')])} {hist['count']}")
+                    lines.append(f"{name}_sum{self._format_labels(labels)} {hist['sum']:.6f}")
+                    lines.append(f"{name}_count{self._format_labels(labels)} {hist['count']}")
+        return '\n'.join(lines) + '\n'
+
+@st.cache_resource
+def get_metrics_registry():
+    """Single registry shared by every session of this server process."""
+    return MetricsRegistry()
+
+# Set by cached function bodies, which only run on a cache miss
+_cache_calls = threading.local()
+
+def note_cache_miss():
+    """Call first thing inside an st.cache_data function body."""
+    _cache_calls.miss = True
+
+def count_cache_hits(cached_func):
+    """Wrap an st.cache_data or st.cache_resource function to count hits and misses in the metrics registry."""
+    @functools.wraps(cached_func)
+    def wrapper(*args, **kwargs):
+        outer = getattr(_cache_calls, 'miss', False)
+        _cache_calls.miss = False
+        try:
+            return cached_func(*args, **kwargs)
+        finally:
+            result = 'miss' if _cache_calls.miss else 'hit'
+            _cache_calls.miss = outer
+            get_metrics_registry().inc('sensor_cache_requests_total', cache=cached_func.__name__, result=result)
+    return wrapper
+
+def observe_span_metrics(name, seconds):
+    """Feed latency histograms from timed spans."""
+    if name == 'analyze_job':
+        get_metrics_registry().observe('sensor_analyze_job_seconds', seconds)
+    elif name.startswith('report.'):
+        get_metrics_registry().observe('sensor_report_seconds', seconds, report=name[len('report.'):])
+
+def write_metrics_file():
+    """Atomically rewrite the Prometheus text file (node_exporter textfile collector format)."""
+    try:
+        tmp_path = Path(f"{METRICS_FILE}.tmp")
+        tmp_path.write_text(get_metrics_registry().render())
+        os.replace(tmp_path, METRICS_FILE)
+    except Exception:
+        pass
+
+# ==================== PERFORMANCE TIMING ====================
+def begin_rerun_timing():
+    """Start collecting spans for this rerun, logging any left by an interrupted one."""
+    pending = st.session_state.get('timing_spans')
+    if pending:
+        # Previous rerun was cut short by st.rerun() before end_rerun_timing()
+        append_timing_log(pending, st.session_state.get('timing_started'), completed=False)
+    st.session_state.timing_spans = []
+    st.session_state.timing_depth = 0
+    st.session_state.timing_started = time.perf_counter()
+
+@st.cache_resource
+def get_task_timing():
+    """Span collector of the background task running on each worker thread.
+    
+    Cached so the worker (created by an earlier rerun) and timed_span() in this
+    rerun's copy of the script see the same thread-local.
+    """
+    return threading.local()
+
+def timing_state():
+    """Where spans of the current thread go: its background task, else this session's rerun."""
+    state = getattr(get_task_timing(), 'state', None)
+    return state if state is not None else st.session_state
+
+@contextmanager
+def timed_span(name, **attrs):
+    """Time a block and record it as a span of the current rerun (or background task)."""
+    state = timing_state()
+    spans = state.get('timing_spans')
+    started = state.get('timing_started') or time.perf_counter()
+    depth = state.get('timing_depth', 0)
+    state['timing_depth'] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        state['timing_depth'] = depth
+        observe_span_metrics(name, end - start)
+        if spans is not None:
+            spans.append({
+                'name': name,
+                'ms': round((end - start) * 1000, 2),
+                'start_ms': round((start - started) * 1000, 2),
+                'depth': depth,
+                **attrs
+            })
+
+def append_timing_log(spans, started, completed=True):
+    """Append one rerun's spans to the JSONL timing log."""
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'job': st.session_state.get('current_job'),
+        'threshold_set': st.session_state.get('current_threshold'),
+        'rerun_ms': round((time.perf_counter() - started) * 1000, 2) if started else None,
+        'completed': completed,
+        'spans': sorted(spans, key=lambda span: span['start_ms'])
+    }
+    try:
+        if TIMING_LOG_FILE.exists() and TIMING_LOG_FILE.stat().st_size > TIMING_LOG_MAX_MB * 1024 * 1024:
+            TIMING_LOG_FILE.replace(Path(f"{TIMING_LOG_FILE}.1"))
+        with open(TIMING_LOG_FILE, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+    except Exception:
+        pass
+
+def end_rerun_timing():
+    """Finish this rerun's spans: log them and return (spans, total ms)."""
+    spans = st.session_state.get('timing_spans') or []
+    started = st.session_state.get('timing_started') or time.perf_counter()
+    rerun_ms = (time.perf_counter() - started) * 1000
+    if spans:
+        append_timing_log(spans, started, completed=True)
+    get_metrics_registry().observe('sensor_rerun_seconds', rerun_ms / 1000)
+    write_metrics_file()
+    st.session_state.timing_spans = None
+    return spans, rerun_ms
+
+def render_timing_panel(spans, rerun_ms):
+    """Show this rerun's stage timings in a diagnostics expander."""
+    with st.expander(f"⏱️ Performance Diagnostics ({rerun_ms:,.0f} ms this rerun)", expanded=False):
+        if not spans:
+            st.caption("No timed stages ran in this rerun")
+            return
+        base_keys = {'name', 'ms', 'start_ms', 'depth'}
+        rows = []
+        for span in sorted(spans, key=lambda span: span['start_ms']):
+            detail = ', '.join(f"{k}={v}" for k, v in span.items() if k not in base_keys)
+            rows.append({
+                'Stage': '\u2003' * span['depth'] + span['name'],
+                'Time (ms)': span['ms'],
+                'Start (ms)': span['start_ms'],
+                'Detail': detail
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        st.caption(f"Logged to `{TIMING_LOG_FILE}` · Metrics in `{METRICS_FILE}`")
+
+# ==================== BACKGROUND TASKS ====================
+@st.cache_resource
+def get_background_worker():
+    """Background worker shared by every session of this server process."""
+    return background.BackgroundWorker(BACKGROUND_WORKERS, PREFETCH_WORKERS, TASK_RESULT_TTL_S, PREFETCH_MAX_QUEUED,
+                                       timing=get_task_timing())
+
+def session_token():
+    """Identifies this session to the background worker."""
+    if 'session_token' not in st.session_state:
+        st.session_state.session_token = os.urandom(8).hex()
+    return st.session_state.session_token
+
+def start_background_task(slot, key, label, func, *args, time_budget_s=None):
+    """Run func(task, *args) in the background for this session's slot (e.g. 'analysis').
+    
+    A slot holds one task per session; starting a different one stops waiting on the old one.
+    """
+    tasks = st.session_state.setdefault('background_tasks', {})
+    previous = tasks.get(slot)
+    if previous is not None and previous.key == key and not previous.cancel_event.is_set():
+        worker = get_background_worker()
+        with worker.lock:
+            worker.join(previous, session_token(), time_budget_s)  # The budget may have changed in Settings
+        return previous
+    if previous is not None:
+        get_background_worker().release(previous, session_token(), cancel=True)
+    tasks[slot] = get_background_worker().submit(key, label, session_token(), func, *args,
+                                                 time_budget_s=time_budget_s)
+    return tasks[slot]
+
+def background_task(slot):
+    """This session's task in slot, if any."""
+    return st.session_state.get('background_tasks', {}).get(slot)
+
+def finish_background_task(slot):
+    """Take a finished task out of its slot, adding its spans to this rerun's timings. None if not finished."""
+    task = background_task(slot)
+    if task is None or not task.finished:
+        return None
+    del st.session_state.background_tasks[slot]
+    get_background_worker().release(task, session_token())
+    spans = st.session_state.get('timing_spans')
+    if spans is not None:
+        spans.extend({**span, 'background': True} for span in task.spans)
+    return task
+
+def cancel_background_task(slot):
+    """Stop waiting on this session's task in slot; it is cancelled unless another session still wants it."""
+    task = st.session_state.get('background_tasks', {}).pop(slot, None)
+    if task is not None:
+        get_background_worker().release(task, session_token(), cancel=True)
+
+@st.fragment(run_every=TASK_POLL_S)
+def render_task_progress(slot, render_partial=None):
+    """Progress bar and Cancel button for a background task, refreshed until it finishes.
+    
+    render_partial, if given, is called with the task's preliminary result whenever it has one.
+    """
+    task = background_task(slot)
+    if task is None:
+        return
+    if task.finished:
+        # Rerun the page so it picks up the result
+        st.rerun()
+    col_progress, col_cancel = st.columns([5, 1])
+    with col_progress:
+        st.progress(task.progress, text=f"{task.label}: {task.message}")
+    with col_cancel:
+        if st.button("✖️ Cancel", key=f"cancel_{slot}", use_container_width=True):
+            cancel_background_task(slot)
+            st.rerun()
+    if render_partial is not None and task.partial is not None:
+        render_partial(task, task.partial)
+
 # ==================== TUTORIAL SYSTEM ====================
 
 class TutorialSystem:
@@ -312,9 +888,9 @@ class TutorialSystem:
                 **In the sidebar,** find the **📊 Export** button.
                 
                 When you click it:
-                1. A download button will appear
-                2. Click "📥 Download Results CSV"
-                3. The file includes all your filtered data
+                1. An export panel opens above the results
+                2. Pick the data (this job, several jobs, or raw readings) and a format
+                3. Click "📥 Download" - large exports are written in chunks as they download
                 
                 **Quick Reports** (in main area):
                 - 📄 **Summary Report** - Comprehensive analysis overview
@@ -842,23 +1418,7 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Define threshold sets
-THRESHOLDS = {
-    'Standard': {
-        'min_120s': 1.50,
-        'max_120s': 4.9,
-        'min_pct_change': -6.00,
-        'max_pct_change': 30.00,
-        'max_std_dev': 0.3
-    },
-    'High Range': {
-        'min_120s': 0.55,
-        'max_120s': 1.0,
-        'min_pct_change': 0.00,
-        'max_pct_change': 75.00,
-        'max_std_dev': 0.5
-    }
-}
+# Threshold sets live in analysis.py with the pass/fail logic
 
 # Time points for analysis
 TIME_POINTS = ['0', '5', '15', '30', '60', '90', '120']
@@ -899,26 +1459,52 @@ def validate_job_number(job_input):
     return job_input, None
 
 # ==================== DATA LOADING WITH IMPROVED ERROR HANDLING ====================
+def dataset_fingerprint(df):
+    """Short content hash of a loaded dataset, for tagging logs, profiles and caches."""
+    if df is None or len(df) == 0:
+        return 'empty'
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update('|'.join(map(str, df.columns)).encode())
+    return digest.hexdigest()[:16]
+
+def get_dataset_fingerprint(df):
+    """dataset_fingerprint() of the session's dataset, computed once per loaded frame."""
+    # The memo holds the frame itself: an id() alone can be reused by a newly loaded frame
+    cached = st.session_state.get('dataset_fingerprint_cache')
+    if cached and cached[0] is df:
+        return cached[1]
+    fingerprint = dataset_fingerprint(df)
+    st.session_state.dataset_fingerprint_cache = (df, fingerprint)
+    return fingerprint
+
+def database_search_paths():
+    """Locations tried, in order, when no database path is set."""
+    return [
+        'sensor_data.db',  # Current directory
+        './sensor_data.db',  # Explicit current directory
+        '/mnt/user-data/outputs/sensor_data.db',  # Outputs directory
+        os.path.join(os.getcwd(), 'sensor_data.db'),  # Working directory
+    ]
+
+def resolve_db_path(db_path=None):
+    """The configured database path, or the first auto-detected one that exists (None if none does)."""
+    if db_path is not None:
+        return db_path
+    return next((path for path in database_search_paths() if os.path.exists(path)), None)
+
+@count_cache_hits
 @st.cache_data(ttl=60)  # Cache for 60 seconds - allow retry if file appears/path is fixed
 def load_data_from_db(db_path=None):
     """Load sensor data from SQLite database with robust error handling."""
+    note_cache_miss()
     # Try multiple possible locations if no path specified
     if db_path is None:
-        possible_paths = [
-            'sensor_data.db',  # Current directory
-            './sensor_data.db',  # Explicit current directory
-            '/mnt/user-data/outputs/sensor_data.db',  # Outputs directory
-            os.path.join(os.getcwd(), 'sensor_data.db'),  # Working directory
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                db_path = path
-                break
+        db_path = resolve_db_path()
         
         if db_path is None:
             st.error(f"❌ Database file not found. Tried locations:\n" + 
-                    "\n".join(f"  - {p}" for p in possible_paths))
+                    "\n".join(f"  - {p}" for p in database_search_paths()))
             st.info("💡 Tip: Set a custom database path in **⚙️ Settings** (sidebar)")
             return pd.DataFrame()
     
@@ -957,6 +1543,7 @@ def load_data_from_db(db_path=None):
             st.error("❌ Missing required column: 'Serial Number'")
             return pd.DataFrame()
         
+        get_metrics_registry().inc('sensor_rows_loaded_total', len(df), source='database')
         st.info(f"✅ Loaded {len(df):,} records from {len(df['Job #'].unique())} unique jobs")
         return df
         
@@ -1014,6 +1601,7 @@ def load_data_from_csv(file):
             st.error("❌ Missing required column: 'Serial Number'")
             return pd.DataFrame()
         
+        get_metrics_registry().inc('sensor_rows_loaded_total', len(df), source='csv')
         st.success(f"✅ Loaded {len(df):,} records from CSV")
         return df
         
@@ -1027,130 +1615,6 @@ def load_data_from_csv(file):
         st.error(f"❌ Unexpected error loading CSV: {str(e)}")
         return pd.DataFrame()
 
-def calculate_metrics(df):
-    """Calculate key metrics for sensor readings."""
-    metrics = df.copy()
-
-    # Calculate percentage change: (120s - 90s) / (90s - 0s) * 100
-    if '0' in df.columns and '90' in df.columns and '120' in df.columns:
-        denominator = df['90'] - df['0']
-        # Avoid division by zero
-        denominator = denominator.replace(0, np.nan)
-        metrics['pct_change_90_120'] = ((df['120'] - df['90']) / denominator * 100).replace([np.inf, -np.inf], np.nan)
-
-    return metrics
-
-# ==================== OPTIMIZED DETERMINE_PASS_FAIL ====================
-def determine_pass_fail(df, threshold_set='Standard'):
-    """Optimized determination of Pass/Fail status based on thresholds."""
-    thresholds = THRESHOLDS[threshold_set]
-    
-    # Group by serial number once
-    grouped = df.groupby('Serial Number')
-    
-    results = []
-    status_priority = {'FL': 1, 'FH': 2, 'OT-': 3, 'TT': 4, 'OT+': 5, 'DM': 6, 'PASS': 7}
-    
-    for serial, group in grouped:
-        # Now process pre-grouped data
-        readings_120 = group['120'].dropna()
-        
-        if len(readings_120) == 0:
-            continue
-            
-        std_dev_120 = readings_120.std() if len(readings_120) > 1 else 0
-        
-        serial_row = {
-            'Serial Number': serial,
-            'Channel': group.iloc[0].get('Channel', ''),
-        }
-        
-        all_failure_codes = []
-        
-        # Process each test
-        for test_idx, (_, row) in enumerate(group.iterrows(), 1):
-            test_prefix = f'T{test_idx}'
-            
-            # Add readings
-            serial_row[f'0s({test_prefix})'] = row.get('0', np.nan)
-            serial_row[f'90s({test_prefix})'] = row.get('90', np.nan)
-            serial_row[f'120s({test_prefix})'] = row.get('120', np.nan)
-            
-            # Check failures
-            pct_change = row.get('pct_change_90_120', np.nan)
-            if pd.notna(pct_change):
-                serial_row[f'%Chg({test_prefix})'] = f"{pct_change:.1f}%"
-            else:
-                serial_row[f'%Chg({test_prefix})'] = np.nan
-            
-            failure_codes = []
-            reading_120 = row['120']
-            
-            if pd.notna(reading_120):
-                if reading_120 < thresholds['min_120s']:
-                    failure_codes.append('FL')
-                if reading_120 > thresholds['max_120s']:
-                    failure_codes.append('FH')
-            else:
-                failure_codes.append('DM')
-            
-            if pd.notna(pct_change):
-                if pct_change < thresholds['min_pct_change']:
-                    failure_codes.append('OT-')
-                if pct_change > thresholds['max_pct_change']:
-                    failure_codes.append('OT+')
-            
-            test_status = 'PASS' if len(failure_codes) == 0 else ','.join(sorted(set(failure_codes)))
-            serial_row[f'Status({test_prefix})'] = test_status
-            all_failure_codes.extend(failure_codes)
-        
-        # Check std dev
-        if std_dev_120 > thresholds['max_std_dev']:
-            all_failure_codes.append('TT')
-        
-        # Determine status
-        if len(all_failure_codes) == 0:
-            status = 'PASS'
-        else:
-            unique_failures = list(set(all_failure_codes))
-            unique_failures.sort(key=lambda x: status_priority.get(x, 99))
-            status = unique_failures[0]
-        
-        serial_row['Pass/Fail'] = status
-        serial_row['120s(St.Dev.)'] = std_dev_120
-        results.append(serial_row)
-    
-    # Create DataFrame
-    results_df = pd.DataFrame(results)
-    
-    # Reorder columns
-    base_cols = ['Serial Number', 'Channel', 'Pass/Fail', '120s(St.Dev.)']
-    test_cols = [col for col in results_df.columns if col not in base_cols]
-    results_df = results_df[base_cols + test_cols]
-    
-    return results_df
-
-def get_job_data(df, job_number):
-    """Get data for a specific job number or all jobs starting with that number."""
-    job_number_str = str(job_number).strip()
-
-    # Try exact match first
-    job_data = df[df['Job #'] == job_number_str].copy()
-
-    # If no match, try stripping whitespace
-    if len(job_data) == 0:
-        job_data = df[df['Job #'].str.strip() == job_number_str].copy()
-
-    # If still no match, try matching jobs that start with the number
-    if len(job_data) == 0:
-        job_data = df[df['Job #'].str.strip().str.startswith(job_number_str)].copy()
-
-    # If still no match, try case-insensitive
-    if len(job_data) == 0:
-        job_data = df[df['Job #'].str.lower().str.strip().str.startswith(job_number_str.lower())].copy()
-
-    return job_data
-
 def detect_anomalies(results, thresholds):
     """Detect anomalies in sensor data."""
     anomalies = []
@@ -1208,9 +1672,11 @@ def detect_anomalies(results, thresholds):
     
     return anomalies
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_historical_jobs(df, current_job, num_jobs=MAX_JOB_HISTORY):
-    """Get ALL available jobs from database for aggregation by whole number prefix."""
+def get_historical_jobs(df, num_jobs=MAX_JOB_HISTORY, progress=None):
+    """Get ALL available jobs from database for aggregation by whole number prefix.
+    
+    progress, if given, is called as progress(jobs done, total jobs) before each job.
+    """
     historical_data = []
     
     try:
@@ -1218,31 +1684,23 @@ def get_historical_jobs(df, current_job, num_jobs=MAX_JOB_HISTORY):
         unique_jobs = df['Job #'].unique()
         
         # Process each unique job
-        for job_id in unique_jobs:
+        for job_idx, job_id in enumerate(unique_jobs):
+            if progress is not None:
+                progress(job_idx, len(unique_jobs))
             try:
                 job_data = get_job_data(df, job_id)
                 
                 if len(job_data) > 0:
                     job_data = calculate_metrics(job_data)
-                    results = determine_pass_fail(job_data, 'Standard')
-                    
-                    # Calculate stats
-                    total = len(results)
-                    passed = len(results[results['Pass/Fail'].isin(['PASS', 'OT-', 'TT', 'OT+'])])
-                    failed = len(results[results['Pass/Fail'].isin(['FL', 'FH'])])
-                    counted = passed + failed
-                    
-                    pass_pct = (passed / counted * 100) if counted > 0 else 0
-                    fail_pct = (failed / counted * 100) if counted > 0 else 0
+                    stats = summarize_results(determine_pass_fail(job_data, 'Standard'))
                     
                     historical_data.append({
                         'job': str(job_id),
-                        'total': total,
-                        'passed': passed,
-                        'pass_pct': pass_pct,
-                        'failed': failed,
-                        'fail_pct': fail_pct,
-                        'is_current': str(job_id) == str(current_job)
+                        'total': stats['total_sensors'],
+                        'passed': stats['passed_sensors'],
+                        'pass_pct': stats['pass_rate'],
+                        'failed': stats['failed_sensors'],
+                        'fail_pct': stats['fail_rate']
                     })
             except:
                 pass
@@ -1258,631 +1716,786 @@ def get_historical_jobs(df, current_job, num_jobs=MAX_JOB_HISTORY):
     
     return historical_data
 
-def generate_report_summary(info, job_number, df=None):
-    """Generate a complete HTML report with proper styling for printing."""
-    status_counts = info['status_counts']
-    
-    # Build HTML report with inline CSS
-    report = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Sensor Analysis Report - Job {job_number}</title>
-    <style>
-        @page {{
-            margin: 1in;
-        }}
-        
-        body {{
-            font-family: Arial, sans-serif;
-            padding: 20px;
-            max-width: 100%;
-            margin: 0 auto;
-            color: #000;
-            background: #fff;
-        }}
-        
-        h1, h2, h3 {{
-            color: #333;
-            page-break-after: avoid;
-        }}
-        
-        h1 {{
-            font-size: 24px;
-            margin-bottom: 10px;
-            border-bottom: 3px solid #667eea;
-            padding-bottom: 10px;
-        }}
-        
-        h2 {{
-            font-size: 20px;
-            margin-top: 30px;
-            margin-bottom: 15px;
-            color: #667eea;
-        }}
-        
-        h3 {{
-            font-size: 16px;
-            margin-top: 20px;
-            margin-bottom: 10px;
-        }}
-        
-        .header-info {{
-            color: #666;
-            font-size: 14px;
-            margin-bottom: 20px;
-        }}
-        
-        .section {{
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 30px;
-            margin-bottom: 30px;
-            page-break-inside: avoid;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            font-size: 13px;
-            margin-bottom: 20px;
-            page-break-inside: avoid;
-        }}
-        
-        th, td {{
-            padding: 8px;
-            text-align: left;
-            border: 1px solid #ddd;
-        }}
-        
-        th {{
-            background-color: #f5f5f5;
-            font-weight: bold;
-            color: #333;
-        }}
-        
-        tr:nth-child(even) {{
-            background-color: #f9f9f9;
-        }}
-        
-        .highlight-row {{
-            background-color: #fff3cd !important;
-            font-weight: bold;
-        }}
-        
-        .no-print {{
-            display: none;
-        }}
-    </style>
-</head>
-<body>
-    <h1>Sensor Analysis Report - Job Summary</h1>
-    <p class="header-info">Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-    
-    <div class="section">
-        <div>
-            <h2>Job {info['matched_jobs'][0].split('.')[0]} Analysis</h2>
-            <table>
-                <tr>
-                    <th>Metric</th>
-                    <th>Value</th>
-                </tr>
-                <tr>
-                    <td>Job Number</td>
-                    <td>{job_number}</td>
-                </tr>
-                <tr>
-                    <td>Total Sensors</td>
-                    <td>{info['total_sensors']}</td>
-                </tr>
-                <tr>
-                    <td>Sensors Passed</td>
-                    <td>{info['passed_sensors']} ({info['pass_rate']:.1f}%)</td>
-                </tr>
-                <tr>
-                    <td>Sensors Failed</td>
-                    <td>{info['failed_sensors']} ({info['fail_rate']:.1f}%)</td>
-                </tr>
-                <tr>
-                    <td>Data Missing</td>
-                    <td>{info['dm_sensors']}</td>
-                </tr>
-                <tr>
-                    <td>Threshold Set</td>
-                    <td>{info['threshold_set']}</td>
-                </tr>
-            </table>
-        </div>
-        
-        <div>
-            <h2>Status Breakdown</h2>
-            <table>
-                <tr>
-                    <th>Status Code</th>
-                    <th>Count</th>
-                    <th>Percentage</th>
-                </tr>
-"""
-    
-    # Add status rows
-    for status in ['PASS', 'FL', 'FH', 'OT-', 'TT', 'OT+', 'DM']:
-        count = status_counts.get(status, 0)
-        if count > 0:
-            pct = (count / info['total_sensors'] * 100)
-            report += f"""                <tr>
-                    <td>{status}</td>
-                    <td>{count}</td>
-                    <td>{pct:.1f}%</td>
-                </tr>
-"""
-    
-    report += """            </table>
-        </div>
-    </div>
-    
-    <h2>Job Analysis Comparison</h2>
-    <table>
-        <tr>
-            <th>Job Number</th>
-            <th>Total Sensors</th>
-            <th>Passed Qty</th>
-            <th>Passed %</th>
-            <th>Failed Qty</th>
-            <th>Failed %</th>
-        </tr>
-"""
-    
-    # Add historical job comparison
-    if df is not None and len(df) > 0:
-        historical = get_historical_jobs(df, job_number, num_jobs=MAX_JOB_HISTORY)
-        
-        if historical and len(historical) > 0:
-            # Group jobs by whole number prefix
-            job_groups = {}
-            
-            for job in historical:
-                job_str = str(job['job']).strip()
-                try:
-                    if '.' in job_str:
-                        prefix = job_str.split('.')[0]
-                    else:
-                        prefix = job_str
-                except:
-                    prefix = job_str
-                
-                if prefix not in job_groups:
-                    job_groups[prefix] = {'total': 0, 'passed': 0, 'failed': 0}
-                
-                job_groups[prefix]['total'] += job['total']
-                job_groups[prefix]['passed'] += job['passed']
-                job_groups[prefix]['failed'] += job['failed']
-            
-            totals = {'total': 0, 'passed': 0, 'failed': 0}
-            sorted_prefixes = sorted(job_groups.keys(), key=lambda x: (not x.replace('.','').isdigit(), x.replace('.','').zfill(10) if x.replace('.','').isdigit() else x))
-            
-            for prefix in sorted_prefixes:
-                group = job_groups[prefix]
-                passed_pct = (group['passed'] / group['total'] * 100) if group['total'] > 0 else 0
-                failed_pct = 100 - passed_pct
-                
-                # Highlight current job
-                row_class = ' class="highlight-row"' if prefix == str(job_number).split('.')[0] else ''
-                
-                report += f"""        <tr{row_class}>
-            <td>{prefix}</td>
-            <td>{group['total']}</td>
-            <td>{group['passed']}</td>
-            <td>{passed_pct:.2f}%</td>
-            <td>{group['failed']}</td>
-            <td>{failed_pct:.2f}%</td>
-        </tr>
-"""
-                totals['total'] += group['total']
-                totals['passed'] += group['passed']
-                totals['failed'] += group['failed']
-            
-            # Add average row
-            if len(job_groups) > 1:
-                avg_pass_pct = (totals['passed'] / totals['total'] * 100) if totals['total'] > 0 else 0
-                avg_fail_pct = 100 - avg_pass_pct
-                report += f"""        <tr style="border-top: 2px solid #333; font-weight: bold;">
-            <td>Average:</td>
-            <td>{totals['total']/len(job_groups):.0f}</td>
-            <td>{totals['passed']/len(job_groups):.0f}</td>
-            <td>{avg_pass_pct:.2f}%</td>
-            <td>{totals['failed']/len(job_groups):.0f}</td>
-            <td>{avg_fail_pct:.2f}%</td>
-        </tr>
-"""
-    
-    report += """    </table>
-</body>
-</html>
-"""
-    
-    return report
-
-def create_enhanced_plot(df, job_number, threshold_set='Standard'):
-    """Generate enhanced visualization for a specific job with dark mode compatibility."""
-    job_data = get_job_data(df, job_number)
+@count_cache_hits
+@st.cache_resource(max_entries=4)
+def build_job_comparison(fingerprint, _df, _progress=None):
+    """Job comparison report model for a dataset, shared by every session and report."""
+    note_cache_miss()
+    return reports.build_comparison_model(get_historical_jobs(_df, progress=_progress))
+
+def compare_jobs(task, fingerprint, df):
+    """Background body of get_job_comparison()."""
+    def progress(done, total):
+        task.report(done / total, f"Analyzed {done:,} of {total:,} jobs")
+    with timed_span('report.comparison_build'):
+        return build_job_comparison(fingerprint, df, _progress=progress)
+
+def get_job_comparison(df):
+    """Job comparison model for the loaded dataset, or None while it is computed in the background.
+    
+    Computed once per dataset fingerprint; calling this starts (or joins) the background build.
+    """
+    fingerprint = get_dataset_fingerprint(df)
+    ready = st.session_state.get('job_comparison')
+    if ready is not None and ready[0] == fingerprint:
+        return ready[1]
+    start_background_task('comparison', ('comparison', fingerprint), "Comparing jobs", compare_jobs, fingerprint, df)
+    task = finish_background_task('comparison')
+    if task is not None and task.state == 'done':
+        st.session_state.job_comparison = (fingerprint, task.result)
+        return task.result
+    return None
+
+def get_failed_report(info):
+    """Failed sensors report model for an analysis result (built on demand)."""
+    if info.get('failed_report') is None:
+        info['failed_report'] = reports.build_failed_model(info['results'])
+    return info['failed_report']
+
+def get_serial_index(info):
+    """Serial search index for an analysis result (built on demand for older results)."""
+    if info.get('serial_index') is None:
+        info['serial_index'] = analysis.SerialSearchIndex(info['results']['Serial Number'])
+    return info['serial_index']
+
+def filter_by_serial(info, data, serial_text):
+    """Rows of data (a subset of info['results']) whose serial matches the comma-separated query."""
+    positions = get_serial_index(info).search(serial_text)
+    matched = info['results'].index[positions]
+    if len(data) == len(info['results']):
+        return data.loc[matched]
+    return data.loc[data.index.intersection(matched, sort=False)]
+
+def get_sorted_job_data(info, df):
+    """The analyzed job's rows sorted by serial and test (built on demand for older results)."""
+    if info.get('serial_rows') is None:
+        info['sorted_job_data'], info['serial_rows'] = analysis.build_serial_row_ranges(
+            get_job_data(df, st.session_state.current_job))
+    return info['sorted_job_data']
+
+def get_sensor_tests(info, df, serial):
+    """All test rows for one serial of the analyzed job, as a slice of the serial-sorted job rows."""
+    sorted_rows = get_sorted_job_data(info, df)
+    start, stop = info['serial_rows'].get(serial, (0, 0))
+    return sorted_rows.iloc[start:stop]
+
+def get_row_statuses(info, df):
+    """Pass/Fail status of each serial-sorted job row, for the raw curve overlay."""
+    if info.get('row_statuses') is None:
+        sensor_status = info['results'].set_index('Serial Number')['Pass/Fail']
+        info['row_statuses'] = get_sorted_job_data(info, df)['Serial Number'].map(sensor_status).fillna('DM').to_numpy()
+    return info['row_statuses']
+
+def compute_job_band_summary(job_data):
+    """Trend band statistics for a job, sampled percentiles for very large prefix jobs."""
+    return figures.compute_band_summary(job_data, approximate=len(job_data) >= BAND_APPROX_MIN_ROWS)
+
+def get_band_summary(info, df):
+    """Trend band statistics for an analysis result (built on demand for older results)."""
+    if info.get('band_summary') is None:
+        info['band_summary'] = compute_job_band_summary(get_sorted_job_data(info, df))
+    return info['band_summary']
+
+def format_results_for_display(results):
+    """Format reading columns and status labels once per analysis result, vectorized."""
+    display = results.copy()
+    for col in results.columns:
+        if col.startswith('0s(') or col.startswith('90s(') or col.startswith('120s('):
+            values = pd.to_numeric(results[col], errors='coerce').to_numpy(dtype=float)
+            fmt = '%.3f' if col == '120s(St.Dev.)' else '%.1f'
+            display[col] = np.where(np.isnan(values), '—', np.char.mod(fmt, values))
+    status_labels = {status: StatusBadge.get_label(status) for status in StatusBadge.STYLES}
+    display['Pass/Fail'] = results['Pass/Fail'].map(status_labels).fillna(results['Pass/Fail'])
+    return display
+
+def get_display_results(info):
+    """Cached display frame for an analysis result (built on demand for older results)."""
+    if info.get('display_results') is None:
+        info['display_results'] = format_results_for_display(info['results'])
+    return info['display_results']
+
+def table_column_config():
+    """Column settings for the results table."""
+    return {
+        'Serial Number': st.column_config.TextColumn('Serial Number', pinned=True),
+        'Pass/Fail': st.column_config.TextColumn('Pass/Fail', help="🟢 PASS · 🟠 OT-/TT/OT+ · 🔴 FL/FH · ⚪ DM"),
+    }
+
+def get_table_page(display_results, row_index, page, page_size):
+    """Select one page of pre-formatted rows for the given (filtered) result index."""
+    start = (page - 1) * page_size
+    return display_results.loc[row_index[start:start + page_size]]
+
+# ==================== QUERY GUARDRAILS ====================
+@count_cache_hits
+@st.cache_resource(max_entries=4)
+def build_job_index(fingerprint, _df):
+    """Per-job row and sensor counts for a dataset, shared by every session."""
+    note_cache_miss()
+    return analysis.JobIndex(_df)
+
+def get_job_index(df):
+    """Job index of the loaded dataset, built once per dataset fingerprint."""
+    return build_job_index(get_dataset_fingerprint(df), df)
+
+@st.cache_resource
+def get_analysis_throughput():
+    """Analysis speed (sensors per second) measured on this server, for estimating query time."""
+    return {'sensors_per_s': float(ANALYSIS_DEFAULT_SENSORS_PER_S), 'measured': False}
+
+def record_analysis_throughput(sensors, seconds):
+    """Fold one finished analysis into the measured throughput (moving average)."""
+    if sensors < 100 or seconds <= 0:
+        return  # Too small to say anything about speed
+    throughput = get_analysis_throughput()
+    rate = sensors / seconds
+    throughput['sensors_per_s'] = rate if not throughput['measured'] else 0.7 * throughput['sensors_per_s'] + 0.3 * rate
+    throughput['measured'] = True
+
+def query_limits():
+    """This session's query budgets (Settings), defaulting to the configured constants."""
+    return {
+        'warn_rows': st.session_state.get('query_warn_rows', QUERY_WARN_ROWS),
+        'max_rows': st.session_state.get('query_max_rows', QUERY_MAX_ROWS),
+        'time_budget_s': st.session_state.get('query_time_budget_s', QUERY_TIME_BUDGET_S),
+    }
+
+def check_query(df, job_number):
+    """Size a job query from the job index and judge it against this session's budgets.
+    
+    Returns (estimate, verdict): verdict is 'ok', 'warn' (confirm first) or 'refuse' (sampled preview only).
+    """
+    estimate = get_job_index(df).estimate(job_number)
+    estimate['seconds'] = estimate['sensors'] / get_analysis_throughput()['sensors_per_s']
+    return estimate, analysis.judge_query(estimate, query_limits())
+
+def request_job_analysis(df, job_number, threshold_set, remember=False):
+    """Start an analysis if it fits this session's budgets; otherwise hold it for the user to decide."""
+    estimate, verdict = check_query(df, job_number)
+    st.session_state.held_query = None
+    if verdict == 'ok':
+        start_job_analysis(df, job_number, threshold_set, remember)
+    else:
+        st.session_state.held_query = {'job': job_number, 'threshold_set': threshold_set, 'remember': remember,
+                                       'estimate': estimate, 'verdict': verdict}
+
+def render_held_query(df):
+    """Warning for a query over budget, with the choice to run it anyway, preview a sample or drop it."""
+    held = st.session_state.get('held_query')
+    if not held:
+        return
+    estimate, limits = held['estimate'], query_limits()
+    size = (f"Job {held['job']} matches {estimate['jobs']:,} jobs, {estimate['rows']:,} rows and about "
+            f"{estimate['sensors']:,} sensors (estimated {estimate['seconds']:.0f} s to analyze).")
+    if held['verdict'] == 'refuse':
+        st.error(f"🛑 {size} That is over this session's limit of {limits['max_rows']:,} rows or "
+                 f"{limits['time_budget_s']:g} s. Narrow the job number, or preview a random sample of sensors.")
+    else:
+        st.warning(f"⚠️ {size} Large queries slow the server down for everyone.")
+    
+    sample_size = min(QUERY_SAMPLE_SENSORS, estimate['sensors'])
+    col_run, col_sample, col_cancel = st.columns(3)
+    with col_run:
+        run_anyway = st.button("▶️ Analyze Anyway", key="held_run", use_container_width=True,
+                               disabled=held['verdict'] == 'refuse')
+    with col_sample:
+        run_sample = st.button(f"🎲 Preview {sample_size:,} Sensors", key="held_sample", use_container_width=True)
+    with col_cancel:
+        dropped = st.button("✖️ Cancel", key="held_cancel", use_container_width=True)
+    
+    if run_anyway or run_sample or dropped:
+        st.session_state.held_query = None
+        if run_anyway or run_sample:
+            start_job_analysis(df, held['job'], held['threshold_set'], held['remember'],
+                               sample_size=QUERY_SAMPLE_SENSORS if run_sample else None)
+        st.rerun()
+
+def render_query_limit_settings():
+    """Settings controls for this session's query budgets."""
+    st.markdown("### 🛡️ Query Limits")
+    st.number_input("Ask before analyzing more than (rows):", min_value=1_000, step=50_000,
+                    value=QUERY_WARN_ROWS, key="query_warn_rows")
+    st.number_input("Never analyze more than (rows):", min_value=1_000, step=100_000,
+                    value=QUERY_MAX_ROWS, key="query_max_rows",
+                    help="Larger queries can only be previewed from a random sample of sensors")
+    st.number_input("Time budget per analysis (s):", min_value=5, step=30,
+                    value=QUERY_TIME_BUDGET_S, key="query_time_budget_s",
+                    help="Queries estimated to take longer are refused, and analyses that run longer are stopped")
+    throughput = get_analysis_throughput()
+    st.caption(f"Estimates assume {throughput['sensors_per_s']:,.0f} sensors/s "
+               f"({'measured on this server' if throughput['measured'] else 'default until an analysis is timed'})")
+
+def pick_job_suggestion():
+    """Put the clicked suggestion into the job number input."""
+    if st.session_state.job_suggestion:
+        st.session_state.job_number_input = st.session_state.job_suggestion
+    st.session_state.job_suggestion = None
+
+def render_job_suggestions(df, query):
+    """Job numbers completing the entered prefix, or the closest ones when none does."""
+    query = (query or '').strip()
+    if not query or len(df) == 0:
+        return
+    index = get_job_index(df)
+    completions, total = index.complete(query, JOB_SUGGESTIONS)
+    if completions == [query] and total == 1:
+        return  # Exactly one job, and it is the one entered
+    if total > 0:
+        label = f"{total:,} jobs start with {query}:" if total > 1 else "Matching job:"
+        options = completions
+    else:
+        label = "No job matches. Did you mean:"
+        options = index.suggest(query, JOB_SUGGESTIONS)
+    if options:
+        st.pills(label, options, key="job_suggestion", on_change=pick_job_suggestion)
+
+# ==================== ANALYSIS ====================
+def progressive_pass_fail(task, job_data, threshold_set, progress):
+    """determine_pass_fail() in chunks of sensors, publishing preliminary rates as task.partial after each.
+    
+    Sensors are taken in a stratified random order, so the sensors done at any point are a
+    fair sample of every job; the first chunk is small so the first estimate comes quickly.
+    The combined result is identical to a single determine_pass_fail() call.
+    """
+    order = analysis.stratified_serial_order(job_data)
+    population = analysis.result_population(job_data)  # Sensors without a 120s reading get no result
+    row_positions = job_data.groupby('Serial Number', sort=False).indices
+    bounds = [0, *range(PROGRESSIVE_PREVIEW_SENSORS, len(order), PROGRESSIVE_CHUNK_SENSORS), len(order)]
+    chunks = []
+    for start, stop in zip(bounds, bounds[1:]):
+        chunk_rows = job_data.take(np.concatenate([row_positions[serial] for serial in order[start:stop]]))
+        if chunk_rows['120'].isna().all():
+            continue  # No sensor in the chunk has a 120s reading, so none has a result
+        chunks.append(determine_pass_fail(chunk_rows, threshold_set,
+                                          progress=lambda done, total: progress(start + done, len(order))))
+        statuses = pd.concat([chunk[['Pass/Fail']] for chunk in chunks])
+        task.partial = analysis.estimate_rates(statuses, population)
+    if not chunks:
+        return determine_pass_fail(job_data, threshold_set)
+    return analysis.combine_results(chunks)
+
+def render_analysis_preview(task, partial):
+    """Preliminary rates with confidence intervals and status chart, while a large job is analyzed."""
+    st.markdown("#### ⏳ Preliminary Results")
+    st.caption(f"From {partial['total_sensors']:,} of {partial['population']:,} sensors picked at random across "
+               f"the matched jobs. Ranges are 95% confidence intervals; they narrow until the exact result is in.")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Sensors Analyzed", f"{partial['total_sensors']:,}",
+                  delta=f"{partial['total_sensors'] / partial['population'] * 100:.0f}% of job", delta_color="off")
+    with col2:
+        low, high = partial['pass_rate_ci']
+        st.metric("Pass Rate (est.)", f"{partial['pass_rate']:.1f}%", delta=f"{low:.1f}–{high:.1f}%",
+                  delta_color="off")
+    with col3:
+        low, high = partial['fail_rate_ci']
+        st.metric("Fail Rate (est.)", f"{partial['fail_rate']:.1f}%", delta=f"{low:.1f}–{high:.1f}%",
+                  delta_color="off")
+    render_cached_figure(
+        'status_distribution_preview', task.key[1:] + (partial['total_sensors'],),
+        figures.create_status_distribution_plot,
+        status_counts=partial['status_counts'], total_sensors=partial['total_sensors'],
+        status_colors=get_status_colors(), dark=st.get_option('theme.base') == 'dark'
+    )
+
+def analyze_job(task, df, job_number, threshold_set='Standard', sample_size=None, progressive=False):
+    """Analyze data for a specific job number, reporting progress to a background task.
+    
+    sample_size, if given, analyzes only that many of the matched sensors, picked at random.
+    progressive publishes preliminary results of large jobs as they are analyzed.
+    """
+    started = time.perf_counter()
+    with timed_span('analyze_job', job=job_number, threshold_set=threshold_set, sample_size=sample_size):
+        info = _analyze_job(task, df, job_number, threshold_set, sample_size, progressive)
+    record_analysis_throughput(info['total_sensors'], time.perf_counter() - started)
+    return info
+
+def _analyze_job(task, df, job_number, threshold_set, sample_size=None, progressive=False):
+    """Run the timed analysis stages for analyze_job."""
+    if len(df) == 0:
+        raise ValueError("No data loaded. Please load data first.")
+
+    if 'Job #' not in df.columns:
+        raise ValueError("Error: Job # column not found in data")
+
+    # Progress advances as each timed stage actually completes (and through the sensors in pass/fail)
+    task.report(0.0, "Loading job data...")
     
+    with timed_span('analyze.job_lookup', job=job_number):
+        job_data = get_job_data(df, job_number)
+
     if len(job_data) == 0:
-        return None
-    
+        raise JobNotFoundError(job_number)
+
     matched_jobs = sorted(job_data['Job #'].unique())
     thresholds = THRESHOLDS[threshold_set]
     
-    # Aggregate data
-    time_data = []
-    for time_point in TIME_POINTS:
-        if time_point in job_data.columns:
-            readings = job_data[time_point].dropna()
-            if len(readings) > 0:
-                time_data.append({
-                    'time': float(time_point),
-                    'mean': readings.mean(),
-                    'std': readings.std(),
-                    'p5': readings.quantile(0.05),
-                    'p95': readings.quantile(0.95),
-                    'p25': readings.quantile(0.25),
-                    'p75': readings.quantile(0.75)
-                })
+    sample = None
+    if sample_size is not None:
+        serials = job_data['Serial Number'].unique()
+        if len(serials) > sample_size:
+            chosen = np.random.default_rng(0).choice(serials, size=sample_size, replace=False)
+            job_data = job_data[job_data['Serial Number'].isin(chosen)]
+            sample = {'sensors': sample_size, 'of': len(serials)}
+
+    task.report(0.1, "Calculating metrics...")
     
-    if not time_data:
-        return None
+    # Calculate metrics
+    with timed_span('analyze.metrics', rows=len(job_data)):
+        job_data = calculate_metrics(job_data)
+
+    task.report(0.15, "Determining pass/fail status...")
     
-    df_plot = pd.DataFrame(time_data)
-    
-    # Set style for better visibility
-    plt.style.use('dark_background' if st.get_option('theme.base') == 'dark' else 'default')
-    
-    # Create figure with subplots using context manager
-    fig = plt.figure(figsize=PLOT_FIGURE_SIZE, facecolor='#1a1a1a' if st.get_option('theme.base') == 'dark' else 'white')
-    ax1, ax2 = fig.subplots(1, 2)
-    
-    # Set background colors based on theme
-    for ax in [ax1, ax2]:
-        ax.set_facecolor('#2d2d2d' if st.get_option('theme.base') == 'dark' else '#f8f9fa')
-    
-    # Main trend plot (left) with vibrant colors
-    ax1.fill_between(df_plot['time'], df_plot['p5'], df_plot['p95'],
-                     alpha=0.2, color='#7c8bff', label='5th-95th Percentile')
-    ax1.fill_between(df_plot['time'], df_plot['p25'], df_plot['p75'],
-                     alpha=0.3, color='#9b67d6', label='25th-75th Percentile')
-    ax1.fill_between(df_plot['time'], df_plot['mean'] - df_plot['std'],
-                     df_plot['mean'] + df_plot['std'],
-                     alpha=0.4, color='#667eea', label='±1 Std Dev')
-    
-    # Mean line with markers
-    ax1.plot(df_plot['time'], df_plot['mean'], 'o-', color='#00ff88', 
-             linewidth=3, markersize=8, label='Mean', zorder=10,
-             markeredgecolor='white', markeredgewidth=1)
-    
-    # Add threshold lines
-    ax1.axhline(y=thresholds['min_120s'], color='#ff4444', linestyle='--', 
-                alpha=0.7, linewidth=2, label=f'Min Threshold ({thresholds["min_120s"]}V)')
-    ax1.axhline(y=thresholds['max_120s'], color='#ff4444', linestyle='--', 
-                alpha=0.7, linewidth=2, label=f'Max Threshold ({thresholds["max_120s"]}V)')
-    
-    # Formatting
-    ax1.set_title('Sensor Readings Over Time', fontsize=14, fontweight='bold', pad=20, 
-                  color='white' if st.get_option('theme.base') == 'dark' else 'black')
-    ax1.set_xlabel('Time (seconds)', fontsize=12)
-    ax1.set_ylabel('Voltage (V)', fontsize=12)
-    ax1.set_ylim(PLOT_VOLTAGE_LIMITS)
-    ax1.set_xlim(-5, 125)
-    ax1.grid(True, alpha=0.3, linestyle='--', color='#4a4a4a' if st.get_option('theme.base') == 'dark' else '#cccccc')
-    ax1.legend(loc='best', framealpha=0.9, facecolor='#2d2d2d' if st.get_option('theme.base') == 'dark' else 'white')
-    
-    # Box plot for 120s readings (right)
-    if '120' in job_data.columns:
-        readings_120 = job_data['120'].dropna()
-        bp = ax2.boxplot([readings_120], vert=True, patch_artist=True,
-                         widths=0.6, showmeans=True, meanline=True)
-        
-        # Style the boxplot with vibrant colors
-        for patch in bp['boxes']:
-            patch.set_facecolor('#7c8bff')
-            patch.set_alpha(0.8)
-            patch.set_edgecolor('white')
-            patch.set_linewidth(1.5)
-        
-        # Style whiskers and caps
-        for item in ['whiskers', 'caps']:
-            plt.setp(bp[item], color='white', linewidth=1.5)
-        
-        # Style medians
-        plt.setp(bp['medians'], color='#00ff88', linewidth=2)
-        
-        # Add threshold regions
-        ax2.axhspan(0, thresholds['min_120s'], alpha=0.2, color='#ff4444', label='Fail Low')
-        ax2.axhspan(thresholds['max_120s'], 5, alpha=0.2, color='#ff4444', label='Fail High')
-        ax2.axhspan(thresholds['min_120s'], thresholds['max_120s'], alpha=0.2, 
-                   color='#00ff88', label='Pass Range')
-        
-        ax2.set_title('120s Reading Distribution', fontsize=14, fontweight='bold', pad=20,
-                     color='white' if st.get_option('theme.base') == 'dark' else 'black')
-        ax2.set_ylabel('Voltage (V)', fontsize=12)
-        ax2.set_ylim(PLOT_VOLTAGE_LIMITS)
-        ax2.set_xticklabels(['120s'])
-        ax2.grid(True, alpha=0.3, axis='y', linestyle='--', 
-                color='#4a4a4a' if st.get_option('theme.base') == 'dark' else '#cccccc')
-        ax2.legend(loc='upper right', framealpha=0.9, 
-                  facecolor='#2d2d2d' if st.get_option('theme.base') == 'dark' else 'white')
-    
-    plt.suptitle(f'Job {matched_jobs[0].split(".")[0]} Analysis', 
-                fontsize=16, fontweight='bold', y=1.02,
-                color='white' if st.get_option('theme.base') == 'dark' else 'black')
-    plt.tight_layout()
-    
-    return fig
-
-def create_status_flowchart():
-    """Generate the status determination logic flowchart."""
-    # Color scheme
-    color_start = '#667eea'
-    color_process = '#4ECDC4'
-    color_decision = '#FFD93D'
-    color_result = '#FF6B6B'
-    color_final = '#95E1D3'
-    
-    def draw_box(ax, x, y, width, height, text, color, fontsize=10, bold=False):
-        """Draw a rounded rectangle with text"""
-        from matplotlib.patches import FancyBboxPatch
-        box = FancyBboxPatch((x, y), width, height, 
-                              boxstyle="round,pad=0.1", 
-                              edgecolor='black', 
-                              facecolor=color, 
-                              linewidth=2)
-        ax.add_patch(box)
-        weight = 'bold' if bold else 'normal'
-        ax.text(x + width/2, y + height/2, text, 
-                ha='center', va='center', 
-                fontsize=fontsize, weight=weight,
-                wrap=True)
-    
-    def draw_arrow(ax, x1, y1, x2, y2):
-        """Draw an arrow between two points"""
-        from matplotlib.patches import FancyArrowPatch
-        arrow = FancyArrowPatch((x1, y1), (x2, y2),
-                               arrowstyle='->', 
-                               mutation_scale=20, 
-                               linewidth=2,
-                               color='black')
-        ax.add_patch(arrow)
-    
-    def draw_label(ax, x, y, text, fontsize=9):
-        """Draw a label at a specific position"""
-        ax.text(x, y, text, fontsize=fontsize, style='italic', 
-                ha='center', va='center',
-                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='none', alpha=0.8))
-    
-    # Create figure
-    fig, ax = plt.subplots(1, 1, figsize=(14, 20))
-    ax.set_xlim(0, 10)
-    ax.set_ylim(-2, 21)
-    ax.axis('off')
-    
-    # Title
-    ax.text(5, 20, 'Sensor Status Determination Logic', 
-            ha='center', fontsize=16, weight='bold')
-    
-    # Start
-    draw_box(ax, 3.5, 18.5, 3, 0.8, 'START\n(Per Serial Number)', color_start, fontsize=11, bold=True)
-    draw_arrow(ax, 5, 18.5, 5, 17.8)
-    
-    # Step 1
-    draw_box(ax, 2.5, 17, 5, 0.7, 'Collect all 120s readings\nfrom all tests', color_process, fontsize=9)
-    draw_arrow(ax, 5, 17, 5, 16.3)
-    
-    # Step 2
-    draw_box(ax, 2.5, 15.5, 5, 0.7, 'Calculate std_dev_120\nacross all tests', color_process, fontsize=9)
-    draw_arrow(ax, 5, 15.5, 5, 14.8)
-    
-    # Step 3
-    draw_box(ax, 2, 14, 6, 0.7, 'FOR EACH TEST (T1, T2, T3...)', color_start, fontsize=10, bold=True)
-    draw_arrow(ax, 5, 14, 5, 13.3)
-    
-    # Check 1
-    draw_box(ax, 2.5, 12.5, 5, 0.7, '120s reading < 1.5V?', color_decision, fontsize=9)
-    draw_arrow(ax, 2.5, 12.85, 1.5, 12.85)
-    draw_label(ax, 2.0, 13.05, 'YES', fontsize=8)
-    draw_box(ax, 0.3, 12.5, 1.1, 0.4, 'Add FL', color_result, fontsize=8)
-    draw_arrow(ax, 5, 12.5, 5, 11.8)
-    draw_label(ax, 5.3, 12.15, 'NO', fontsize=8)
-    
-    # Check 2
-    draw_box(ax, 2.5, 11.0, 5, 0.7, '120s reading > 4.9V?', color_decision, fontsize=9)
-    draw_arrow(ax, 2.5, 11.35, 1.5, 11.35)
-    draw_label(ax, 2.0, 11.55, 'YES', fontsize=8)
-    draw_box(ax, 0.3, 11.0, 1.1, 0.4, 'Add FH', color_result, fontsize=8)
-    draw_arrow(ax, 5, 11.0, 5, 10.3)
-    draw_label(ax, 5.3, 10.65, 'NO', fontsize=8)
-    
-    # Check 3
-    draw_box(ax, 2.5, 9.5, 5, 0.7, '120s reading missing?', color_decision, fontsize=9)
-    draw_arrow(ax, 2.5, 9.85, 1.5, 9.85)
-    draw_label(ax, 2.0, 10.05, 'YES', fontsize=8)
-    draw_box(ax, 0.3, 9.5, 1.1, 0.4, 'Add DM', color_result, fontsize=8)
-    draw_arrow(ax, 5, 9.5, 5, 8.8)
-    
-    # Step 4
-    draw_box(ax, 2.5, 8, 5, 0.7, 'Calculate % Change:\n(120s - 90s) / (90s - 0s) × 100', color_process, fontsize=8)
-    draw_arrow(ax, 5, 8, 5, 7.3)
-    
-    # Check 4
-    draw_box(ax, 2.5, 6.5, 5, 0.7, '% Change < -6%?', color_decision, fontsize=9)
-    draw_arrow(ax, 2.5, 6.85, 1.5, 6.85)
-    draw_label(ax, 2.0, 7.05, 'YES', fontsize=8)
-    draw_box(ax, 0.3, 6.5, 1.1, 0.4, 'Add OT-', color_result, fontsize=8)
-    draw_arrow(ax, 5, 6.5, 5, 5.8)
-    draw_label(ax, 5.3, 6.15, 'NO', fontsize=8)
-    
-    # Check 5
-    draw_box(ax, 2.5, 5.0, 5, 0.7, '% Change > 30%?', color_decision, fontsize=9)
-    draw_arrow(ax, 2.5, 5.35, 1.5, 5.35)
-    draw_label(ax, 2.0, 5.55, 'YES', fontsize=8)
-    draw_box(ax, 0.3, 5.0, 1.1, 0.4, 'Add OT+', color_result, fontsize=8)
-    draw_arrow(ax, 5, 5.0, 5, 4.3)
-    
-    # End of test loop
-    draw_box(ax, 2.5, 3.5, 5, 0.7, 'Collect all failure codes\nfrom this test', color_process, fontsize=9)
-    draw_arrow(ax, 5, 3.5, 5, 2.8)
-    
-    # Loop back arrow
-    loop_x = 8.2
-    ax.plot([loop_x, loop_x], [3.85, 13.35], 'k-', linewidth=2)
-    ax.plot([loop_x, 7.9], [13.35, 13.35], 'k-', linewidth=2)
-    ax.plot([loop_x, 7.9], [3.85, 3.85], 'k-', linewidth=2)
-    ax.annotate('', xy=(7.9, 13.35), xytext=(loop_x, 13.35),
-                arrowprops=dict(arrowstyle='->', lw=2, color='black'))
-    ax.text(8.7, 8.6, 'LOOP\nBACK', ha='center', fontsize=8, style='italic')
-    
-    # Step 5
-    draw_box(ax, 2.5, 2.0, 5, 0.7, 'std_dev_120 > 0.3V?', color_decision, fontsize=9)
-    draw_arrow(ax, 2.5, 2.35, 1.5, 2.35)
-    draw_label(ax, 2.0, 2.55, 'YES', fontsize=8)
-    draw_box(ax, 0.3, 2.0, 1.1, 0.4, 'Add TT', color_result, fontsize=8)
-    draw_arrow(ax, 5, 2.0, 5, 1.3)
-    
-    # Step 6
-    draw_box(ax, 2, 0.5, 6, 0.7, 'Sort all failure codes by priority:\nFL > FH > OT- > TT > OT+ > DM > PASS', color_process, fontsize=8)
-    draw_arrow(ax, 5, 0.5, 5, -0.2)
-    
-    # Final result
-    draw_box(ax, 3, -1.0, 4, 0.7, 'Pass/Fail = Highest Priority Code', color_final, fontsize=10, bold=True)
-    
-    # Legend
-    legend_elements = [
-        mpatches.Patch(color=color_start, label='Start/Loop'),
-        mpatches.Patch(color=color_process, label='Process'),
-        mpatches.Patch(color=color_decision, label='Decision'),
-        mpatches.Patch(color=color_result, label='Status Code'),
-        mpatches.Patch(color=color_final, label='Final Result')
-    ]
-    ax.legend(handles=legend_elements, loc='upper right', fontsize=9)
-    
-    # Example box
-    example_text = """Example (Standard Thresholds):
-Test 1: 120s=1.2V (FL), %Chg=5%
-Test 2: 120s=1.8V, %Chg=35% (OT+)
-Test 3: 120s=1.5V, %Chg=8%
-std_dev=0.35V (TT triggered)
-
-Codes: FL, OT+, TT
-Result: FL (highest priority)"""
-    
-    draw_box(ax, 0.2, -1.8, 2.5, 2.5, example_text, '#E8F5E9', fontsize=12)
-    
-    plt.tight_layout()
-    
-    return fig
-
-def color_rows(row):
-    """Apply background color to table rows based on Pass/Fail status."""
-    if row['Pass/Fail'] in ['FL', 'FH']:
-        return ['background-color: #fee2e2; color: #991b1b; font-weight: 600'] * len(row)
-    elif row['Pass/Fail'] == 'PASS':
-        return ['background-color: #d1fae5; color: #065f46; font-weight: 600'] * len(row)
-    elif row['Pass/Fail'] in ['OT-', 'TT', 'OT+']:
-        return ['background-color: #fed7aa; color: #92400e; font-weight: 600'] * len(row)
-    elif row['Pass/Fail'] == 'DM':
-        return ['background-color: #e5e7eb; color: #1f2937; font-weight: 600'] * len(row)
-    return [''] * len(row)
-
-def analyze_job(df, job_number, threshold_set='Standard'):
-    """Analyze data for a specific job number with progress tracking."""
-    if len(df) == 0:
-        st.error("No data loaded. Please load data first.")
-        return None
+    # Determine Pass/Fail
+    def pass_fail_progress(done, total):
+        task.report(0.15 + 0.6 * done / total, f"Determining pass/fail status ({done:,} of {total:,} sensors)...")
+    
+    with timed_span('analyze.pass_fail', rows=len(job_data), progressive=progressive):
+        if progressive and sample_size is None and job_data['Serial Number'].nunique() > PROGRESSIVE_MIN_SENSORS:
+            results = progressive_pass_fail(task, job_data, threshold_set, pass_fail_progress)
+        else:
+            results = determine_pass_fail(job_data, threshold_set, progress=pass_fail_progress)
 
-    if 'Job #' not in df.columns:
-        st.error("Error: Job # column not found in data")
-        return None
+    task.report(0.75, "Calculating statistics...")
+    
+    # Calculate summary statistics
+    with timed_span('analyze.statistics', sensors=len(results)):
+        summary_stats = summarize_results(results)
+
+    task.report(0.8, "Preparing charts and tables...")
+    
+    # Trend bands, display formatting and the serial search index are built once here and reused by every rerun
+    with timed_span('analyze.band_summary', rows=len(job_data)):
+        band_summary = compute_job_band_summary(job_data)
+    with timed_span('analyze.display_format', sensors=len(results)):
+        display_results = format_results_for_display(results)
+    with timed_span('analyze.serial_index', sensors=len(results)):
+        serial_index = analysis.SerialSearchIndex(results['Serial Number'])
+        sorted_job_data, serial_rows = analysis.build_serial_row_ranges(job_data)
+    
+    # Store analysis info
+    return {
+        'matched_jobs': matched_jobs,
+        'thresholds': thresholds,
+        'threshold_set': threshold_set,
+        **summary_stats,
+        'results': results,
+        'band_summary': band_summary,
+        'display_results': display_results,
+        'serial_index': serial_index,
+        'sorted_job_data': sorted_job_data,
+        'serial_rows': serial_rows,
+        'sample': sample
+    }
+
+def analysis_task(df, job_number, threshold_set, sample_size=None):
+    """(key, analyze_job() arguments) of a background analysis; equal keys share one run, prefetched or not."""
+    progressive = st.session_state.get('progressive_results', True)
+    key = ('analysis', get_dataset_fingerprint(df), job_number, threshold_set, sample_size, progressive)
+    return key, (df, job_number, threshold_set, sample_size, progressive)
+
+def start_job_analysis(df, job_number, threshold_set, remember=False, sample_size=None):
+    """Analyze a job in the background; identical requests from any session share one run.
+    
+    remember adds the job to Recent Jobs once the analysis succeeds. The analysis is
+    stopped if it runs over this session's time budget.
+    """
+    key, args = analysis_task(df, job_number, threshold_set, sample_size)
+    label = f"Analyzing job {job_number}" + (" (sample)" if sample_size else "")
+    task = start_background_task('analysis', key, label, analyze_job, *args,
+                                 time_budget_s=query_limits()['time_budget_s'])
+    st.session_state.pending_analysis = {'job': job_number, 'threshold_set': threshold_set, 'remember': remember}
+    return task
 
-    # Progress indicator
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+def prefetch_job_analyses(df, job_numbers, threshold_set):
+    """Analyze jobs on the prefetch threads, so opening them later is instant.
     
-    try:
-        status_text.text("Loading job data...")
-        progress_bar.progress(10)
-        
-        job_data = get_job_data(df, job_number)
+    Jobs this session would have to confirm or refuse under its query limits are skipped.
+    """
+    background.prefetch_jobs(get_background_worker(), job_numbers, lambda job_number: check_query(df, job_number)[1],
+                             lambda job_number: analysis_task(df, job_number, threshold_set), analyze_job)
 
-        if len(job_data) == 0:
-            st.error(f"No data found for Job # {job_number}")
-            unique_jobs = df['Job #'].unique()
-            st.write("Available Job Numbers in database:")
-            st.write(sorted(unique_jobs)[:20])
-            return None
+def prefetch_recent_jobs(df, threshold_set):
+    """Prefetch the saved Recent Jobs, once per dataset and threshold set in this session."""
+    if background.first_time(st.session_state, 'prefetched_recent', (get_dataset_fingerprint(df), threshold_set)):
+        prefetch_job_analyses(df, st.session_state.job_history, threshold_set)
 
-        matched_jobs = sorted(job_data['Job #'].unique())
-        thresholds = THRESHOLDS[threshold_set]
+def collect_job_analysis(df):
+    """Apply this session's background analysis once it has finished."""
+    task = finish_background_task('analysis')
+    if task is None:
+        return
+    pending = st.session_state.pop('pending_analysis', None) or {}
+    job_number = pending.get('job')
+    
+    if task.state == 'done':
+        analysis_info = task.result
+        write_back_analysis(df, analysis_info)
+        st.session_state.analysis_results = analysis_info
+        st.session_state.current_job = job_number
+        st.session_state.current_threshold = pending.get('threshold_set', analysis_info['threshold_set'])
+        
+        # Update job history with persistence
+        if pending.get('remember') and job_number not in st.session_state.job_history:
+            st.session_state.job_history.insert(0, job_number)
+            st.session_state.job_history = st.session_state.job_history[:5]
+            save_job_history(st.session_state.job_history)
+        
+        # Users often step to the neighboring job numbers next
+        prefetch_job_analyses(df, get_job_index(df).neighbors(job_number), st.session_state.current_threshold)
+    elif task.state == 'failed' and isinstance(task.error, TimeoutError):
+        # Keep the previous results; offer a sampled preview instead
+        st.session_state.held_query = {'job': job_number, 'threshold_set': pending.get('threshold_set'),
+                                       'remember': pending.get('remember', False),
+                                       'estimate': check_query(df, job_number)[0], 'verdict': 'refuse'}
+        st.warning(f"⏱️ Analysis of job {job_number}: {str(task.error)}")
+    elif task.state == 'failed':
+        if isinstance(task.error, JobNotFoundError):
+            st.error(str(task.error))
+            suggestions = get_job_index(df).suggest(job_number, JOB_SUGGESTIONS)
+            if suggestions:
+                st.write(f"Closest job numbers: {', '.join(suggestions)}")
+        else:
+            st.error(f"❌ Error during analysis: {str(task.error)}")
+        # Clear previous results if the job could not be analyzed
+        st.session_state.analysis_results = None
+        st.session_state.current_job = None
+    elif task.state == 'cancelled':
+        st.info(f"Analysis of job {job_number} cancelled")
 
-        status_text.text("Calculating metrics...")
-        progress_bar.progress(30)
-        
-        # Calculate metrics
-        job_data = calculate_metrics(job_data)
+# ==================== SENSOR HISTORY ====================
+@count_cache_hits
+@st.cache_resource(max_entries=4)
+def build_global_serial_index(fingerprint, _df):
+    """Global serial index, shared by every session working on the same dataset."""
+    note_cache_miss()
+    return analysis.GlobalSerialIndex(_df)
 
-        status_text.text("Determining pass/fail status...")
-        progress_bar.progress(60)
-        
-        # Determine Pass/Fail
-        results = determine_pass_fail(job_data, threshold_set)
-
-        status_text.text("Calculating statistics...")
-        progress_bar.progress(80)
-        
-        # Calculate summary statistics
-        total_sensors = len(results)
-        passed_sensors = len(results[results['Pass/Fail'].isin(['PASS', 'OT-', 'TT', 'OT+'])])
-        failed_sensors = len(results[results['Pass/Fail'].isin(['FL', 'FH'])])
-        dm_sensors = len(results[results['Pass/Fail'] == 'DM'])
-        counted_sensors = passed_sensors + failed_sensors
-
-        pass_rate = (passed_sensors / counted_sensors * 100) if counted_sensors > 0 else 0
-        fail_rate = (failed_sensors / counted_sensors * 100) if counted_sensors > 0 else 0
-
-        # Count each status code
-        status_counts = {'FL': 0, 'FH': 0, 'OT-': 0, 'TT': 0, 'OT+': 0, 'DM': 0, 'PASS': 0}
-        for idx, row in results.iterrows():
-            status = row['Pass/Fail']
-            if status in status_counts:
-                status_counts[status] += 1
-
-        progress_bar.progress(100)
-        status_text.text("Analysis complete!")
-        time.sleep(0.3)
-        
-        # Clear progress indicators
-        status_text.empty()
-        progress_bar.empty()
-        
-        # Store analysis info
-        analysis_info = {
-            'matched_jobs': matched_jobs,
-            'thresholds': thresholds,
-            'threshold_set': threshold_set,
-            'total_sensors': total_sensors,
-            'passed_sensors': passed_sensors,
-            'failed_sensors': failed_sensors,
-            'dm_sensors': dm_sensors,
-            'pass_rate': pass_rate,
-            'fail_rate': fail_rate,
-            'status_counts': status_counts,
-            'results': results
-        }
+def get_global_serial_index(df):
+    """Global serial index for the loaded dataset."""
+    return build_global_serial_index(get_dataset_fingerprint(df), df)
 
-        return analysis_info
+def render_sensor_history(df):
+    """Cross-job lookup of every test recorded for a serial number or serial prefix."""
+    with st.expander("🔎 Sensor History (all jobs)", expanded=bool(st.session_state.get('sensor_history_query'))):
+        query = st.text_input(
+            "Serial number or prefix:",
+            key="sensor_history_query",
+            placeholder="e.g. SN000123",
+            help="Finds every test of a sensor across all jobs in the loaded data, including retests"
+        )
+        if not query.strip():
+            st.caption("Enter a serial number to see all of its tests across jobs.")
+            return
         
-    except Exception as e:
-        st.error(f"❌ Error during analysis: {str(e)}")
-        progress_bar.empty()
-        status_text.empty()
+        with timed_span('history.lookup'):
+            index = get_global_serial_index(df)
+            history = index.lookup(query, exact=True)
+            if len(history) == 0:
+                history = index.lookup(query)
+        
+        if len(history) == 0:
+            st.warning(f"No sensors found matching '{query.strip()}'")
+            return
+        
+        num_serials = history['Serial Number'].nunique()
+        num_jobs = history['Job #'].nunique()
+        st.info(f"Found {len(history):,} tests of {num_serials:,} sensor{'s' if num_serials != 1 else ''} "
+                f"across {num_jobs:,} job{'s' if num_jobs != 1 else ''}")
+        if len(history) > SENSOR_HISTORY_MAX_ROWS:
+            st.caption(f"Showing the first {SENSOR_HISTORY_MAX_ROWS:,} rows. Type more of the serial to narrow the search.")
+        
+        st.dataframe(
+            history.head(SENSOR_HISTORY_MAX_ROWS),
+            column_config={tp: st.column_config.NumberColumn(f"{tp}s", format="%.2f") for tp in TIME_POINTS},
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        if num_serials == 1:
+            threshold_set = st.session_state.get('current_threshold') or 'Standard'
+            with timed_span('plot.sensor_history', tests=len(history)):
+                render_cached_figure(
+                    'sensor_history',
+                    (get_dataset_fingerprint(df), history['Serial Number'].iloc[0], threshold_set),
+                    figures.create_sensor_history_plot,
+                    history=history.head(SENSOR_HISTORY_PLOT_MAX_TESTS),
+                    thresholds=THRESHOLDS[threshold_set],
+                    dark=st.get_option('theme.base') == 'dark'
+                )
+
+# ==================== EXPORTS ====================
+EXPORT_SCOPES = ['Current job results', 'Results for jobs', 'Raw readings for jobs']
+
+def build_export(df, results, scope, jobs, threshold_set, export_format):
+    """Write an export in chunks to a temporary file and return the file, open for reading.
+    
+    Passed to st.download_button as a deferred callable, so it only runs when the
+    download is requested, off the script thread. Writing is bounded by the chunk
+    size; Streamlit reads the finished file when it serves the download, and the
+    file is removed once Streamlit lets go of it.
+    """
+    if scope == 'Current job results':
+        chunks, rows = exports.frame_chunks(results), len(results)
+    elif scope == 'Results for jobs':
+        chunks, rows = exports.job_result_chunks(df, jobs, threshold_set), exports.job_result_count(df, jobs)
+    else:
+        chunks, rows = exports.raw_reading_chunks(df, jobs), exports.raw_reading_count(df, jobs)
+    return exports.write_export(chunks, export_format, rows)
+
+def render_export_panel(df, info):
+    """Export options and download button for results or raw readings."""
+    with st.container(border=True):
+        st.markdown("#### 📥 Export")
+        scope = st.radio("Data:", EXPORT_SCOPES, key="export_scope")
+        
+        jobs = []
+        if scope != 'Current job results':
+            selection = st.text_input(
+                "Jobs:",
+                value=str(st.session_state.current_job),
+                key="export_jobs",
+                help="Comma-separated job numbers, whole-number prefixes (250 = all 250.x), "
+                     "wildcard prefixes (26*) and ranges (252-255)"
+            )
+            jobs, unmatched = reports.resolve_job_selection(selection, df['Job #'].dropna().unique())
+            if unmatched:
+                st.warning(f"No jobs match: {', '.join(unmatched)}")
+            st.caption(f"{len(jobs):,} job{'s' if len(jobs) != 1 else ''} selected")
+        
+        export_format = st.selectbox("Format:", exports.available_formats(), key="export_format")
+        missing = exports.missing_formats()
+        if missing:
+            st.caption(f"{', '.join(missing)} export needs {', '.join(sorted(set(missing.values())))} installed")
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        file_stem = {
+            'Current job results': f"job_{st.session_state.current_job}_analysis",
+            'Results for jobs': f"jobs_{len(jobs)}_analysis",
+            'Raw readings for jobs': f"jobs_{len(jobs)}_readings",
+        }[scope]
+        spec = exports.EXPORT_FORMATS[export_format]
+        st.download_button(
+            label=f"📥 Download {export_format}",
+            data=functools.partial(build_export, df, info['results'], scope, jobs,
+                                   info['threshold_set'], export_format),
+            file_name=f"{file_stem}_{timestamp}.{spec['extension']}",
+            mime=spec['mime'],
+            key="download_export",
+            disabled=scope != 'Current job results' and not jobs,
+            use_container_width=True
+        )
+        st.caption("Written to a temporary file in chunks, which Streamlit reads once the download starts.")
+        if st.button("Close", key="export_close", use_container_width=True):
+            st.session_state.export_open = False
+            st.rerun()
+
+# ==================== RESULT WRITE-BACK ====================
+def writeback_db_path():
+    """Database that results are written back to, or None if the data did not come from a database."""
+    if st.session_state.data_source != 'database':
         return None
+    return resolve_db_path(st.session_state.db_path)
+
+def save_results(db_path, df, jobs, threshold_set, watermark, analyzed=None):
+    """Store the jobs' results in db_path, skipping jobs already stored from the same watermark.
+    
+    analyzed maps jobs that were just analyzed to their results, so they are not analyzed again.
+    Returns writeback.write_results() counts plus 'skipped'. Safe to call off the script thread.
+    """
+    analyzed = analyzed or {}
+    unchanged = writeback.unchanged_jobs(db_path, jobs, threshold_set, watermark)
+    pending = [job for job in jobs if job not in unchanged]
+    reused = [(job, analyzed[job]) for job in pending if job in analyzed]
+    results_by_job = itertools.chain(
+        reused, writeback.job_results(df, [job for job in pending if job not in analyzed], threshold_set))
+    
+    with timed_span('writeback', jobs=len(pending), reused=len(reused), threshold_set=threshold_set):
+        counts = writeback.write_results(db_path, results_by_job, threshold_set, watermark)
+    return {**counts, 'skipped': len(unchanged)}
+
+def save_analysis(task, db_path, df, info, watermark):
+    """Store a finished analysis, reusing its results for every job whose sensors it analyzed alone."""
+    task.report(0.0, "Splitting results by job...")
+    analyzed, left_over = writeback.split_results(info['results'], info['sorted_job_data'])
+    task.report(0.2, f"Writing {len(info['matched_jobs']):,} jobs"
+                     f"{f' ({len(left_over):,} analyzed again)' if left_over else ''}...")
+    return save_results(db_path, df, info['matched_jobs'], info['threshold_set'], watermark, analyzed)
+
+def write_back_analysis(df, info):
+    """Save a finished analysis to the database in the background, when write-back is enabled in Settings."""
+    db_path = writeback_db_path()
+    if not st.session_state.get('writeback_results') or db_path is None or info.get('sample'):
+        return  # Sampled previews are not stored
+    watermark = get_dataset_fingerprint(df)
+    key = ('writeback', db_path, watermark, tuple(info['matched_jobs']), info['threshold_set'])
+    start_background_task('writeback', key, "Saving results to the database", save_analysis,
+                          db_path, df, info, watermark)
+
+def collect_write_back():
+    """Report this session's finished result write-back."""
+    task = finish_background_task('writeback')
+    if task is None:
+        return
+    if task.state == 'failed':
+        st.toast(f"⚠️ Results not saved to the database: {task.error}")
+    elif task.state == 'done' and task.result['jobs']:
+        st.toast(f"💾 Saved {task.result['sensors']:,} sensor results to the database")
+
+# ==================== DASHBOARD SUMMARY ====================
+def summary_artifact_path():
+    """sensor_summary.db next to the loaded database, or in the working directory for CSV data."""
+    db_path = resolve_db_path(st.session_state.db_path) if st.session_state.data_source == 'database' else None
+    folder = os.path.dirname(os.path.abspath(db_path)) if db_path else os.getcwd()
+    return os.path.join(folder, dashboard_summary.SUMMARY_FILE_NAME)
+
+def publish_dashboard_summary(df):
+    """Bring the summary artifact up to date, re-analyzing only jobs whose readings changed."""
+    path = summary_artifact_path()
+    signatures = dashboard_summary.job_signatures(df)
+    changed, removed = dashboard_summary.plan_update(path, signatures)
+    tasks = {job: (rows, job, signatures[job])
+             for job, rows in df[df['Job #'].isin(changed)].groupby('Job #', sort=False)}
+    progress = st.progress(0.0, text=f"Summarizing {len(tasks)} changed jobs...")
+    summaries, errors = map_in_render_pool(
+        dashboard_summary.summarize_job, tasks,
+        lambda done, total: progress.progress(done / total, text=f"Summarized {done} of {total} changed jobs"))
+    progress.empty()
+    job_rows = [row for rows in summaries.values() for row in rows]
+    source = 'database' if st.session_state.data_source == 'database' else 'csv'
+    counts = dashboard_summary.write_update(path, job_rows, removed, get_dataset_fingerprint(df), source)
+    return {**counts, 'path': path, 'unchanged': len(signatures) - len(changed), 'errors': errors}
+
+def render_dashboard_summary(df):
+    """Settings controls to publish the summary artifact and download it."""
+    st.markdown("### 📊 Dashboard Summary")
+    if st.button("📊 Publish Summary", use_container_width=True, key="publish_summary", disabled=len(df) == 0,
+                 help="Writes per-job and per-prefix status counts, rates and 120s histograms to "
+                      f"{dashboard_summary.SUMMARY_FILE_NAME} for the browser dashboards. "
+                      "Only jobs whose readings changed since the last publish are re-analyzed."):
+        try:
+            with timed_span('summary.publish', jobs=df['Job #'].nunique()):
+                st.session_state.dashboard_summary = publish_dashboard_summary(df)
+        except sqlite3.Error as e:
+            st.error(f"❌ Could not write the summary: {str(e)}")
+    
+    published = st.session_state.get('dashboard_summary')
+    if published:
+        st.caption(f"{published['updated']} jobs updated, {published['unchanged']} unchanged, "
+                   f"{published['removed']} removed ({published['jobs']} in total): `{published['path']}`")
+        for job, message in published['errors'].items():
+            st.warning(f"Job {job}: {message}")
+        if os.path.exists(published['path']):
+            st.download_button(
+                "⬇️ Download Summary",
+                data=functools.partial(Path(published['path']).read_bytes),
+                file_name=dashboard_summary.SUMMARY_FILE_NAME,
+                mime="application/vnd.sqlite3",
+                use_container_width=True,
+                key="download_summary"
+            )
+
+# ==================== BULK REPORTS ====================
+def generate_bulk_reports(df, jobs, threshold_set, comparison, progress=None):
+    """Analyze each job and render both of its reports in the render pool.
+    
+    Returns ({file name: html}, {job: error message}).
+    """
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    tasks = {job: (rows, job, threshold_set, comparison, generated)
+             for job, rows in df[df['Job #'].isin(jobs)].groupby('Job #', sort=False)}
+    rendered, errors = map_in_render_pool(reports.render_job_reports, tasks, progress)
+    files = {name: html for job_files in rendered.values() for name, html in job_files.items()}
+    return files, errors
+
+def build_bulk_reports(task, df, jobs, threshold_set, fingerprint, writeback_path):
+    """Background body of the Bulk Reports form: render and zip every job, then optionally save results."""
+    task.report(0.0, "Comparing jobs...")
+    comparison = build_job_comparison(fingerprint, df)
+    
+    def progress(done, total):
+        task.report(0.9 * done / total, f"Rendered {done} of {total} jobs")
+    
+    with timed_span('report.bulk', jobs=len(jobs)):
+        files, errors = generate_bulk_reports(df, jobs, threshold_set, comparison, progress)
+        archive = {
+            'data': reports.build_report_archive(files),
+            'file_name': f"sensor_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            'jobs': len(jobs) - len(errors),
+            'errors': errors,
+            'writeback': None,
+            'writeback_error': None
+        }
+    
+    if writeback_path is not None:
+        task.report(0.9, f"Saving results for {len(jobs)} jobs to the database...")
+        try:
+            archive['writeback'] = save_results(writeback_path, df, jobs, threshold_set, fingerprint)
+        except sqlite3.Error as e:
+            archive['writeback_error'] = str(e)
+    return archive
+
+def render_bulk_reports(df):
+    """Summary and Failed Sensors reports for many jobs at once, zipped for download."""
+    task = finish_background_task('bulk_reports')
+    if task is not None and task.state == 'done':
+        st.session_state.bulk_report_archive = task.result
+    
+    expanded = st.session_state.get('bulk_report_archive') is not None or background_task('bulk_reports') is not None
+    with st.expander("📦 Bulk Reports", expanded=expanded or task is not None):
+        with st.form(key="bulk_report_form"):
+            selection = st.text_input(
+                "Jobs:",
+                placeholder="e.g. 250, 251.2, 252-255, 26*",
+                help="Comma-separated job numbers, whole-number prefixes (250 = all 250.x), "
+                     "wildcard prefixes (26*) and ranges (252-255)"
+            )
+            bulk_threshold = st.radio("Threshold Set:", list(THRESHOLDS), horizontal=True)
+            bulk_writeback = st.checkbox(
+                "Also save results to the database",
+                disabled=st.session_state.data_source != 'database',
+                help="Write each job's results to the analysis_results tables of sensor_data.db"
+            )
+            submitted = st.form_submit_button("📦 Generate Reports", use_container_width=True)
+        
+        if task is not None and task.state == 'failed':
+            st.error(f"❌ Bulk reports failed: {str(task.error)}")
+        
+        if submitted:
+            jobs, unmatched = reports.resolve_job_selection(selection, df['Job #'].dropna().unique())
+            if unmatched:
+                st.warning(f"No jobs match: {', '.join(unmatched)}")
+            if len(jobs) > BULK_REPORT_MAX_JOBS:
+                st.error(f"{len(jobs):,} jobs selected; narrow the selection to {BULK_REPORT_MAX_JOBS:,} or fewer.")
+            elif jobs:
+                writeback_path = writeback_db_path() if bulk_writeback else None
+                if bulk_writeback and writeback_path is None:
+                    st.warning("⚠️ Results can only be saved when data is loaded from a database")
+                fingerprint = get_dataset_fingerprint(df)
+                key = ('bulk_reports', fingerprint, tuple(jobs), bulk_threshold, writeback_path)
+                start_background_task('bulk_reports', key, f"Reports for {len(jobs)} jobs", build_bulk_reports,
+                                      df, jobs, bulk_threshold, fingerprint, writeback_path)
+        
+        if background_task('bulk_reports') is not None:
+            render_task_progress('bulk_reports')
+        
+        archive = st.session_state.get('bulk_report_archive')
+        if archive is not None:
+            for job, message in archive['errors'].items():
+                st.warning(f"Job {job}: {message}")
+            if archive['writeback'] is not None:
+                counts = archive['writeback']
+                st.success(f"💾 Saved {counts['jobs']} jobs ({counts['sensors']:,} sensors) to the "
+                           f"database; {counts['skipped']} already up to date")
+            if archive['writeback_error'] is not None:
+                st.error(f"❌ Could not save results to the database: {archive['writeback_error']}")
+            st.download_button(
+                f"⬇️ Download {archive['jobs']} job report{'s' if archive['jobs'] != 1 else ''} (.zip)",
+                data=archive['data'],
+                file_name=archive['file_name'],
+                mime="application/zip",
+                use_container_width=True
+            )
 
 # ==================== MAIN APP ====================
 
@@ -1927,13 +2540,19 @@ if 'db_path' not in st.session_state:
 if 'show_tutorial' not in st.session_state:
     # Tutorial defaults to OFF - users can start it manually from Help section
     st.session_state.show_tutorial = False
+if 'show_diagnostics' not in st.session_state:
+    st.session_state.show_diagnostics = False
+
+# Per-rerun stage timing (shown in the diagnostics panel and appended to the JSONL log)
+begin_rerun_timing()
 
 # Auto-load data on startup if previously loaded
 if st.session_state.data_source == 'database' and not st.session_state.data_loaded:
     with st.spinner("Auto-loading database..."):
         # Pass db_path explicitly (cached functions can't access session_state)
         db_path = st.session_state.db_path if st.session_state.db_path else None
-        df = load_data_from_db(db_path)
+        with timed_span('load.database', auto=True):
+            df = load_data_from_db(db_path)
         if len(df) > 0:
             st.session_state.df = df
             st.session_state.data_loaded = True
@@ -1959,7 +2578,7 @@ with st.sidebar:
             help="Upload your sensor data CSV file"
         )
         if uploaded_file is not None:
-            with st.spinner("Loading data..."):
+            with st.spinner("Loading data..."), timed_span('load.csv'):
                 df = load_data_from_csv(uploaded_file)
                 if len(df) > 0:
                     st.session_state.df = df
@@ -1974,7 +2593,8 @@ with st.sidebar:
             with st.spinner("Connecting to database..."):
                 # Pass db_path explicitly (cached functions can't access session_state)
                 db_path = st.session_state.db_path if st.session_state.db_path else None
-                df = load_data_from_db(db_path)
+                with timed_span('load.database'):
+                    df = load_data_from_db(db_path)
                 if len(df) > 0:
                     st.session_state.df = df
                     st.session_state.data_loaded = True
@@ -1986,13 +2606,17 @@ with st.sidebar:
         st.markdown("---")
         st.markdown("### ⚙️ Analysis Settings")
         
+        # Outside the form, so each entry (Enter or leaving the field) updates the suggestions below it
+        job_number_raw = st.text_input(
+            "Job Number:",
+            placeholder="Enter job number...",
+            key="job_number_input",
+            help="Enter the job number to analyze. Supports prefix matching (e.g., '258' matches '258.1', '258.2'). "
+                 "Press Enter to see matching job numbers."
+        )
+        render_job_suggestions(df, job_number_raw)
+        
         with st.form(key="analysis_form"):
-            job_number_raw = st.text_input(
-                "Job Number:",
-                placeholder="Enter job number...",
-                help="Enter the job number to analyze. Supports prefix matching (e.g., '258' matches '258.1', '258.2')"
-            )
-            
             threshold_set = st.radio(
                 "Threshold Set:",
                 ["Standard", "High Range"],
@@ -2018,12 +2642,7 @@ with st.sidebar:
             st.caption("💾 Saved across sessions")
             for idx, recent_job in enumerate(st.session_state.job_history):
                 if st.button(f"🔄 Job {recent_job}", key=f"hist_{idx}", use_container_width=True):
-                    analysis_info = analyze_job(df, recent_job, threshold_set)
-                    if analysis_info:
-                        st.session_state.analysis_results = analysis_info
-                        st.session_state.current_job = recent_job
-                        st.session_state.current_threshold = threshold_set
-                        st.rerun()
+                    request_job_analysis(df, recent_job, threshold_set)
     
     # Settings section in sidebar
     st.markdown("---")
@@ -2070,6 +2689,44 @@ with st.sidebar:
             st.caption(f"📌 Using: `{st.session_state.db_path}`")
         else:
             st.caption("🔍 Auto-detecting database location")
+        
+        st.markdown("### 💾 Result Write-Back")
+        st.checkbox(
+            "Save analysis results to the database",
+            key="writeback_results",
+            disabled=st.session_state.data_source != 'database',
+            help="Stores per-sensor results and per-test statuses of each analyzed job in the "
+                 "analysis_jobs, analysis_results and analysis_test_results tables of sensor_data.db, "
+                 "tagged with the threshold set and dataset watermark, for other tools to read"
+        )
+        if st.session_state.data_source != 'database':
+            st.caption("Available when data is loaded from a database")
+        
+        render_dashboard_summary(df)
+        
+        render_query_limit_settings()
+        
+        st.markdown("### ⏳ Progressive Results")
+        st.checkbox(
+            "Show preliminary results while large jobs are analyzed",
+            value=True,
+            key="progressive_results",
+            help=f"Jobs with more than {PROGRESSIVE_MIN_SENSORS:,} sensors show pass/fail rates with confidence "
+                 f"intervals from a random sample within a second, refined as the exact analysis proceeds"
+        )
+        
+        st.markdown("### ⏱️ Diagnostics")
+        st.checkbox(
+            "Show performance diagnostics",
+            key="show_diagnostics",
+            help="Show per-stage timings for each rerun. Timings are always logged to ~/.sensor_analysis_timings.jsonl"
+        )
+        st.checkbox(
+            "Profile each rerun (cProfile + tracemalloc)",
+            key="profile_reruns",
+            help="Saves a .prof file and top allocation sites for every rerun to ~/.sensor_analysis_profiles. "
+                 "Also enabled by adding ?profile=1 to the URL. Slows the app down while on."
+        )
     
     # Tutorial & Help in sidebar
     st.markdown("---")
@@ -2077,55 +2734,57 @@ with st.sidebar:
 
 # Main content area
 if len(df) > 0:
+    # Start the figure workers, and analyze the Recent Jobs, while the user picks a job
+    get_render_pool()
+    prefetch_recent_jobs(df, threshold_set)
+    
     # Process analysis if submitted with validation
     if submit_button and job_number_raw:
         job_number, error = validate_job_number(job_number_raw)
         if error:
             st.error(f"❌ {error}")
         elif job_number:
-            with st.spinner("Analyzing data..."):
-                analysis_info = analyze_job(df, job_number, threshold_set)
-                if analysis_info:
-                    st.session_state.analysis_results = analysis_info
-                    st.session_state.current_job = job_number
-                    st.session_state.current_threshold = threshold_set
-                    
-                    # Update job history with persistence
-                    if job_number not in st.session_state.job_history:
-                        st.session_state.job_history.insert(0, job_number)
-                        st.session_state.job_history = st.session_state.job_history[:5]
-                        save_job_history(st.session_state.job_history)
-                else:
-                    # Clear previous results if job not found
-                    st.session_state.analysis_results = None
-                    st.session_state.current_job = None
+            request_job_analysis(df, job_number, threshold_set, remember=True)
     elif submit_button:
         st.warning("⚠️ Please enter a job number.")
     
-    # Handle export button - provide immediate download
+    # Analyses run in the background; show their progress until the result is in
+    collect_job_analysis(df)
+    if background_task('analysis') is not None:
+        render_task_progress('analysis', render_analysis_preview)
+    collect_write_back()
+    if background_task('writeback') is not None:
+        render_task_progress('writeback')
+    render_held_query(df)
+    
+    # Handle export button - the panel stays open across the reruns its own widgets trigger
     if export_button and st.session_state.analysis_results is not None:
-        info = st.session_state.analysis_results
-        export_df = info['results'].copy()
-        csv = export_df.to_csv(index=False)
-        
-        st.success(f"✅ Ready to download {len(export_df)} sensor records")
-        st.download_button(
-            label="📥 Download Results CSV",
-            data=csv,
-            file_name=f"job_{st.session_state.current_job}_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            key="download_csv_export",
-            use_container_width=True
-        )
+        st.session_state.export_open = True
     elif export_button and st.session_state.analysis_results is None:
         st.warning("⚠️ Please analyze a job first before exporting.")
     
+    if st.session_state.get('export_open') and st.session_state.analysis_results is not None:
+        render_export_panel(df, st.session_state.analysis_results)
+    
     # Display results if available
     if st.session_state.analysis_results:
         info = st.session_state.analysis_results
         
+        # Step to the neighboring job numbers, with the threshold set they were prefetched with
+        previous_job, next_job = get_job_index(df).neighbors(st.session_state.current_job)
+        col_previous, _, col_next = st.columns([1, 3, 1])
+        with col_previous:
+            if previous_job and st.button(f"◀️ Job {previous_job}", key="job_previous", use_container_width=True):
+                request_job_analysis(df, previous_job, st.session_state.current_threshold, remember=True)
+                st.rerun()
+        with col_next:
+            if next_job and st.button(f"Job {next_job} ▶️", key="job_next", use_container_width=True):
+                request_job_analysis(df, next_job, st.session_state.current_threshold, remember=True)
+                st.rerun()
+        
         # Anomaly Detection
-        anomalies = detect_anomalies(info['results'], info['thresholds'])
+        with timed_span('detect_anomalies', sensors=len(info['results'])):
+            anomalies = detect_anomalies(info['results'], info['thresholds'])
         if anomalies:
             with st.expander(f"⚠️ Anomalies Detected ({len(anomalies)})", expanded=False):
                 high_severity = [a for a in anomalies if a['severity'] == 'High']
@@ -2151,6 +2810,10 @@ if len(df) > 0:
         
         # Quick Summary Cards
         st.markdown("### 📊 Quick Summary")
+        sample = info.get('sample')
+        if sample:
+            st.info(f"🎲 Sampled preview: {sample['sensors']:,} of {sample['of']:,} sensors picked at random. "
+                    "Rates are estimates; reports and write-back need the full analysis.")
         
         col1, col2, col3, col4, col5 = st.columns(5)
         
@@ -2201,298 +2864,89 @@ if len(df) > 0:
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("📄 Generate Summary Report", use_container_width=True, key="report_summary"):
+            if st.button("📄 Generate Summary Report", use_container_width=True, key="report_summary",
+                         disabled=bool(sample)):
                 # Display report in expander for printing
-                with st.expander("📄 Report (Use Browser Print)", expanded=True):
+                with st.expander("📄 Report (Use Browser Print)", expanded=True), timed_span('report.summary'):
                     # Display title and date
                     st.markdown(f"## Sensor Analysis Report - Job Summary")
                     st.markdown(f"**Analysis Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                     st.markdown("")
                     
                     # Side-by-side columns
+                    summary = reports.build_summary_model(info, st.session_state.current_job)
                     col_left, col_right = st.columns(2)
                     
                     with col_left:
-                        st.markdown(f"### Job {info['matched_jobs'][0].split('.')[0]} Analysis")
-                        left_data = {
-                            'Metric': ['Job Number', 'Total Sensors', 'Sensors Passed', 'Sensors Failed', 'Data Missing', 'Threshold Set'],
-                            'Value': [
-                                str(st.session_state.current_job),
-                                str(info['total_sensors']),
-                                f"{info['passed_sensors']} ({info['pass_rate']:.1f}%)",
-                                f"{info['failed_sensors']} ({info['fail_rate']:.1f}%)",
-                                str(info['dm_sensors']),
-                                info['threshold_set']
-                            ]
-                        }
-                        st.dataframe(pd.DataFrame(left_data), use_container_width=True, hide_index=True)
+                        st.markdown(f"### Job {summary['job_prefix']} Analysis")
+                        st.dataframe(pd.DataFrame(summary['metrics'], columns=['Metric', 'Value']),
+                                     use_container_width=True, hide_index=True)
                     
                     with col_right:
                         st.markdown("### Status Breakdown")
-                        status_counts = info['status_counts']
-                        right_data = {'Status Code': [], 'Count': [], 'Percentage': []}
-                        
-                        for status in ['PASS', 'FL', 'FH', 'OT-', 'TT', 'OT+', 'DM']:
-                            count = status_counts.get(status, 0)
-                            if count > 0:
-                                right_data['Status Code'].append(status)
-                                right_data['Count'].append(count)
-                                right_data['Percentage'].append(f"{(count / info['total_sensors'] * 100):.1f}%")
-                        
-                        st.dataframe(pd.DataFrame(right_data), use_container_width=True, hide_index=True)
+                        st.dataframe(pd.DataFrame(summary['statuses'], columns=['Status Code', 'Count', 'Percentage']),
+                                     use_container_width=True, hide_index=True)
                     
                     st.markdown("")
                     st.markdown("### Job Analysis Comparison")
                     
-                    # Get historical jobs
-                    historical = get_historical_jobs(df, st.session_state.current_job, num_jobs=MAX_JOB_HISTORY)
+                    # Comparison model is shared with the printable report and other sessions
+                    with timed_span('report.comparison'):
+                        comparison = get_job_comparison(df)
                     
-                    if historical and len(historical) > 0:
-                        # Group jobs by whole number prefix
-                        job_groups = {}
-                        
-                        for job in historical:
-                            # Extract whole number prefix
-                            job_str = str(job['job']).strip()
-                            try:
-                                # For jobs like "267.1", get "267"
-                                if '.' in job_str:
-                                    prefix = job_str.split('.')[0]
-                                else:
-                                    prefix = job_str
-                            except:
-                                prefix = job_str
-                            
-                            # Group by prefix
-                            if prefix not in job_groups:
-                                job_groups[prefix] = {
-                                    'total': 0,
-                                    'passed': 0,
-                                    'failed': 0
-                                }
-                            
-                            job_groups[prefix]['total'] += job['total']
-                            job_groups[prefix]['passed'] += job['passed']
-                            job_groups[prefix]['failed'] += job['failed']
-                        
-                        # Build comparison table
-                        comparison_data = {
-                            'Job Number': [],
-                            'Total Sensors': [],
-                            'Passed Qty': [],
-                            'Passed %': [],
-                            'Failed Qty': [],
-                            'Failed %': []
-                        }
-                        
-                        totals = {'total': 0, 'passed': 0, 'failed': 0}
-                        
-                        # Sort job groups (numeric first, then non-numeric)
-                        sorted_prefixes = sorted(job_groups.keys(), key=lambda x: (not x.replace('.','').isdigit(), x.replace('.','').zfill(10) if x.replace('.','').isdigit() else x))
-                        
-                        for prefix in sorted_prefixes:
-                            group = job_groups[prefix]
-                            passed_pct = (group['passed'] / group['total'] * 100) if group['total'] > 0 else 0
-                            failed_pct = 100 - passed_pct
-                            
-                            comparison_data['Job Number'].append(prefix)
-                            comparison_data['Total Sensors'].append(group['total'])
-                            comparison_data['Passed Qty'].append(group['passed'])
-                            comparison_data['Passed %'].append(f"{passed_pct:.2f}%")
-                            comparison_data['Failed Qty'].append(group['failed'])
-                            comparison_data['Failed %'].append(f"{failed_pct:.2f}%")
-                            
-                            totals['total'] += group['total']
-                            totals['passed'] += group['passed']
-                            totals['failed'] += group['failed']
-                        
-                        # Add average row
-                        if len(job_groups) > 1:
-                            avg_pass_pct = (totals['passed'] / totals['total'] * 100) if totals['total'] > 0 else 0
-                            avg_fail_pct = 100 - avg_pass_pct
-                            comparison_data['Job Number'].append('Average:')
-                            comparison_data['Total Sensors'].append(int(totals['total']/len(job_groups)))
-                            comparison_data['Passed Qty'].append(int(totals['passed']/len(job_groups)))
-                            comparison_data['Passed %'].append(f"{avg_pass_pct:.2f}%")
-                            comparison_data['Failed Qty'].append(int(totals['failed']/len(job_groups)))
-                            comparison_data['Failed %'].append(f"{avg_fail_pct:.2f}%")
-                        
-                        st.dataframe(pd.DataFrame(comparison_data), use_container_width=True, hide_index=True)
+                    if comparison is None:
+                        comparison_task = background_task('comparison')
+                        done_pct = comparison_task.progress * 100 if comparison_task is not None else 0
+                        st.info(f"⏳ Job comparison is being computed in the background ({done_pct:.0f}% done). "
+                                "Generate the report again in a moment to include it.")
+                    elif comparison['rows']:
+                        st.dataframe(reports.comparison_frame(comparison), use_container_width=True, hide_index=True)
                     
                     # Print button - Create HTML report and print it
                     st.markdown("")
                     
                     # Generate printable HTML report
-                    report_html = generate_report_summary(info, st.session_state.current_job, df)
+                    with timed_span('report.summary_html'):
+                        report_html = reports.render_summary_html(summary, comparison)
                     
                     col_print_left, col_print_center, col_print_right = st.columns([1, 2, 1])
                     with col_print_center:
-                        # Escape the HTML for JavaScript
-                        escaped_html = json.dumps(report_html)
-                        
                         components.html(
-                            f"""
-                            <button onclick="printReport()" style="
-                                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                                color: white;
-                                border: none;
-                                padding: 0.7rem 1.8rem;
-                                border-radius: 25px;
-                                font-weight: bold;
-                                cursor: pointer;
-                                font-size: 1rem;
-                                width: 100%;
-                                box-shadow: 0 4px 15px rgba(102, 126, 234, 0.3);
-                                transition: transform 0.2s;
-                            ">
-                                🖨️ Print Report (Ctrl+P)
-                            </button>
-                            <style>
-                                button:hover {{
-                                    transform: translateY(-2px);
-                                    box-shadow: 0 6px 20px rgba(102, 126, 234, 0.4);
-                                }}
-                            </style>
-                            <script>
-                                function printReport() {{
-                                    var reportContent = {escaped_html};
-                                    var printWindow = window.open('', '', 'height=800,width=1000');
-                                    printWindow.document.write(reportContent);
-                                    printWindow.document.close();
-                                    printWindow.focus();
-                                    setTimeout(function() {{
-                                        printWindow.print();
-                                        printWindow.close();
-                                    }}, {PRINT_DIALOG_DELAY_MS});
-                                }}
-                            </script>
-                            """,
+                            reports.render_print_button(report_html, "🖨️ Print Report (Ctrl+P)", 'summary',
+                                                        PRINT_DIALOG_DELAY_MS),
                             height=60
                         )
         
         with col2:
-            if st.button("❌ Failed Sensors Report", use_container_width=True, key="report_failed"):
-                failed_sensors = info['results'][info['results']['Pass/Fail'].isin(['FL', 'FH'])]
+            if st.button("❌ Failed Sensors Report", use_container_width=True, key="report_failed",
+                         disabled=bool(sample)):
+                failed_report = get_failed_report(info)
                 
-                if len(failed_sensors) > 0:
-                    with st.expander("❌ Failed Sensors Report (Use Browser Print)", expanded=True):
+                if len(failed_report) > 0:
+                    with st.expander("❌ Failed Sensors Report (Use Browser Print)", expanded=True), \
+                            timed_span('report.failed', sensors=len(failed_report)):
+                        generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                         st.markdown(f"## Failed Sensors Report")
                         st.markdown(f"**Job:** {st.session_state.current_job}")
-                        st.markdown(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                        st.markdown(f"**Total Failed:** {len(failed_sensors)} sensors")
+                        st.markdown(f"**Generated:** {generated}")
+                        st.markdown(f"**Total Failed:** {len(failed_report)} sensors")
                         st.markdown("")
                         
-                        # Display as table - include T1 and T2 status if available
-                        display_cols = ['Serial Number', 'Channel', 'Pass/Fail']
-                        # Add Status(T1) and Status(T2) if they exist
-                        if 'Status(T1)' in failed_sensors.columns:
-                            display_cols.append('Status(T1)')
-                        if 'Status(T2)' in failed_sensors.columns:
-                            display_cols.append('Status(T2)')
-                        display_cols.append('120s(St.Dev.)')
-                        
-                        display_df = failed_sensors[[c for c in display_cols if c in failed_sensors.columns]].copy()
-                        display_df['120s(St.Dev.)'] = display_df['120s(St.Dev.)'].apply(lambda x: f"{x:.3f}" if pd.notna(x) else "—")
-                        st.dataframe(display_df, use_container_width=True, hide_index=True)
+                        st.dataframe(failed_report, use_container_width=True, hide_index=True)
                         
                         st.markdown("")
                         
-                        # Generate HTML for printing
-                        failed_report_html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Failed Sensors Report - Job {st.session_state.current_job}</title>
-    <style>
-        @page {{ margin: 1in; }}
-        body {{ font-family: Arial, sans-serif; padding: 20px; color: #000; background: #fff; }}
-        h1, h2 {{ color: #333; page-break-after: avoid; }}
-        h1 {{ font-size: 24px; margin-bottom: 10px; border-bottom: 3px solid #dc2626; padding-bottom: 10px; }}
-        .header-info {{ color: #666; font-size: 14px; margin-bottom: 20px; }}
-        table {{ width: 100%; border-collapse: collapse; font-size: 13px; margin-bottom: 20px; page-break-inside: avoid; }}
-        th, td {{ padding: 8px; text-align: left; border: 1px solid #ddd; }}
-        th {{ background-color: #fee2e2; font-weight: bold; color: #7f1d1d; }}
-        tr:nth-child(even) {{ background-color: #f9f9f9; }}
-    </style>
-</head>
-<body>
-    <h1>Failed Sensors Report</h1>
-    <p class="header-info">Job: {st.session_state.current_job}</p>
-    <p class="header-info">Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-    <p class="header-info">Total Failed: {len(failed_sensors)} sensors</p>
-    
-    <table>
-        <tr>
-            <th>Serial Number</th>
-            <th>Channel</th>
-            <th>Status</th>
-            <th>T1 Status</th>
-            <th>T2 Status</th>
-            <th>Std Dev</th>
-        </tr>
-"""
-                        
-                        for idx, row in failed_sensors.iterrows():
-                            t1_status = row.get('Status(T1)', '—') if pd.notna(row.get('Status(T1)', None)) else '—'
-                            t2_status = row.get('Status(T2)', '—') if pd.notna(row.get('Status(T2)', None)) else '—'
-                            failed_report_html += f"""        <tr>
-            <td>{row['Serial Number']}</td>
-            <td>{row.get('Channel', 'N/A')}</td>
-            <td>{row['Pass/Fail']}</td>
-            <td>{t1_status}</td>
-            <td>{t2_status}</td>
-            <td>{row['120s(St.Dev.)']:.3f}</td>
-        </tr>
-"""
-                        
-                        failed_report_html += """    </table>
-</body>
-</html>
-"""
+                        # Printable HTML from the same model as the table above
+                        failed_report_html = reports.render_failed_html(
+                            failed_report, st.session_state.current_job, generated
+                        )
                         
                         # Print button
                         col_print_left, col_print_center, col_print_right = st.columns([1, 2, 1])
                         with col_print_center:
-                            escaped_html = json.dumps(failed_report_html)
-                            
                             components.html(
-                                f"""
-                                <button onclick="printReport()" style="
-                                    background: linear-gradient(135deg, #dc2626 0%, #991b1b 100%);
-                                    color: white;
-                                    border: none;
-                                    padding: 0.7rem 1.8rem;
-                                    border-radius: 25px;
-                                    font-weight: bold;
-                                    cursor: pointer;
-                                    font-size: 1rem;
-                                    width: 100%;
-                                    box-shadow: 0 4px 15px rgba(220, 38, 38, 0.3);
-                                    transition: transform 0.2s;
-                                ">
-                                    🖨️ Print Failed Sensors Report
-                                </button>
-                                <style>
-                                    button:hover {{
-                                        transform: translateY(-2px);
-                                        box-shadow: 0 6px 20px rgba(220, 38, 38, 0.4);
-                                    }}
-                                </style>
-                                <script>
-                                    function printReport() {{
-                                        var reportContent = {escaped_html};
-                                        var printWindow = window.open('', '', 'height=800,width=1000');
-                                        printWindow.document.write(reportContent);
-                                        printWindow.document.close();
-                                        printWindow.focus();
-                                        setTimeout(function() {{
-                                            printWindow.print();
-                                            printWindow.close();
-                                        }}, {PRINT_DIALOG_DELAY_MS});
-                                    }}
-                                </script>
-                                """,
+                                reports.render_print_button(failed_report_html, "🖨️ Print Failed Sensors Report",
+                                                            'failed', PRINT_DIALOG_DELAY_MS),
                                 height=60
                             )
                 else:
@@ -2504,6 +2958,41 @@ if len(df) > 0:
         tab_list = ["📋 Data Table", "📈 Visualization", "📊 Status Breakdown", "ℹ️ Thresholds"]
         tabs = st.tabs(tab_list)
         
+        # Charts depend only on the dataset, job and threshold set, so their images are reused across reruns
+        figure_key = (get_dataset_fingerprint(df), st.session_state.current_job, st.session_state.current_threshold,
+                      sample and sample['sensors'])
+        dark = st.get_option('theme.base') == 'dark'
+        status_colors = get_status_colors()
+        
+        # Start every chart on the page in the render pool now so they draw in parallel
+        job_rows = get_sorted_job_data(info, df)
+        if st.session_state.get('trend_overlay', False):
+            # Overlay needs every reading plus each row's status; figures.py bounds the drawing cost
+            trend_figure = submit_figure(
+                'trend_overlay', figure_key, figures.create_enhanced_plot,
+                job_data=job_rows[[c for c in ['Job #'] + TIME_POINTS if c in job_rows.columns]].assign(
+                    **{'Pass/Fail': get_row_statuses(info, df)}),
+                thresholds=info['thresholds'], dark=dark, band_summary=get_band_summary(info, df),
+                status_colors=status_colors
+            )
+        else:
+            trend_figure = submit_figure(
+                'trend', figure_key, figures.create_enhanced_plot,
+                job_data=job_rows[[c for c in ['Job #', '120'] if c in job_rows.columns]],
+                thresholds=info['thresholds'], dark=dark, band_summary=get_band_summary(info, df)
+            )
+        status_by_test_figure = submit_figure(
+            'status_by_test', figure_key, figures.create_status_by_test_plot,
+            results_df=info['results'].filter(like='Status(T'), status_counts=info['status_counts'],
+            status_colors=status_colors, dark=dark
+        )
+        status_distribution_figure = submit_figure(
+            'status_distribution', figure_key, figures.create_status_distribution_plot,
+            status_counts=info['status_counts'], total_sensors=info['total_sensors'],
+            status_colors=status_colors, dark=dark
+        )
+        flowchart_figure = submit_figure('flowchart', (), figures.create_status_flowchart)
+        
         # Tab 1: Data Table with simple filters
         with tabs[0]:
             st.markdown("#### 🔍 Filters")
@@ -2542,49 +3031,77 @@ if len(df) > 0:
             st.caption("💡 Filters apply automatically. Remove status pills or clear text to reset.")
             
             # Apply filters
-            filtered_data = info['results'].copy()
-            
-            if selected_statuses:
-                filtered_data = filtered_data[filtered_data['Pass/Fail'].isin(selected_statuses)]
-            else:
-                filtered_data = pd.DataFrame(columns=filtered_data.columns)
-            
-            if serial_text:
-                serials = [s.strip() for s in serial_text.split(',') if s.strip()]
-                if serials:
-                    pattern = '|'.join([re.escape(s) for s in serials])
-                    mask = filtered_data['Serial Number'].str.contains(pattern, case=False, na=False, regex=True)
-                    filtered_data = filtered_data[mask]
+            with timed_span('table.filter'):
+                filtered_data = info['results']
+                
+                if selected_statuses:
+                    filtered_data = filtered_data[filtered_data['Pass/Fail'].isin(selected_statuses)]
+                else:
+                    filtered_data = pd.DataFrame(columns=filtered_data.columns)
+                
+                if serial_text.strip():
+                    filtered_data = filter_by_serial(info, filtered_data, serial_text)
             
             st.info(f"Showing {len(filtered_data)} of {len(info['results'])} sensors")
             
-            # Format and display data
-            display_data = filtered_data.copy()
-            if len(display_data) > 0:
-                for col in display_data.columns:
-                    if col.startswith('0s(') or col.startswith('90s(') or col.startswith('120s('):
-                        display_data[col] = display_data[col].apply(lambda x: f"{x:.1f}" if pd.notna(x) else "—")
-                    elif col == '120s(St.Dev.)':
-                        display_data[col] = display_data[col].apply(lambda x: f"{x:.3f}" if pd.notna(x) else "—")
+            # Display one page at a time so render cost doesn't grow with job size
+            if len(filtered_data) > 0:
+                if 'table_page_size' not in st.session_state:
+                    st.session_state.table_page_size = TABLE_DEFAULT_PAGE_SIZE
+                page_size = st.session_state.table_page_size
+                total_pages = max(1, -(-len(filtered_data) // page_size))
                 
-                styled_data = display_data.style.apply(color_rows, axis=1)
+                # Back to page 1 whenever the job or filters change
+                filter_signature = (st.session_state.current_job, tuple(selected_statuses or []), serial_text, page_size)
+                if st.session_state.get('table_filter_signature') != filter_signature:
+                    st.session_state.table_filter_signature = filter_signature
+                    st.session_state.table_page = 1
+                elif st.session_state.get('table_page', 1) > total_pages:
+                    st.session_state.table_page = total_pages
                 
-                st.dataframe(
-                    styled_data,
-                    use_container_width=True,
-                    hide_index=True,
-                    height=400
-                )
+                page = st.session_state.get('table_page', 1)
+                with timed_span('table.render', rows=len(filtered_data), page=page):
+                    st.dataframe(
+                        get_table_page(get_display_results(info), filtered_data.index, page, page_size),
+                        column_config=table_column_config(),
+                        use_container_width=True,
+                        hide_index=True,
+                        height=400
+                    )
+                
+                page_col1, page_col2, page_col3 = st.columns([2, 2, 4])
+                with page_col1:
+                    st.number_input(
+                        "Page",
+                        min_value=1,
+                        max_value=total_pages,
+                        step=1,
+                        key="table_page"
+                    )
+                with page_col2:
+                    st.selectbox(
+                        "Rows per page",
+                        options=TABLE_PAGE_SIZES,
+                        key="table_page_size"
+                    )
+                with page_col3:
+                    first_row = (page - 1) * page_size + 1
+                    last_row = min(page * page_size, len(filtered_data))
+                    st.caption(f"Rows {first_row:,}–{last_row:,} of {len(filtered_data):,} · Page {page} of {total_pages}")
             else:
                 st.warning("No data to display with current filters")
         
         # Tab 2: Visualization with proper cleanup
         with tabs[1]:
             with st.expander("📈 Sensor Trend Analysis", expanded=True):
-                fig = create_enhanced_plot(df, st.session_state.current_job, st.session_state.current_threshold)
-                if fig:
-                    st.pyplot(fig)
-                    plt.close(fig)  # Explicit cleanup
+                st.checkbox(
+                    "Overlay raw sensor curves",
+                    key="trend_overlay",
+                    help=f"Draws up to {figures.OVERLAY_MAX_CURVES} representative curves (extremes, failed "
+                         "sensors and a sample of every status) over a density image of all curves"
+                )
+                with timed_span('plot.trend', overlay=st.session_state.trend_overlay):
+                    show_figure(trend_figure)
             
             # Show individual sensor plots if serial number filter is active
             if st.session_state.get('serial_filter', '').strip():
@@ -2596,94 +3113,63 @@ if len(df) > 0:
                         st.markdown("**Showing detailed readings for filtered sensors:**")
                         
                         # Get filtered data
-                        pattern = '|'.join([re.escape(s) for s in serials])
-                        filtered_sensors = info['results'][
-                            info['results']['Serial Number'].str.contains(pattern, case=False, na=False, regex=True)
-                        ]
+                        filtered_sensors = filter_by_serial(info, info['results'], serial_text)
                         
                         if len(filtered_sensors) == 0:
                             st.warning("No sensors match the filter.")
                         else:
-                            # Get job data for these specific sensors
-                            job_data = get_job_data(df, st.session_state.current_job)
+                            # One small-multiples figure per page, so cost follows page size, not match count
+                            total_pages = max(1, -(-len(filtered_sensors) // SENSOR_GRID_PAGE_SIZE))
+                            grid_signature = (st.session_state.current_job, serial_text)
+                            if st.session_state.get('sensor_grid_signature') != grid_signature:
+                                st.session_state.sensor_grid_signature = grid_signature
+                                st.session_state.sensor_grid_page = 1
+                            elif st.session_state.get('sensor_grid_page', 1) > total_pages:
+                                st.session_state.sensor_grid_page = total_pages
                             
-                            # Create plots for each sensor
-                            for idx, (_, sensor_row) in enumerate(filtered_sensors.iterrows()):
-                                serial = sensor_row['Serial Number']
-                                
-                                # Get all test data for this sensor
-                                sensor_tests = job_data[job_data['Serial Number'] == serial]
-                                
-                                if len(sensor_tests) > 0:
-                                    # Create subplot
-                                    with create_plot(figsize=(12, 4)) as fig:
-                                        ax = fig.add_subplot(111)
-                                        
-                                        # Style based on theme
-                                        fig.patch.set_facecolor('#1a1a1a' if st.get_option('theme.base') == 'dark' else 'white')
-                                        ax.set_facecolor('#2d2d2d' if st.get_option('theme.base') == 'dark' else '#f8f9fa')
-                                        
-                                        # Get thresholds
-                                        thresholds = info['thresholds']
-                                        
-                                        # Plot each test for this sensor
-                                        colors = ['#667eea', '#764ba2', '#f59e0b', '#10b981', '#ef4444']
-                                        for test_idx, (_, test_row) in enumerate(sensor_tests.iterrows()):
-                                            time_points = []
-                                            readings = []
-                                            
-                                            for tp in TIME_POINTS:
-                                                if tp in test_row and pd.notna(test_row[tp]):
-                                                    time_points.append(float(tp))
-                                                    readings.append(test_row[tp])
-                                            
-                                            if len(time_points) > 0:
-                                                color = colors[test_idx % len(colors)]
-                                                ax.plot(time_points, readings, 'o-', 
-                                                       color=color, linewidth=2, markersize=6,
-                                                       label=f'Test {test_idx + 1}',
-                                                       markeredgecolor='white', markeredgewidth=1)
-                                        
-                                        # Add threshold lines
-                                        ax.axhline(y=thresholds['min_120s'], color='#ff4444', 
-                                                  linestyle='--', alpha=0.7, linewidth=2,
-                                                  label=f'Min Threshold ({thresholds["min_120s"]}V)')
-                                        ax.axhline(y=thresholds['max_120s'], color='#ff4444',
-                                                  linestyle='--', alpha=0.7, linewidth=2,
-                                                  label=f'Max Threshold ({thresholds["max_120s"]}V)')
-                                        
-                                        # Formatting
-                                        status = sensor_row['Pass/Fail']
-                                        status_color = StatusBadge.get_color(status)
-                                        
-                                        ax.set_title(f'Serial: {serial} - Status: {status}',
-                                                   fontsize=14, fontweight='bold', pad=15,
-                                                   color=status_color)
-                                        ax.set_xlabel('Time (seconds)', fontsize=11)
-                                        ax.set_ylabel('Voltage (V)', fontsize=11)
-                                        ax.set_ylim(PLOT_VOLTAGE_LIMITS)
-                                        ax.grid(True, alpha=0.3, linestyle='--',
-                                               color='#4a4a4a' if st.get_option('theme.base') == 'dark' else '#cccccc')
-                                        ax.legend(loc='best', framealpha=0.9,
-                                                facecolor='#2d2d2d' if st.get_option('theme.base') == 'dark' else 'white',
-                                                fontsize=9)
-                                        
-                                        plt.tight_layout()
-                                        st.pyplot(fig)
-                                    
-                                    # Show test details in compact format
-                                    col1, col2, col3 = st.columns(3)
-                                    with col1:
-                                        st.caption(f"**Tests:** {len(sensor_tests)}")
-                                    with col2:
-                                        std_dev = sensor_row['120s(St.Dev.)']
-                                        st.caption(f"**Std Dev:** {std_dev:.3f}V")
-                                    with col3:
-                                        badge_html = StatusBadge.get_html(status)
-                                        st.markdown(badge_html, unsafe_allow_html=True)
-                                    
-                                    if idx < len(filtered_sensors) - 1:
-                                        st.markdown("---")
+                            page = st.session_state.get('sensor_grid_page', 1)
+                            start = (page - 1) * SENSOR_GRID_PAGE_SIZE
+                            page_sensors = filtered_sensors.iloc[start:start + SENSOR_GRID_PAGE_SIZE]
+                            
+                            # Get all test data for these sensors (slices of the serial-sorted job rows)
+                            page_tests = {serial: get_sensor_tests(info, df, serial)
+                                          for serial in page_sensors['Serial Number']}
+                            page_sensors = page_sensors[[len(page_tests[serial]) > 0 for serial in page_sensors['Serial Number']]]
+                            
+                            if len(page_sensors) > 0:
+                                with timed_span('plot.sensor_grid', sensors=len(page_sensors), page=page):
+                                    render_cached_figure(
+                                        'sensor_grid',
+                                        figure_key + (tuple(page_sensors['Serial Number']),),
+                                        figures.create_sensor_grid_plot,
+                                        sensors=page_sensors[['Serial Number', 'Pass/Fail']],
+                                        sensor_tests=page_tests,
+                                        thresholds=info['thresholds'],
+                                        status_colors=status_colors,
+                                        dark=dark
+                                    )
+                            
+                            # Compact details for the sensors on this page
+                            details = get_display_results(info).loc[
+                                page_sensors.index, ['Serial Number', 'Channel', 'Pass/Fail', '120s(St.Dev.)']
+                            ].assign(Tests=[len(page_tests[serial]) for serial in page_sensors['Serial Number']])
+                            st.dataframe(details, use_container_width=True, hide_index=True,
+                                         column_config=table_column_config())
+                            
+                            if total_pages > 1:
+                                grid_col1, grid_col2 = st.columns([2, 6])
+                                with grid_col1:
+                                    st.number_input(
+                                        "Sensor page",
+                                        min_value=1,
+                                        max_value=total_pages,
+                                        step=1,
+                                        key="sensor_grid_page"
+                                    )
+                                with grid_col2:
+                                    last = min(start + SENSOR_GRID_PAGE_SIZE, len(filtered_sensors))
+                                    st.caption(f"Sensors {start + 1:,}–{last:,} of {len(filtered_sensors):,} · "
+                                               f"Page {page} of {total_pages}")
         
         # Tab 3: Status Breakdown
         with tabs[2]:
@@ -2692,122 +3178,13 @@ if len(df) > 0:
             with col1:
                 st.markdown("#### Distribution by Test")
                 
-                # Create bar chart showing status distribution per test
-                with create_plot(figsize=(8, 6)) as fig:
-                    ax = fig.add_subplot(111)
-                    
-                    fig.patch.set_facecolor('#1a1a1a' if st.get_option('theme.base') == 'dark' else 'white')
-                    ax.set_facecolor('#2d2d2d' if st.get_option('theme.base') == 'dark' else '#f8f9fa')
-                    text_color = 'white' if st.get_option('theme.base') == 'dark' else 'black'
-                    
-                    # Get results dataframe
-                    results_df = info['results']
-                    
-                    # Find test columns (Status(T1), Status(T2), etc.)
-                    test_cols = [col for col in results_df.columns if col.startswith('Status(T') and col.endswith(')')]
-                    
-                    if test_cols:
-                        # Count statuses per test
-                        test_data = {}
-                        status_order = ['PASS', 'OT-', 'TT', 'OT+', 'FL', 'FH', 'DM']
-                        
-                        for test_col in sorted(test_cols):
-                            test_name = test_col.replace('Status(', '').replace(')', '')
-                            counts = results_df[test_col].value_counts()
-                            test_data[test_name] = {status: counts.get(status, 0) for status in status_order}
-                        
-                        # Create stacked bar chart
-                        tests = list(test_data.keys())
-                        x = np.arange(len(tests))
-                        bar_width = 0.6
-                        
-                        bottom = np.zeros(len(tests))
-                        
-                        for status in status_order:
-                            values = [test_data[t].get(status, 0) for t in tests]
-                            if sum(values) > 0:  # Only plot if there are values
-                                color = StatusBadge.get_color(status)
-                                ax.bar(x, values, bar_width, label=status, bottom=bottom, color=color)
-                                bottom += np.array(values)
-                        
-                        ax.set_xlabel('Test', fontsize=11, color=text_color)
-                        ax.set_ylabel('Count', fontsize=11, color=text_color)
-                        ax.set_title('Status by Test', fontsize=14, fontweight='bold', color=text_color)
-                        ax.set_xticks(x)
-                        ax.set_xticklabels(tests, color=text_color)
-                        ax.tick_params(colors=text_color)
-                        ax.legend(loc='upper right', fontsize=8)
-                        
-                        for spine in ax.spines.values():
-                            spine.set_color(text_color)
-                        
-                        plt.tight_layout()
-                        st.pyplot(fig)
-                    else:
-                        # Fallback: single test - show simple bar chart
-                        statuses = list(info['status_counts'].keys())
-                        counts = list(info['status_counts'].values())
-                        colors = [StatusBadge.get_color(s) for s in statuses]
-                        
-                        # Filter to non-zero
-                        non_zero = [(s, c, col) for s, c, col in zip(statuses, counts, colors) if c > 0]
-                        if non_zero:
-                            statuses, counts, colors = zip(*non_zero)
-                            
-                            x = np.arange(len(statuses))
-                            ax.bar(x, counts, color=colors)
-                            ax.set_xlabel('Status', fontsize=11, color=text_color)
-                            ax.set_ylabel('Count', fontsize=11, color=text_color)
-                            ax.set_title('Status Distribution', fontsize=14, fontweight='bold', color=text_color)
-                            ax.set_xticks(x)
-                            ax.set_xticklabels(statuses, color=text_color)
-                            ax.tick_params(colors=text_color)
-                            
-                            for spine in ax.spines.values():
-                                spine.set_color(text_color)
-                            
-                            plt.tight_layout()
-                            st.pyplot(fig)
+                with timed_span('plot.status_by_test'):
+                    show_figure(status_by_test_figure)
             
             with col2:
                 st.markdown("#### Overall Distribution")
-                with create_plot(figsize=(10, 7)) as fig:
-                    ax = fig.add_subplot(111)
-                    
-                    fig.patch.set_facecolor('#1a1a1a' if st.get_option('theme.base') == 'dark' else 'white')
-                    ax.set_facecolor('#2d2d2d' if st.get_option('theme.base') == 'dark' else '#f8f9fa')
-                    
-                    plot_labels = []
-                    plot_sizes = []
-                    plot_colors = []
-                    
-                    for status, count in info['status_counts'].items():
-                        if count > 0:
-                            pct = (count / info['total_sensors'] * 100)
-                            plot_labels.append(f"{status} ({count}) {pct:.1f}%")
-                            plot_sizes.append(count)
-                            plot_colors.append(StatusBadge.get_color(status))
-                    
-                    if plot_sizes:
-                        explode = [0.05 for _ in plot_sizes]
-                        
-                        wedges, texts = ax.pie(
-                            plot_sizes,
-                            colors=plot_colors,
-                            startangle=90,
-                            explode=explode,
-                            textprops={'weight': 'bold'}
-                        )
-                        
-                        # Add legend with all info outside pie
-                        ax.legend(plot_labels, loc='center left', bbox_to_anchor=(1, 0, 0.5, 1), 
-                                 fontsize=10, framealpha=0.95)
-                        
-                        ax.set_title('Status Distribution', fontsize=16, fontweight='bold', pad=20,
-                                   color='white' if st.get_option('theme.base') == 'dark' else 'black')
-                        
-                        plt.tight_layout()
-                        st.pyplot(fig)
+                with timed_span('plot.status_distribution'):
+                    show_figure(status_distribution_figure)
         
         # Tab 4: Thresholds
         with tabs[3]:
@@ -2844,9 +3221,12 @@ if len(df) > 0:
             
             with st.expander("🔀 Decision Logic Flowchart", expanded=False):
                 st.caption("Visual representation of the status determination process")
-                with create_plot(figsize=(14, 20)) as flowchart_fig:
-                    flowchart_fig = create_status_flowchart()
-                    st.pyplot(flowchart_fig)
+                with timed_span('plot.flowchart'):
+                    show_figure(flowchart_figure)
+    
+    # Cross-job lookup is available whenever data is loaded, with or without an analysis
+    render_sensor_history(df)
+    render_bulk_reports(df)
 
 else:
     # Welcome screen with tutorial prompt
@@ -2907,3 +3287,16 @@ else:
         
         **Need help?** Click the **"🎓 Tutorial & Help"** section in the sidebar!
         """)
+
+# Finish stage timing for this rerun
+rerun_spans, rerun_ms = end_rerun_timing()
+if st.session_state.show_diagnostics:
+    render_timing_panel(rerun_spans, rerun_ms)
+
+# Save the profile of this rerun if profiling was on
+profile_path = finish_rerun_profile(st.session_state.df)
+if profile_path:
+    st.caption(f"📸 Rerun profile saved to `{profile_path}` (open with snakeviz or `python -m pstats`)")
+if st.session_state.get('profile_error'):
+    st.warning(f"⚠️ Profiling skipped: {st.session_state.profile_error}")
+    st.session_state.profile_error = None
@@ -0,0 +1,193 @@
+"""Background tasks shared by every session of the Sensor Analysis Dashboard.
+
+Analyses, report builds and prefetches run on a small thread pool. Requests
+for the same key share one task, which keeps running while any session waits
+on it. Kept free of Streamlit, like analysis.py; the app creates one
+BackgroundWorker per server process.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ==================== BACKGROUND TASKS ====================
+class TaskCancelled(Exception):
+    """Raised inside a background task once every session waiting on it has cancelled."""
+
+class BackgroundTask:
+    """One queued or running piece of work, shared by every session that asked for the same key."""
+
+    def __init__(self, key, label, clock=time.monotonic):
+        self.key = key
+        self.label = label
+        self.clock = clock
+        self.time_budget_s = None  # Largest budget of the sessions waiting, see update_time_budget()
+        self.started_at = None
+        self.state = 'queued'  # queued -> running -> done | failed | cancelled
+        self.progress = 0.0
+        self.message = 'Waiting for a free worker...'
+        self.result = None
+        self.partial = None  # Preliminary result published by the task body while it runs
+        self.error = None
+        self.spans = []
+        self.prefetched = False  # Started ahead of any request; kept until the result TTL after finishing
+        self.subscribers = {}  # Session token -> that session's time budget (s), or None for no limit
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed', 'cancelled')
+
+    def update_time_budget(self):
+        """Use the largest budget of the waiting sessions; no limit if any has none, or nobody waits (a prefetch)."""
+        budgets = list(self.subscribers.values())
+        self.time_budget_s = None if not budgets or None in budgets else max(budgets)
+
+    def report(self, fraction, message=None):
+        """Record progress from the task body.
+
+        Raises TaskCancelled if nobody is waiting any more, or TimeoutError once past the time budget.
+        """
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+        budget = self.time_budget_s
+        if budget is not None and self.started_at is not None and self.clock() - self.started_at > budget:
+            raise TimeoutError(f"Stopped after exceeding the {budget:g} s time budget")
+        self.progress = min(max(fraction, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+class BackgroundWorker:
+    """Thread pool with a keyed task registry: identical requests share one task, and can be cancelled.
+
+    result_ttl_s: finished results nobody collected (e.g. tab closed) are dropped after this.
+    max_queued_prefetches: prefetches waiting for a thread; more are skipped.
+    timing: thread-local whose state is set to each running task's span collector.
+    clock: monotonic time source, in seconds.
+    """
+
+    def __init__(self, workers, prefetch_workers, result_ttl_s=600, max_queued_prefetches=8, timing=None,
+                 clock=time.monotonic):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='background')
+        self.prefetch_executor = (ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix='prefetch')
+                                  if prefetch_workers > 0 else None)
+        self.result_ttl_s = result_ttl_s
+        self.max_queued_prefetches = max_queued_prefetches
+        self.timing = timing if timing is not None else threading.local()
+        self.clock = clock
+        self.tasks = {}
+        self.lock = threading.Lock()
+
+    def _drop_expired(self):
+        # Sessions that went away never collect their results, and prefetches may never be asked for
+        expired = [k for k, t in self.tasks.items()
+                   if t.finished_at is not None and self.clock() - t.finished_at > self.result_ttl_s]
+        for expired_key in expired:
+            del self.tasks[expired_key]
+
+    def submit(self, key, label, subscriber, func, *args, time_budget_s=None):
+        """Queue func(task, *args) under key, or join the task already queued, running or prefetched for it.
+
+        time_budget_s, if given, is how long this subscriber lets the task run once started;
+        a shared task stops only when the largest budget of the sessions waiting on it runs out.
+        """
+        with self.lock:
+            self._drop_expired()
+            task = self.tasks.get(key)
+            if task is not None and task.prefetched and task.state == 'queued':
+                # Asked for before its prefetch started: run it now rather than behind other prefetches
+                task.cancel_event.set()
+                task.future.cancel()
+                task = None
+            # Failed tasks are retried, e.g. an analysis stopped by a time budget the next session may not share
+            if task is None or task.cancel_event.is_set() or task.state == 'failed':
+                task = BackgroundTask(key, label, self.clock)
+                self.tasks[key] = task
+                task.future = self.executor.submit(self._run, task, func, args)
+            self.join(task, subscriber, time_budget_s)
+            return task
+
+    def join(self, task, subscriber, time_budget_s=None):
+        """Add (or update) a subscriber and its time budget. Call with the lock held."""
+        task.subscribers[subscriber] = time_budget_s
+        task.update_time_budget()
+
+    def prefetch(self, key, label, func, *args):
+        """Queue func(task, *args) on the prefetch threads unless key is already known.
+
+        Nobody waits on a prefetch; a later submit() of the same key joins it, or picks up its
+        result until result_ttl_s after it finished. Returns the task, or None if prefetching
+        is disabled, the key is already known or max_queued_prefetches are waiting.
+        """
+        if self.prefetch_executor is None:
+            return None
+        with self.lock:
+            self._drop_expired()
+            if key in self.tasks:
+                return None
+            if sum(t.prefetched and t.state == 'queued' for t in self.tasks.values()) >= self.max_queued_prefetches:
+                return None
+            task = BackgroundTask(key, label, self.clock)
+            task.prefetched = True
+            self.tasks[key] = task
+            task.future = self.prefetch_executor.submit(self._run, task, func, args)
+            return task
+
+    def _run(self, task, func, args):
+        if task.cancel_event.is_set():
+            task.state = 'cancelled'
+            return
+        task.state = 'running'
+        task.started_at = self.clock()
+        self.timing.state = {'timing_spans': task.spans, 'timing_started': time.perf_counter(), 'timing_depth': 0}
+        try:
+            task.result = func(task, *args)
+            task.progress = 1.0
+            task.state = 'done'
+        except TaskCancelled:
+            task.state = 'cancelled'
+        except Exception as e:
+            task.error = e
+            task.state = 'failed'
+        finally:
+            self.timing.state = None
+            task.finished_at = self.clock()
+
+    def release(self, task, subscriber, cancel=False):
+        """Stop waiting on a task; the last subscriber to leave drops it, cancelling it if asked."""
+        with self.lock:
+            task.subscribers.pop(subscriber, None)
+            task.update_time_budget()
+            if task.subscribers:
+                return
+            if self.tasks.get(task.key) is task and not (task.prefetched and task.state == 'done'):
+                del self.tasks[task.key]
+            if cancel and not task.finished:
+                task.cancel_event.set()
+                if task.future.cancel():
+                    task.state = 'cancelled'
+
+# ==================== PREFETCHING ====================
+def prefetch_jobs(worker, job_numbers, verdict, task_of, func):
+    """Queue func on the worker's prefetch threads for each job number whose verdict(job_number) is 'ok'.
+
+    task_of(job_number) gives the (key, args) of its task; None entries (no neighboring job)
+    are skipped. Returns the tasks queued, leaving out keys already known and prefetches over the cap.
+    """
+    queued = []
+    for job_number in job_numbers:
+        if job_number is None or verdict(job_number) != 'ok':
+            continue
+        key, args = task_of(job_number)
+        task = worker.prefetch(key, f"Prefetching job {job_number}", func, *args)
+        if task is not None:
+            queued.append(task)
+    return queued
+
+def first_time(state, name, marker):
+    """True, remembering marker as state[name], unless state[name] already is marker (e.g. session state)."""
+    if state.get(name) == marker:
+        return False
+    state[name] = marker
+    return True
@@ -0,0 +1,282 @@
+"""Headless rerun latency benchmark for the Sensor Analysis Dashboard.
+
+Drives app.py through Streamlit's AppTest harness with a scripted workflow
+(load database, analyze job, filter, open reports) against synthetic
+databases of several sizes, and reports wall time per rerun and per
+interaction.
+
+Usage:
+    python benchmark_reruns.py --sizes 1000,5000,20000 --json bench.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# ==================== CONFIGURATION ====================
+APP_PATH = Path(__file__).with_name('app.py')
+DEFAULT_SIZES = [1000, 5000, 20000]  # Total sensors in the synthetic database
+DEFAULT_JOBS = 20  # Jobs the sensors are spread across
+DEFAULT_TESTS_PER_SENSOR = 2
+DEFAULT_TIMEOUT_S = 600  # Per-rerun AppTest timeout
+SERIAL_KEYSTROKES = 3  # Keystrokes typed after pasting a serial prefix
+POLL_INTERVAL_S = 0.1  # Pause between reruns while waiting on a background analysis
+TIME_POINTS = ['0', '5', '15', '30', '60', '90', '120']
+
+# ==================== MOCK DATA ====================
+def mock_job_number(job_idx):
+    """Job numbers grouped four to a prefix, e.g. 250.1 .. 250.4, 251.1 ..."""
+    return f"{250 + job_idx // 4}.{job_idx % 4 + 1}"
+
+def mock_serial(job_idx, sensor_idx):
+    """Serial numbers unique across jobs, e.g. SN000000042."""
+    return f"SN{job_idx:03d}{sensor_idx:06d}"
+
+def build_mock_database(db_path, total_sensors, num_jobs=DEFAULT_JOBS,
+                        tests_per_sensor=DEFAULT_TESTS_PER_SENSOR, seed=0):
+    """Write a synthetic sensor_readings table matching the Excel Database Builder schema."""
+    rng = np.random.default_rng(seed)
+    sensors_per_job = max(1, total_sensors // num_jobs)
+    n_rows = num_jobs * sensors_per_job * tests_per_sensor
+
+    # Rising response curve with per-sensor level and a small failing tail
+    level = rng.normal(2.6, 0.7, size=n_rows // tests_per_sensor).repeat(tests_per_sensor)
+    shape = np.array([0.45, 0.6, 0.72, 0.82, 0.9, 0.95, 1.0])
+    readings = level[:, None] * shape[None, :] + rng.normal(0, 0.04, size=(n_rows, len(shape)))
+    readings[rng.random(n_rows) < 0.01, -1] = np.nan  # Occasional missing 120s reading
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('DROP TABLE IF EXISTS sensor_readings')
+        conn.execute(
+            'CREATE TABLE sensor_readings (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            '"Job #" TEXT, "Serial Number" TEXT, "Channel" TEXT, '
+            + ', '.join(f'"{tp}" REAL' for tp in TIME_POINTS)
+            + ', "Test #" INTEGER)'
+        )
+        rows = []
+        row_idx = 0
+        for job_idx in range(num_jobs):
+            job = mock_job_number(job_idx)
+            for sensor_idx in range(sensors_per_job):
+                serial = mock_serial(job_idx, sensor_idx)
+                for test_num in range(1, tests_per_sensor + 1):
+                    values = [None if np.isnan(v) else float(v) for v in readings[row_idx]]
+                    rows.append((job, serial, f"CH{sensor_idx % 8}", *values, test_num))
+                    row_idx += 1
+        columns = ', '.join(f'"{c}"' for c in ['Job #', 'Serial Number', 'Channel', *TIME_POINTS, 'Test #'])
+        placeholders = ', '.join('?' for _ in range(len(TIME_POINTS) + 4))
+        conn.executemany(f'INSERT INTO sensor_readings ({columns}) VALUES ({placeholders})', rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {'rows': n_rows, 'sensors': num_jobs * sensors_per_job, 'jobs': num_jobs}
+
+# ==================== APPTEST HELPERS ====================
+def find_button(container, label_prefix):
+    """Return the first button whose label starts with label_prefix."""
+    for button in container.button:
+        if button.label.startswith(label_prefix):
+            return button
+    raise LookupError(f"Button not found: {label_prefix!r}")
+
+def check_exceptions(at, step):
+    """Fail loudly if the script raised during a rerun."""
+    if len(at.exception) > 0:
+        raise RuntimeError(f"App raised during '{step}': {at.exception[0].value}")
+
+class RerunRecorder:
+    """Collects wall time for each AppTest rerun, grouped by interaction."""
+
+    def __init__(self, at):
+        self.at = at
+        self.interactions = []
+
+    def step(self, name, actions, until=None, timeout=DEFAULT_TIMEOUT_S):
+        """Run one interaction made of one or more (callable -> rerun) actions.
+
+        until(at), if given, keeps rerunning (as the page's progress poll would)
+        until it holds, e.g. while a background analysis finishes. The pauses
+        between polls count towards the interaction's total.
+        """
+        reruns = []
+        interaction_start = time.perf_counter()
+        for action in actions:
+            start = time.perf_counter()
+            action()
+            self.at.run()
+            reruns.append(time.perf_counter() - start)
+            check_exceptions(self.at, name)
+        deadline = time.monotonic() + timeout
+        while until is not None and not until(self.at):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"'{name}' did not finish within {timeout}s")
+            time.sleep(POLL_INTERVAL_S)
+            start = time.perf_counter()
+            self.at.run()
+            reruns.append(time.perf_counter() - start)
+            check_exceptions(self.at, name)
+        self.interactions.append({'interaction': name, 'reruns': reruns,
+                                  'total_s': time.perf_counter() - interaction_start})
+        return self.at
+
+# ==================== SCENARIO ====================
+def run_workflow(job_number, serial_query, timeout=DEFAULT_TIMEOUT_S, session=None):
+    """Run the scripted user workflow once and return its RerunRecorder.
+
+    session defaults to an in-process AppTest; anything exposing the same
+    element-tree API and run() (e.g. load_test.RemoteSession) also works.
+
+    Tab switches are client-side in Streamlit and never rerun the script, but
+    every tab's body executes on every rerun, so their cost is included in
+    each of the steps below.
+    """
+    if session is None:
+        from streamlit.testing.v1 import AppTest
+        session = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+
+    at = session
+    rec = RerunRecorder(at)
+
+    rec.step('initial render', [lambda: None])
+    rec.step('select database source', [lambda: at.sidebar.radio[0].set_value("💾 Use Database")])
+    rec.step('load database', [lambda: find_button(at.sidebar, "🔄 Load Database").click()])
+
+    # Analysis runs in a background worker; the page polls until its summary appears
+    at.sidebar.text_input[0].set_value(job_number)
+    rec.step('analyze job', [lambda: find_button(at.sidebar, "🔍 Analyze").click()],
+             until=lambda at: len(at.metric) > 0 or len(at.error) > 0, timeout=timeout)
+    if len(at.metric) == 0:
+        raise RuntimeError(f"Analysis of job {job_number!r} produced no summary")
+
+    # Paste all but the last few characters, then one rerun per keystroke,
+    # as the serial filter's on_change fires on every edit
+    keystrokes = [serial_query[:i] for i in range(len(serial_query) - SERIAL_KEYSTROKES,
+                                                  len(serial_query) + 1)]
+    rec.step('type serial filter', [
+        (lambda text=text: at.text_input(key="serial_filter_input").set_value(text))
+        for text in keystrokes
+    ])
+
+    def toggle_pass_pill():
+        # Every status starts selected; options avoids reading server-side state
+        pills = at.button_group[0]
+        pills.set_value([s for s in pills.options if s != 'PASS'])
+
+    rec.step('toggle status pill', [toggle_pass_pill])
+    rec.step('open summary report', [lambda: at.button(key="report_summary").click()])
+    rec.step('open failed sensors report', [lambda: at.button(key="report_failed").click()])
+    rec.step('clear serial filter', [lambda: at.text_input(key="serial_filter_input").set_value("")])
+
+    return rec
+
+def summarize(interactions):
+    """Aggregate per-rerun statistics across all interactions."""
+    reruns = [r for item in interactions for r in item['reruns']]
+    return {
+        'reruns': len(reruns),
+        'rerun_mean_s': statistics.mean(reruns),
+        'rerun_median_s': statistics.median(reruns),
+        'rerun_max_s': max(reruns),
+        'workflow_total_s': sum(reruns),
+    }
+
+@contextmanager
+def mock_workspace(total_sensors, num_jobs=DEFAULT_JOBS, tests_per_sensor=DEFAULT_TESTS_PER_SENSOR):
+    """Build a synthetic database in a temp dir and point the app at it.
+
+    The app auto-detects ./sensor_data.db and writes job history under $HOME,
+    so both are redirected for the duration. Streamlit data caches are cleared
+    because load_data_from_db is keyed on its (None) path argument.
+    """
+    import streamlit as st
+
+    with tempfile.TemporaryDirectory(prefix='sensor_bench_') as workdir:
+        dataset = build_mock_database(os.path.join(workdir, 'sensor_data.db'),
+                                      total_sensors, num_jobs, tests_per_sensor)
+        previous_cwd = os.getcwd()
+        previous_home = os.environ.get('HOME')
+        os.chdir(workdir)
+        os.environ['HOME'] = workdir
+        st.cache_data.clear()
+        try:
+            yield dataset
+        finally:
+            os.chdir(previous_cwd)
+            if previous_home is not None:
+                os.environ['HOME'] = previous_home
+            else:
+                os.environ.pop('HOME', None)
+
+def benchmark_size(total_sensors, num_jobs, tests_per_sensor, timeout):
+    """Build a database of the requested size and time the workflow against it."""
+    job_number = mock_job_number(0)
+    with mock_workspace(total_sensors, num_jobs, tests_per_sensor) as dataset:
+        interactions = run_workflow(job_number, mock_serial(0, 0), timeout).interactions
+
+    return {
+        'size': total_sensors,
+        'dataset': dataset,
+        'job_number': job_number,
+        'interactions': interactions,
+        'summary': summarize(interactions),
+    }
+
+# ==================== REPORTING ====================
+def print_report(results):
+    """Print a fixed-width table of interaction timings for every size."""
+    for result in results:
+        dataset = result['dataset']
+        print(f"\n=== {dataset['sensors']:,} sensors / {dataset['rows']:,} rows / "
+              f"{dataset['jobs']} jobs (job {result['job_number']}) ===")
+        print(f"{'Interaction':<30}{'Reruns':>8}{'Total (s)':>12}{'Per rerun (s)':>16}")
+        for item in result['interactions']:
+            per_rerun = item['total_s'] / len(item['reruns'])
+            print(f"{item['interaction']:<30}{len(item['reruns']):>8}"
+                  f"{item['total_s']:>12.3f}{per_rerun:>16.3f}")
+        summary = result['summary']
+        print(f"{'All reruns':<30}{summary['reruns']:>8}{summary['workflow_total_s']:>12.3f}"
+              f"{summary['rerun_mean_s']:>16.3f}   (median {summary['rerun_median_s']:.3f}s, "
+              f"max {summary['rerun_max_s']:.3f}s)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated total sensor counts to benchmark")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help="Number of jobs the sensors are spread across")
+    parser.add_argument('--tests', type=int, default=DEFAULT_TESTS_PER_SENSOR,
+                        help="Tests (rows) per sensor")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT_S,
+                        help="Per-rerun timeout in seconds")
+    parser.add_argument('--json', dest='json_path', default=None,
+                        help="Optional path to write raw timings as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    results = []
+    for size in sizes:
+        print(f"Benchmarking {size:,} sensors...", file=sys.stderr)
+        results.append(benchmark_size(size, args.jobs, args.tests, args.timeout))
+
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nRaw timings written to {args.json_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_readings(jobs=('250.1', '250.2', '251.1'), sensors_per_job=6, tests_per_sensor=2, seed=0):
+    """Small sensor_readings frame: a few jobs of sensors with some failing and missing readings."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for job_idx, job in enumerate(jobs):
+        for sensor in range(sensors_per_job):
+            for test in range(1, tests_per_sensor + 1):
+                reading_0 = rng.uniform(0.2, 0.5)
+                reading_90 = rng.uniform(2.0, 3.0)
+                reading_120 = reading_90 * rng.uniform(1.0, 1.2)
+                rows.append({'Job #': job, 'Serial Number': f'SN{job_idx:02d}{sensor:04d}', 'Test #': test,
+                             'Channel': f'CH{sensor % 4}', '0': reading_0, '90': reading_90, '120': reading_120})
+    df = pd.DataFrame(rows)
+    df.loc[3, '120'] = 0.9  # Fails low
+    df.loc[7, '120'] = 5.5  # Fails high
+    df.loc[10, '120'] = np.nan  # Missing reading
+    return df
+
+
+@pytest.fixture
+def readings():
+    return make_readings()
@@ -0,0 +1,140 @@
+"""Precomputed summary artifact for the browser dashboards.
+
+A small SQLite file (sensor_summary.db) holding per-job and per-prefix status
+counts, pass/fail rates and 120s reading histograms for every threshold set,
+so Fail Rate Analysis and Database Viewer can open it with sql.js instead of
+re-parsing every raw reading. Each job row carries a signature of the job's
+readings; updates re-analyze only jobs whose signature changed and drop jobs
+that are gone. Kept free of Streamlit so jobs can be summarized in worker
+processes.
+"""
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import analysis
+from reports import job_prefix
+
+# ==================== CONFIGURATION ====================
+SUMMARY_FILE_NAME = 'sensor_summary.db'
+SUMMARY_SCHEMA_VERSION = 1
+HISTOGRAM_EDGES = np.round(np.linspace(0.0, 6.0, 61), 2)  # 120s reading bins (V); outliers go to the end bins
+STATUS_CODES = ['PASS', 'OT-', 'TT', 'OT+', 'FL', 'FH', 'DM']
+SIGNATURE_COLUMNS = ['Job #', 'Serial Number', 'Test #', '0', '90', '120']  # Readings the analysis depends on
+
+COUNT_COLUMNS = ['Readings', 'Sensors', 'Passed', 'Failed', *STATUS_CODES]
+JOB_COLUMNS = ['Job #', 'Prefix', 'Threshold Set', 'Signature', *COUNT_COLUMNS, 'Pass Rate', 'Fail Rate',
+               '120s Histogram']
+PREFIX_COLUMNS = ['Prefix', 'Threshold Set', 'Jobs', *COUNT_COLUMNS, 'Pass Rate', 'Fail Rate', '120s Histogram']
+
+COLUMN_TYPES = {'Job #': 'TEXT', 'Prefix': 'TEXT', 'Threshold Set': 'TEXT', 'Signature': 'TEXT',
+                'Pass Rate': 'REAL', 'Fail Rate': 'REAL', '120s Histogram': 'TEXT'}  # Counts are INTEGER
+
+def _table_schema(table, columns, key):
+    column_defs = ', '.join(f'"{col}" {COLUMN_TYPES.get(col, "INTEGER")}' for col in columns)
+    key_list = ', '.join(f'"{col}"' for col in key)
+    return f'CREATE TABLE IF NOT EXISTS {table} ({column_defs}, PRIMARY KEY ({key_list}))'
+
+SCHEMA = [
+    _table_schema('summary_jobs', JOB_COLUMNS, ['Job #', 'Threshold Set']),
+    _table_schema('summary_prefixes', PREFIX_COLUMNS, ['Prefix', 'Threshold Set']),
+    'CREATE TABLE IF NOT EXISTS summary_meta ("Key" TEXT PRIMARY KEY, "Value" TEXT)',
+]
+
+# ==================== JOB SUMMARIES ====================
+def job_signatures(df):
+    """{job: hex digest of the job's readings}; changes whenever any reading of the job does."""
+    columns = [col for col in SIGNATURE_COLUMNS if col in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return {job: hashlib.sha1(row_hashes[positions].tobytes()).hexdigest()[:16]
+            for job, positions in df.groupby('Job #', sort=False).indices.items()}
+
+def reading_histogram(readings):
+    """Counts of 120s readings per HISTOGRAM_EDGES bin, clipping outliers into the end bins."""
+    values = pd.to_numeric(readings, errors='coerce').dropna().to_numpy()
+    clipped = np.clip(values, HISTOGRAM_EDGES[0], HISTOGRAM_EDGES[-1])
+    return np.histogram(clipped, bins=HISTOGRAM_EDGES)[0]
+
+def _rates(passed, failed):
+    counted = passed + failed
+    return (passed / counted * 100 if counted else 0.0), (failed / counted * 100 if counted else 0.0)
+
+def summarize_job(job_data, job, signature):
+    """summary_jobs rows of one job, one per threshold set."""
+    histogram = json.dumps(reading_histogram(job_data['120']).tolist())
+    rows = []
+    for threshold_set in analysis.THRESHOLDS:
+        summary = analysis.analyze_job_rows(job_data, threshold_set)
+        counts = summary['status_counts']
+        rows.append((job, job_prefix(job), threshold_set, signature, len(job_data), summary['total_sensors'],
+                     summary['passed_sensors'], summary['failed_sensors'], *(counts[code] for code in STATUS_CODES),
+                     summary['pass_rate'], summary['fail_rate'], histogram))
+    return rows
+
+def prefix_rows(jobs):
+    """summary_prefixes rows aggregated from a summary_jobs frame."""
+    rows = []
+    for (prefix, threshold_set), group in jobs.groupby(['Prefix', 'Threshold Set'], sort=False):
+        counts = group[COUNT_COLUMNS].sum()
+        histogram = np.sum([json.loads(h) for h in group['120s Histogram']], axis=0)
+        rows.append((prefix, threshold_set, len(group), *(int(counts[col]) for col in COUNT_COLUMNS),
+                     *_rates(counts['Passed'], counts['Failed']), json.dumps(histogram.tolist())))
+    return rows
+
+# ==================== ARTIFACT ====================
+def connect(path):
+    """Connection in autocommit mode with the summary tables created."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    return conn
+
+def plan_update(path, signatures):
+    """(jobs to summarize, jobs to remove) to bring the artifact at path up to date."""
+    conn = connect(path)
+    try:
+        stored = dict(conn.execute(
+            'SELECT "Job #", MIN("Signature") FROM summary_jobs GROUP BY "Job #" '
+            'HAVING COUNT(*) = ? AND COUNT(DISTINCT "Signature") = 1', [len(analysis.THRESHOLDS)]).fetchall())
+        stored_jobs = {job for (job,) in conn.execute('SELECT DISTINCT "Job #" FROM summary_jobs')}
+    finally:
+        conn.close()
+    changed = [job for job, signature in signatures.items() if stored.get(job) != signature]
+    removed = sorted(stored_jobs - set(signatures))
+    return changed, removed
+
+def write_update(path, job_rows, removed, watermark, source):
+    """Replace the changed jobs' rows, drop removed jobs and rebuild prefix totals, in one transaction."""
+    changed = sorted({row[0] for row in job_rows})
+    conn = connect(path)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('DELETE FROM summary_jobs WHERE "Job #" = ?', [(job,) for job in changed + removed])
+            conn.executemany(f'INSERT INTO summary_jobs VALUES ({", ".join("?" * len(JOB_COLUMNS))})', job_rows)
+            jobs = pd.read_sql_query('SELECT * FROM summary_jobs', conn)
+            conn.execute('DELETE FROM summary_prefixes')
+            conn.executemany(f'INSERT INTO summary_prefixes VALUES ({", ".join("?" * len(PREFIX_COLUMNS))})',
+                             prefix_rows(jobs))
+            meta = {
+                'schema_version': SUMMARY_SCHEMA_VERSION,
+                'generated_at': datetime.now().isoformat(timespec='seconds'),
+                'watermark': watermark,
+                'source': source,
+                'histogram_edges': json.dumps(HISTOGRAM_EDGES.tolist()),
+                'status_codes': json.dumps(STATUS_CODES),
+                'thresholds': json.dumps(analysis.THRESHOLDS),
+            }
+            conn.executemany('INSERT OR REPLACE INTO summary_meta VALUES (?, ?)',
+                             [(key, str(value)) for key, value in meta.items()])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.close()
+    return {'updated': len(changed), 'removed': len(removed), 'jobs': int(jobs['Job #'].nunique())}
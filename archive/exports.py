@@ -0,0 +1,179 @@
+"""Chunked data exports for the Sensor Analysis Dashboard.
+
+Exports are written chunk by chunk into a temporary file, so memory is bounded
+by the chunk size instead of the export size. Sources are generators of
+DataFrame chunks (analysis results or raw readings); writers consume them for
+CSV and, when their optional packages are installed, Parquet and Arrow IPC
+(pyarrow) and Excel (openpyxl). Kept free of Streamlit so exports can be
+built when a deferred download is requested, outside the script run.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import analysis
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet and Arrow IPC are offered only with pyarrow installed
+    pa = pq = None
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # Excel is offered only with openpyxl installed
+    Workbook = None
+
+# ==================== CONFIGURATION ====================
+EXPORT_CHUNK_ROWS = 50_000  # Rows per chunk for raw readings and analysis results
+EXCEL_MAX_ROWS = 1_048_575  # Excel's sheet limit, less the header row
+
+EXPORT_FORMATS = {
+    'CSV': {'extension': 'csv', 'mime': 'text/csv', 'requires': None},
+    'Parquet': {'extension': 'parquet', 'mime': 'application/vnd.apache.parquet', 'requires': 'pyarrow'},
+    'Arrow IPC': {'extension': 'arrow', 'mime': 'application/vnd.apache.arrow.file', 'requires': 'pyarrow'},
+    'Excel': {'extension': 'xlsx',
+              'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+              'requires': 'openpyxl', 'max_rows': EXCEL_MAX_ROWS},
+}
+
+def available_formats():
+    """Export formats whose writer packages are installed, in menu order."""
+    installed = {'pyarrow': pa is not None, 'openpyxl': Workbook is not None}
+    return [name for name, spec in EXPORT_FORMATS.items()
+            if spec['requires'] is None or installed[spec['requires']]]
+
+def missing_formats():
+    """{format: package to install} for formats that are unavailable."""
+    return {name: EXPORT_FORMATS[name]['requires'] for name in EXPORT_FORMATS
+            if name not in available_formats()}
+
+# ==================== SOURCES ====================
+def frame_chunks(frame, chunk_rows=EXPORT_CHUNK_ROWS):
+    """An in-memory frame as row slices."""
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+def raw_reading_count(df, jobs):
+    """Rows raw_reading_chunks() yields."""
+    return int(df['Job #'].isin(jobs).sum())
+
+def raw_reading_chunks(df, jobs, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Raw reading rows of the given jobs, without copying the whole selection."""
+    positions = np.flatnonzero(df['Job #'].isin(jobs).to_numpy())
+    for start in range(0, len(positions), chunk_rows):
+        yield df.take(positions[start:start + chunk_rows])
+
+def result_dtypes(max_tests):
+    """determine_pass_fail() columns and their types for sensors with up to max_tests tests."""
+    dtypes = {'Serial Number': 'string', 'Channel': 'string', 'Pass/Fail': 'string', '120s(St.Dev.)': 'float64'}
+    for test in range(1, max_tests + 1):
+        dtypes.update({f'0s(T{test})': 'float64', f'90s(T{test})': 'float64', f'120s(T{test})': 'float64',
+                       f'%Chg(T{test})': 'string', f'Status(T{test})': 'string'})
+    return dtypes
+
+def job_result_count(df, jobs):
+    """Rows job_result_chunks() yields: each job's sensors with at least one 120s reading."""
+    rows = df[df['Job #'].isin(jobs) & df['120'].notna()]
+    return int(rows.groupby('Job #')['Serial Number'].nunique().sum())
+
+def job_result_chunks(df, jobs, threshold_set):
+    """Pass/fail results of each job in turn, one chunk per job, with a leading Job # column.
+
+    Every chunk has the same columns and types (sized for the most-tested
+    sensor), so the chunks can be appended to a single CSV, Parquet or Excel sheet.
+    """
+    rows = df['Job #'].isin(jobs)
+    if not rows.any():
+        return
+    max_tests = int(df.loc[rows].groupby(['Job #', 'Serial Number']).size().max())
+    dtypes = {'Job #': 'string', **result_dtypes(max_tests)}
+    for job in jobs:
+        job_data = df[df['Job #'] == job]
+        if len(job_data) == 0:
+            continue
+        results = analysis.analyze_job_rows(job_data, threshold_set)['results']
+        yield results.assign(**{'Job #': job}).reindex(columns=list(dtypes)).astype(dtypes)
+
+# ==================== WRITERS ====================
+def _write_csv(chunks, sink):
+    header = True
+    for chunk in chunks:
+        sink.write(chunk.to_csv(index=False, header=header).encode('utf-8'))
+        header = False
+
+def _arrow_table(chunk, schema=None):
+    """Chunk as an Arrow table; text columns are typed as strings even when a chunk has only NaN."""
+    text_columns = {col: 'string' for col in chunk.columns
+                    if chunk[col].dtype == object or pd.api.types.is_string_dtype(chunk[col])}
+    return pa.Table.from_pandas(chunk.astype(text_columns), schema=schema, preserve_index=False)
+
+def _write_parquet(chunks, sink):
+    writer = schema = None
+    try:
+        for chunk in chunks:
+            table = _arrow_table(chunk, schema)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(sink, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def _write_arrow(chunks, sink):
+    writer = schema = None
+    try:
+        for chunk in chunks:
+            table = _arrow_table(chunk, schema)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_file(sink, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def _write_excel(chunks, sink):
+    # Write-only mode streams rows to the workbook's temporary files
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Export')
+    written = 0
+    for chunk in chunks:
+        if written == 0:
+            sheet.append([str(col) for col in chunk.columns])
+        written += len(chunk)
+        if written > EXCEL_MAX_ROWS:  # Row count not given to write_export()
+            raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} rows; use CSV or Parquet")
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(sink)
+
+WRITERS = {'CSV': _write_csv, 'Parquet': _write_parquet, 'Arrow IPC': _write_arrow, 'Excel': _write_excel}
+
+def write_export(chunks, export_format, rows=None):
+    """Write chunks in the given format to a temporary file, returned as a read-only file at its start.
+
+    rows, if given, is how many rows the chunks hold; exports too large for the
+    format are then refused before anything is written. The file is removed
+    when it is closed.
+    """
+    spec = EXPORT_FORMATS[export_format]
+    if export_format not in available_formats():
+        raise ValueError(f"{export_format} export needs {spec['requires']} installed")
+    if rows is not None and rows > spec.get('max_rows', rows):
+        raise ValueError(f"{export_format} sheets hold at most {spec['max_rows']:,} rows, this export has "
+                         f"{rows:,}; use CSV or Parquet")
+    sink = tempfile.TemporaryFile(prefix='sensor_export_')
+    try:
+        WRITERS[export_format](chunks, sink)
+        sink.flush()
+        # A read-only handle on the same file (st.download_button takes io.BufferedReader, not the writable sink)
+        export_file = open(os.dup(sink.fileno()), 'rb')
+    finally:
+        sink.close()
+    export_file.seek(0)
+    return export_file
@@ -0,0 +1,718 @@
+"""Matplotlib figure builders for the Sensor Analysis Dashboard.
+
+Kept free of Streamlit so app.py can render figures in a pool of headless
+worker processes (render_png) and get PNG bytes back. Builders take plain
+data and a dark flag instead of reading session or theme state.
+"""
+import io
+import threading
+import warnings
+from collections import OrderedDict
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import matplotlib.patches as mpatches
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+import numpy as np
+import pandas as pd
+
+# ==================== CONFIGURATION ====================
+TIME_POINTS = ['0', '5', '15', '30', '60', '90', '120']  # Reading columns, as in app.py
+PLOT_FIGURE_SIZE = (15, 6)  # Width, Height in inches
+PLOT_VOLTAGE_LIMITS = (0, 5)  # Min, Max voltage for plots
+SENSOR_GRID_COLUMNS = 4  # Small-multiples per row in the sensor drilldown
+BAND_QUANTILES = {'p5': 0.05, 'p25': 0.25, 'p75': 0.75, 'p95': 0.95}  # Trend plot percentile bands
+BAND_SAMPLE_SIZE = 200_000  # Rows sampled per time point for approximate bands
+OVERLAY_MAX_CURVES = 300  # Raw curves drawn individually over the trend bands
+OVERLAY_STRATIFIED_CURVES = 120  # Of those, curves sampled across statuses
+OVERLAY_DENSITY_BINS = (125, 100)  # Time (1s) x voltage bins of the density raster
+OVERLAY_DENSITY_MAX_ROWS = 50_000  # Rows rasterized into the density image (a sample beyond this)
+OVERLAY_DENSITY_CHUNK_ROWS = 10_000  # Rows interpolated per step while rasterizing
+FAILED_STATUSES = ('FL', 'FH')
+
+# ==================== SUMMARY STATISTICS ====================
+def compute_band_summary(job_data, approximate=False, sample_size=BAND_SAMPLE_SIZE, seed=0):
+    """Mean, std and percentile bands for every time point in one vectorized pass.
+    
+    With approximate=True the percentiles come from a fixed-seed random sample of
+    sample_size rows (mean and std stay exact), for very large prefix jobs.
+    Returns one row per time point that has readings.
+    """
+    columns = [tp for tp in TIME_POINTS if tp in job_data.columns]
+    if not columns or len(job_data) == 0:
+        return pd.DataFrame(columns=['time', 'mean', 'std', *BAND_QUANTILES, 'approximate'])
+    
+    readings = job_data[columns].astype(float)
+    values = readings.to_numpy()
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    
+    sample = readings
+    sampled = approximate and len(values) > sample_size
+    if sampled:
+        rows = np.random.default_rng(seed).choice(len(values), size=sample_size, replace=False)
+        sample = readings.take(rows)
+    
+    with warnings.catch_warnings():
+        # All-NaN columns are dropped below; silence their empty-slice warnings
+        warnings.simplefilter('ignore', RuntimeWarning)
+        means = np.nanmean(values, axis=0)
+        stds = np.nanstd(values, axis=0, ddof=1)
+    # One multi-quantile call over every column; NaNs are skipped per column
+    quantiles = sample.quantile(list(BAND_QUANTILES.values())).to_numpy()
+    
+    summary = pd.DataFrame({
+        'time': [float(tp) for tp in columns],
+        'mean': means,
+        'std': stds,
+        **{name: quantiles[i] for i, name in enumerate(BAND_QUANTILES)},
+        'approximate': sampled
+    })
+    return summary[counts > 0].reset_index(drop=True)
+
+# ==================== CURVE OVERLAY ====================
+def select_overlay_curves(values, statuses, max_curves=OVERLAY_MAX_CURVES,
+                          stratified=OVERLAY_STRATIFIED_CURVES, seed=0):
+    """Row positions of a representative subset of raw curves, at most max_curves.
+    
+    Takes the rows holding the lowest and highest reading at each time point,
+    every failed sensor's rows (sampled if they alone exceed the budget), and a
+    fixed-seed sample of `stratified` rows spread across statuses in proportion
+    to their counts, with at least one row per status.
+    """
+    rng = np.random.default_rng(seed)
+    codes, labels = pd.factorize(statuses, use_na_sentinel=False)
+    present = ~np.isnan(values)
+    available = present.sum(axis=1) >= 2  # Rows with at least one drawable segment
+    
+    # Extreme members at each time point
+    columns = np.flatnonzero(present.any(axis=0))
+    lowest = np.argmin(np.where(present, values, np.inf)[:, columns], axis=0)
+    highest = np.argmax(np.where(present, values, -np.inf)[:, columns], axis=0)
+    extremes = np.unique(np.concatenate([lowest, highest]))
+    available[extremes] = False
+    
+    failed_codes = [code for code, label in enumerate(labels) if label in FAILED_STATUSES]
+    failed = np.flatnonzero(available & np.isin(codes, failed_codes))
+    failed_budget = max(0, max_curves - len(extremes) - stratified)
+    if len(failed) > failed_budget:
+        failed = np.sort(rng.choice(failed, size=failed_budget, replace=False))
+    available[failed] = False
+    
+    # Proportional allocation across statuses from the rows not already chosen
+    pool = np.flatnonzero(available)
+    budget = min(stratified, max_curves - len(extremes) - len(failed), len(pool))
+    sampled = []
+    if budget > 0:
+        pool_codes = codes[pool]
+        counts = np.bincount(pool_codes, minlength=len(labels))
+        quotas = np.maximum(1, np.floor(counts / counts.sum() * budget)).astype(int)
+        for code in np.flatnonzero(counts):
+            members = pool[pool_codes == code]
+            sampled.append(rng.choice(members, size=min(quotas[code], counts[code]), replace=False))
+    
+    chosen = np.concatenate([extremes, failed, *sampled]).astype(np.int64)
+    return np.unique(chosen)[:max_curves]
+
+def rasterize_curve_density(values, times, bins=OVERLAY_DENSITY_BINS,
+                            voltage_limits=PLOT_VOLTAGE_LIMITS, max_rows=OVERLAY_DENSITY_MAX_ROWS,
+                            chunk_rows=OVERLAY_DENSITY_CHUNK_ROWS, seed=0):
+    """2D histogram (time x voltage) of piecewise-linear curves through the readings.
+    
+    Each curve is interpolated at every time-bin centre, so the cost grows with
+    rows x time bins; jobs above max_rows are rasterized from a fixed-seed sample.
+    """
+    x_bins, y_bins = bins
+    if len(values) > max_rows:
+        rows = np.random.default_rng(seed).choice(len(values), size=max_rows, replace=False)
+        values = values[rows]
+    
+    x_edges = np.linspace(times[0], times[-1], x_bins + 1)
+    x_centres = (x_edges[:-1] + x_edges[1:]) / 2
+    segment = np.clip(np.searchsorted(times, x_centres, side='right') - 1, 0, len(times) - 2)
+    weight = (x_centres - times[segment]) / (times[segment + 1] - times[segment])
+    
+    y_min, y_max = voltage_limits
+    density = np.zeros(x_bins * y_bins, dtype=np.int64)
+    x_index = np.arange(x_bins) * y_bins
+    for start in range(0, len(values), chunk_rows):
+        chunk = values[start:start + chunk_rows]
+        curves = chunk[:, segment] * (1 - weight) + chunk[:, segment + 1] * weight
+        y_index = np.floor((curves - y_min) / (y_max - y_min) * y_bins)
+        valid = (y_index >= 0) & (y_index < y_bins)
+        flat = (x_index[None, :] + np.where(valid, y_index, 0).astype(np.int64))[valid]
+        density += np.bincount(flat, minlength=x_bins * y_bins)
+    
+    return density.reshape(x_bins, y_bins), (x_edges[0], x_edges[-1], y_min, y_max)
+
+def draw_curve_overlay(ax, job_data, status_colors, dark=False):
+    """Density of every curve plus the representative subset as lines; returns (legend handles, curves drawn)."""
+    columns = [tp for tp in TIME_POINTS if tp in job_data.columns]
+    if len(columns) < 2 or 'Pass/Fail' not in job_data.columns:
+        return [], 0
+    times = np.array([float(tp) for tp in columns])
+    values = job_data[columns].to_numpy(dtype=float)
+    statuses = job_data['Pass/Fail'].to_numpy(dtype=object)
+    
+    density, extent = rasterize_curve_density(values, times)
+    ax.imshow(np.ma.masked_equal(np.log1p(density.T), 0), origin='lower', extent=extent,
+              aspect='auto', cmap='magma' if dark else 'Greys', alpha=0.6,
+              interpolation='nearest', zorder=0)
+    
+    chosen = select_overlay_curves(values, statuses)
+    chosen_statuses = statuses[chosen]
+    segments = [np.column_stack([times, row]) for row in values[chosen]]
+    colors = [status_colors.get(status, '#888888') for status in chosen_statuses]
+    failed = np.isin(chosen_statuses, FAILED_STATUSES)
+    ax.add_collection(LineCollection(
+        segments, colors=colors, linewidths=np.where(failed, 1.0, 0.6),
+        alpha=0.5, zorder=3
+    ))
+    
+    handles = [Line2D([], [], color=status_colors.get(status, '#888888'), linewidth=1.2,
+                      label=f'{status} curves')
+               for status in sorted(set(chosen_statuses))]
+    return handles, len(chosen)
+
+# ==================== RENDERING ====================
+def fit_image_width(image, max_width_px):
+    """Downsize a PNG once to the width Streamlit would otherwise resize it to on every display."""
+    from PIL import Image
+    
+    pil_image = Image.open(io.BytesIO(image))
+    width, height = pil_image.size
+    if width <= max_width_px:
+        return image
+    resized = pil_image.resize((max_width_px, int(height * max_width_px / width)),
+                               resample=Image.BILINEAR)
+    buffer = io.BytesIO()
+    resized.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def warm_up():
+    """Render pool initializer; importing this module loads matplotlib, so there is nothing more to do."""
+    return None
+
+def render_png(build_figure, kwargs, max_width_px, max_dpi):
+    """Build a figure and return it as PNG bytes (None if there was nothing to draw).
+    
+    Runs in render pool workers, or in-process when the pool is unavailable.
+    """
+    fig = build_figure(**kwargs)
+    if fig is None:
+        return None
+    try:
+        buffer = io.BytesIO()
+        # Rasterize no wider than the display width rather than downsizing afterwards
+        dpi = min(max_dpi, max_width_px / fig.get_figwidth())
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return fit_image_width(buffer.getvalue(), max_width_px)
+
+# ==================== RENDERED FIGURE CACHE ====================
+def figure_key(kind, theme, key):
+    """Cache key of a rendered figure: its kind, the theme it was drawn for, then what it depends on."""
+    return (kind, theme, *key)
+
+class FigureCache:
+    """Size-bounded LRU of rendered figure images, shared by every session."""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        """Cached image bytes for key, or None."""
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+            return image
+    
+    def put(self, key, image):
+        """Store image bytes, evicting least recently used images beyond the size budget."""
+        if len(image) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self.entries[key] = image
+            self.total_bytes += len(image)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+# ==================== FIGURE BUILDERS ====================
+def create_enhanced_plot(job_data, thresholds, dark=False, band_summary=None, status_colors=None):
+    """Generate enhanced visualization for a job's rows with dark mode compatibility.
+    
+    band_summary is compute_band_summary() output; it is computed here if not given.
+    When status_colors is given, job_data carries every reading column plus a
+    per-row Pass/Fail column, and raw curves are overlaid on the bands.
+    """
+    if len(job_data) == 0:
+        return None
+    
+    matched_jobs = sorted(job_data['Job #'].unique())
+    
+    # Aggregate data
+    df_plot = band_summary if band_summary is not None else compute_band_summary(job_data)
+    if len(df_plot) == 0:
+        return None
+    band_note = ' (sampled)' if df_plot['approximate'].any() else ''
+    
+    # Set style for better visibility
+    plt.style.use('dark_background' if dark else 'default')
+    
+    # Create figure with subplots using context manager
+    fig = plt.figure(figsize=PLOT_FIGURE_SIZE, facecolor='#1a1a1a' if dark else 'white')
+    ax1, ax2 = fig.subplots(1, 2)
+    
+    # Set background colors based on theme
+    for ax in [ax1, ax2]:
+        ax.set_facecolor('#2d2d2d' if dark else '#f8f9fa')
+    
+    # Raw curve overlay: density of all curves, representative subset as lines
+    overlay_handles, overlay_curves = [], 0
+    if status_colors is not None:
+        overlay_handles, overlay_curves = draw_curve_overlay(ax1, job_data, status_colors, dark)
+    
+    # Main trend plot (left) with vibrant colors
+    ax1.fill_between(df_plot['time'], df_plot['p5'], df_plot['p95'],
+                     alpha=0.2, color='#7c8bff', label=f'5th-95th Percentile{band_note}')
+    ax1.fill_between(df_plot['time'], df_plot['p25'], df_plot['p75'],
+                     alpha=0.3, color='#9b67d6', label=f'25th-75th Percentile{band_note}')
+    ax1.fill_between(df_plot['time'], df_plot['mean'] - df_plot['std'],
+                     df_plot['mean'] + df_plot['std'],
+                     alpha=0.4, color='#667eea', label='±1 Std Dev')
+    
+    # Mean line with markers
+    ax1.plot(df_plot['time'], df_plot['mean'], 'o-', color='#00ff88', 
+             linewidth=3, markersize=8, label='Mean', zorder=10,
+             markeredgecolor='white', markeredgewidth=1)
+    
+    # Add threshold lines
+    ax1.axhline(y=thresholds['min_120s'], color='#ff4444', linestyle='--', 
+                alpha=0.7, linewidth=2, label=f'Min Threshold ({thresholds["min_120s"]}V)')
+    ax1.axhline(y=thresholds['max_120s'], color='#ff4444', linestyle='--', 
+                alpha=0.7, linewidth=2, label=f'Max Threshold ({thresholds["max_120s"]}V)')
+    
+    # Formatting
+    title = 'Sensor Readings Over Time'
+    if overlay_curves:
+        title += f'\n{overlay_curves:,} of {len(job_data):,} curves drawn over the density of all'
+    ax1.set_title(title, fontsize=14, fontweight='bold', pad=20, 
+                  color='white' if dark else 'black')
+    ax1.set_xlabel('Time (seconds)', fontsize=12)
+    ax1.set_ylabel('Voltage (V)', fontsize=12)
+    ax1.set_ylim(PLOT_VOLTAGE_LIMITS)
+    ax1.set_xlim(-5, 125)
+    ax1.grid(True, alpha=0.3, linestyle='--', color='#4a4a4a' if dark else '#cccccc')
+    handles, _ = ax1.get_legend_handles_labels()
+    ax1.legend(handles=handles + overlay_handles, loc='best', framealpha=0.9,
+               facecolor='#2d2d2d' if dark else 'white', fontsize=9 if overlay_handles else None)
+    
+    # Box plot for 120s readings (right)
+    if '120' in job_data.columns:
+        readings_120 = job_data['120'].dropna()
+        bp = ax2.boxplot([readings_120], vert=True, patch_artist=True,
+                         widths=0.6, showmeans=True, meanline=True)
+        
+        # Style the boxplot with vibrant colors
+        for patch in bp['boxes']:
+            patch.set_facecolor('#7c8bff')
+            patch.set_alpha(0.8)
+            patch.set_edgecolor('white')
+            patch.set_linewidth(1.5)
+        
+        # Style whiskers and caps
+        for item in ['whiskers', 'caps']:
+            plt.setp(bp[item], color='white', linewidth=1.5)
+        
+        # Style medians
+        plt.setp(bp['medians'], color='#00ff88', linewidth=2)
+        
+        # Add threshold regions
+        ax2.axhspan(0, thresholds['min_120s'], alpha=0.2, color='#ff4444', label='Fail Low')
+        ax2.axhspan(thresholds['max_120s'], 5, alpha=0.2, color='#ff4444', label='Fail High')
+        ax2.axhspan(thresholds['min_120s'], thresholds['max_120s'], alpha=0.2, 
+                   color='#00ff88', label='Pass Range')
+        
+        ax2.set_title('120s Reading Distribution', fontsize=14, fontweight='bold', pad=20,
+                     color='white' if dark else 'black')
+        ax2.set_ylabel('Voltage (V)', fontsize=12)
+        ax2.set_ylim(PLOT_VOLTAGE_LIMITS)
+        ax2.set_xticklabels(['120s'])
+        ax2.grid(True, alpha=0.3, axis='y', linestyle='--', 
+                color='#4a4a4a' if dark else '#cccccc')
+        ax2.legend(loc='upper right', framealpha=0.9, 
+                  facecolor='#2d2d2d' if dark else 'white')
+    
+    plt.suptitle(f'Job {matched_jobs[0].split(".")[0]} Analysis', 
+                fontsize=16, fontweight='bold', y=1.02,
+                color='white' if dark else 'black')
+    plt.tight_layout()
+    
+    return fig
+
+def create_sensor_grid_plot(sensors, sensor_tests, thresholds, status_colors, dark=False):
+    """Small-multiples of several sensors' test curves in one figure with shared axes.
+    
+    sensors is a slice of the results frame; sensor_tests maps serial -> that sensor's test rows.
+    """
+    text_color = 'white' if dark else 'black'
+    numeric_points = np.array([float(tp) for tp in TIME_POINTS])
+    colors = ['#667eea', '#764ba2', '#f59e0b', '#10b981', '#ef4444']
+    
+    ncols = min(SENSOR_GRID_COLUMNS, len(sensors))
+    nrows = -(-len(sensors) // ncols)
+    row_height = 3 if ncols > 2 else 4
+    fig, axes = plt.subplots(nrows, ncols, figsize=(16, row_height * nrows), sharex=True, sharey=True,
+                             squeeze=False, facecolor='#1a1a1a' if dark else 'white')
+    
+    max_tests = 0
+    for ax, (_, sensor_row) in zip(axes.flat, sensors.iterrows()):
+        serial = sensor_row['Serial Number']
+        status = sensor_row['Pass/Fail']
+        ax.set_facecolor('#2d2d2d' if dark else '#f8f9fa')
+        
+        readings = sensor_tests[serial].reindex(columns=TIME_POINTS).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        max_tests = max(max_tests, len(readings))
+        for test_idx, test_readings in enumerate(readings):
+            present = ~np.isnan(test_readings)
+            ax.plot(numeric_points[present], test_readings[present], 'o-', color=colors[test_idx % len(colors)],
+                    linewidth=1.5, markersize=3)
+        
+        ax.axhline(y=thresholds['min_120s'], color='#ff4444', linestyle='--', alpha=0.7, linewidth=1)
+        ax.axhline(y=thresholds['max_120s'], color='#ff4444', linestyle='--', alpha=0.7, linewidth=1)
+        ax.set_title(f"{serial} · {status}", fontsize=10, fontweight='bold', color=status_colors.get(status, status_colors['DM']))
+        ax.grid(True, alpha=0.3, linestyle='--', color='#4a4a4a' if dark else '#cccccc')
+        ax.tick_params(colors=text_color, labelsize=8)
+    
+    for ax in axes.flat[len(sensors):]:
+        ax.set_visible(False)
+    
+    axes[0][0].set_ylim(PLOT_VOLTAGE_LIMITS)
+    for ax in axes[:, 0]:
+        ax.set_ylabel('Voltage (V)', fontsize=9, color=text_color)
+    for col in range(ncols):
+        # Lowest visible plot in each column carries the x axis labels
+        bottom_ax = axes[(len(sensors) - 1 - col) // ncols, col]
+        bottom_ax.xaxis.set_tick_params(labelbottom=True)
+        bottom_ax.set_xlabel('Time (s)', fontsize=9, color=text_color)
+    
+    # One shared legend for test colors and thresholds
+    handles = [plt.Line2D([], [], color=colors[i % len(colors)], marker='o', markersize=3, label=f'Test {i + 1}')
+               for i in range(max_tests)]
+    handles.append(plt.Line2D([], [], color='#ff4444', linestyle='--',
+                              label=f"Thresholds ({thresholds['min_120s']}-{thresholds['max_120s']}V)"))
+    fig.legend(handles=handles, loc='upper center', ncol=len(handles), fontsize=9, frameon=False,
+               labelcolor=text_color, bbox_to_anchor=(0.5, 1.0))
+    fig.tight_layout(rect=(0, 0, 1, 1 - 0.35 / (row_height * nrows)))
+    return fig
+
+def create_status_by_test_plot(results_df, status_counts, status_colors, dark=False):
+    """Stacked bar chart of status counts per test (or overall counts for single-test jobs)."""
+    fig = plt.figure(figsize=(8, 6))
+    ax = fig.add_subplot(111)
+    
+    fig.patch.set_facecolor('#1a1a1a' if dark else 'white')
+    ax.set_facecolor('#2d2d2d' if dark else '#f8f9fa')
+    text_color = 'white' if dark else 'black'
+    
+    # Find test columns (Status(T1), Status(T2), etc.)
+    test_cols = [col for col in results_df.columns if col.startswith('Status(T') and col.endswith(')')]
+    
+    if test_cols:
+        # Count statuses per test
+        test_data = {}
+        status_order = ['PASS', 'OT-', 'TT', 'OT+', 'FL', 'FH', 'DM']
+        
+        for test_col in sorted(test_cols):
+            test_name = test_col.replace('Status(', '').replace(')', '')
+            counts = results_df[test_col].value_counts()
+            test_data[test_name] = {status: counts.get(status, 0) for status in status_order}
+        
+        # Create stacked bar chart
+        tests = list(test_data.keys())
+        x = np.arange(len(tests))
+        bar_width = 0.6
+        
+        bottom = np.zeros(len(tests))
+        
+        for status in status_order:
+            values = [test_data[t].get(status, 0) for t in tests]
+            if sum(values) > 0:  # Only plot if there are values
+                color = status_colors.get(status, status_colors['DM'])
+                ax.bar(x, values, bar_width, label=status, bottom=bottom, color=color)
+                bottom += np.array(values)
+        
+        ax.set_xlabel('Test', fontsize=11, color=text_color)
+        ax.set_ylabel('Count', fontsize=11, color=text_color)
+        ax.set_title('Status by Test', fontsize=14, fontweight='bold', color=text_color)
+        ax.set_xticks(x)
+        ax.set_xticklabels(tests, color=text_color)
+        ax.tick_params(colors=text_color)
+        ax.legend(loc='upper right', fontsize=8)
+    else:
+        # Fallback: single test - show simple bar chart
+        statuses = list(status_counts.keys())
+        counts = list(status_counts.values())
+        colors = [status_colors.get(s, status_colors['DM']) for s in statuses]
+        
+        # Filter to non-zero
+        non_zero = [(s, c, col) for s, c, col in zip(statuses, counts, colors) if c > 0]
+        if not non_zero:
+            plt.close(fig)
+            return None
+        statuses, counts, colors = zip(*non_zero)
+        
+        x = np.arange(len(statuses))
+        ax.bar(x, counts, color=colors)
+        ax.set_xlabel('Status', fontsize=11, color=text_color)
+        ax.set_ylabel('Count', fontsize=11, color=text_color)
+        ax.set_title('Status Distribution', fontsize=14, fontweight='bold', color=text_color)
+        ax.set_xticks(x)
+        ax.set_xticklabels(statuses, color=text_color)
+        ax.tick_params(colors=text_color)
+    
+    for spine in ax.spines.values():
+        spine.set_color(text_color)
+    
+    plt.tight_layout()
+    return fig
+
+def create_status_distribution_plot(status_counts, total_sensors, status_colors, dark=False):
+    """Pie chart of overall status counts with a percentage legend."""
+    plot_labels = []
+    plot_sizes = []
+    plot_colors = []
+    
+    for status, count in status_counts.items():
+        if count > 0:
+            pct = (count / total_sensors * 100)
+            plot_labels.append(f"{status} ({count}) {pct:.1f}%")
+            plot_sizes.append(count)
+            plot_colors.append(status_colors.get(status, status_colors['DM']))
+    
+    if not plot_sizes:
+        return None
+    
+    fig = plt.figure(figsize=(10, 7))
+    ax = fig.add_subplot(111)
+    
+    fig.patch.set_facecolor('#1a1a1a' if dark else 'white')
+    ax.set_facecolor('#2d2d2d' if dark else '#f8f9fa')
+    
+    explode = [0.05 for _ in plot_sizes]
+    
+    wedges, texts = ax.pie(
+        plot_sizes,
+        colors=plot_colors,
+        startangle=90,
+        explode=explode,
+        textprops={'weight': 'bold'}
+    )
+    
+    # Add legend with all info outside pie
+    ax.legend(plot_labels, loc='center left', bbox_to_anchor=(1, 0, 0.5, 1), 
+             fontsize=10, framealpha=0.95)
+    
+    ax.set_title('Status Distribution', fontsize=16, fontweight='bold', pad=20,
+               color='white' if dark else 'black')
+    
+    plt.tight_layout()
+    return fig
+
+def create_sensor_history_plot(history, thresholds, dark=False):
+    """Plot every test of one sensor across jobs, one curve per job/test."""
+    numeric_points = [float(tp) for tp in TIME_POINTS]
+    colors = plt.cm.viridis(np.linspace(0, 0.9, max(len(history), 1)))
+    
+    fig = plt.figure(figsize=(12, 4))
+    ax = fig.add_subplot(111)
+    fig.patch.set_facecolor('#1a1a1a' if dark else 'white')
+    ax.set_facecolor('#2d2d2d' if dark else '#f8f9fa')
+    
+    for color, (_, test_row) in zip(colors, history.iterrows()):
+        readings = pd.to_numeric(test_row.reindex(TIME_POINTS), errors='coerce').to_numpy(dtype=float)
+        label = f"Job {test_row['Job #']}"
+        if 'Test #' in test_row and pd.notna(test_row['Test #']):
+            label += f" · Test {test_row['Test #']}"
+        ax.plot(numeric_points, readings, 'o-', color=color, linewidth=2, markersize=5, label=label)
+    
+    ax.axhline(y=thresholds['min_120s'], color='#ff4444', linestyle='--', linewidth=1.5, alpha=0.7)
+    ax.axhline(y=thresholds['max_120s'], color='#ff4444', linestyle='--', linewidth=1.5, alpha=0.7)
+    ax.set_xlabel('Time (seconds)')
+    ax.set_ylabel('Voltage (V)')
+    ax.set_ylim(PLOT_VOLTAGE_LIMITS)
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc='lower right', fontsize=8, ncol=2)
+    fig.tight_layout()
+    return fig
+
+def create_status_flowchart():
+    """Generate the status determination logic flowchart."""
+    # Color scheme
+    color_start = '#667eea'
+    color_process = '#4ECDC4'
+    color_decision = '#FFD93D'
+    color_result = '#FF6B6B'
+    color_final = '#95E1D3'
+    
+    def draw_box(ax, x, y, width, height, text, color, fontsize=10, bold=False):
+        """Draw a rounded rectangle with text"""
+        from matplotlib.patches import FancyBboxPatch
+        box = FancyBboxPatch((x, y), width, height, 
+                              boxstyle="round,pad=0.1", 
+                              edgecolor='black', 
+                              facecolor=color, 
+                              linewidth=2)
+        ax.add_patch(box)
+        weight = 'bold' if bold else 'normal'
+        ax.text(x + width/2, y + height/2, text, 
+                ha='center', va='center', 
+                fontsize=fontsize, weight=weight,
+                wrap=True)
+    
+    def draw_arrow(ax, x1, y1, x2, y2):
+        """Draw an arrow between two points"""
+        from matplotlib.patches import FancyArrowPatch
+        arrow = FancyArrowPatch((x1, y1), (x2, y2),
+                               arrowstyle='->', 
+                               mutation_scale=20, 
+                               linewidth=2,
+                               color='black')
+        ax.add_patch(arrow)
+    
+    def draw_label(ax, x, y, text, fontsize=9):
+        """Draw a label at a specific position"""
+        ax.text(x, y, text, fontsize=fontsize, style='italic', 
+                ha='center', va='center',
+                bbox=dict(boxstyle='round,pad=0.3', facecolor='white', edgecolor='none', alpha=0.8))
+    
+    # Create figure
+    fig, ax = plt.subplots(1, 1, figsize=(14, 20))
+    ax.set_xlim(0, 10)
+    ax.set_ylim(-2, 21)
+    ax.axis('off')
+    
+    # Title
+    ax.text(5, 20, 'Sensor Status Determination Logic', 
+            ha='center', fontsize=16, weight='bold')
+    
+    # Start
+    draw_box(ax, 3.5, 18.5, 3, 0.8, 'START\n(Per Serial Number)', color_start, fontsize=11, bold=True)
+    draw_arrow(ax, 5, 18.5, 5, 17.8)
+    
+    # Step 1
+    draw_box(ax, 2.5, 17, 5, 0.7, 'Collect all 120s readings\nfrom all tests', color_process, fontsize=9)
+    draw_arrow(ax, 5, 17, 5, 16.3)
+    
+    # Step 2
+    draw_box(ax, 2.5, 15.5, 5, 0.7, 'Calculate std_dev_120\nacross all tests', color_process, fontsize=9)
+    draw_arrow(ax, 5, 15.5, 5, 14.8)
+    
+    # Step 3
+    draw_box(ax, 2, 14, 6, 0.7, 'FOR EACH TEST (T1, T2, T3...)', color_start, fontsize=10, bold=True)
+    draw_arrow(ax, 5, 14, 5, 13.3)
+    
+    # Check 1
+    draw_box(ax, 2.5, 12.5, 5, 0.7, '120s reading < 1.5V?', color_decision, fontsize=9)
+    draw_arrow(ax, 2.5, 12.85, 1.5, 12.85)
+    draw_label(ax, 2.0, 13.05, 'YES', fontsize=8)
+    draw_box(ax, 0.3, 12.5, 1.1, 0.4, 'Add FL', color_result, fontsize=8)
+    draw_arrow(ax, 5, 12.5, 5, 11.8)
+    draw_label(ax, 5.3, 12.15, 'NO', fontsize=8)
+    
+    # Check 2
+    draw_box(ax, 2.5, 11.0, 5, 0.7, '120s reading > 4.9V?', color_decision, fontsize=9)
+    draw_arrow(ax, 2.5, 11.35, 1.5, 11.35)
+    draw_label(ax, 2.0, 11.55, 'YES', fontsize=8)
+    draw_box(ax, 0.3, 11.0, 1.1, 0.4, 'Add FH', color_result, fontsize=8)
+    draw_arrow(ax, 5, 11.0, 5, 10.3)
+    draw_label(ax, 5.3, 10.65, 'NO', fontsize=8)
+    
+    # Check 3
+    draw_box(ax, 2.5, 9.5, 5, 0.7, '120s reading missing?', color_decision, fontsize=9)
+    draw_arrow(ax, 2.5, 9.85, 1.5, 9.85)
+    draw_label(ax, 2.0, 10.05, 'YES', fontsize=8)
+    draw_box(ax, 0.3, 9.5, 1.1, 0.4, 'Add DM', color_result, fontsize=8)
+    draw_arrow(ax, 5, 9.5, 5, 8.8)
+    
+    # Step 4
+    draw_box(ax, 2.5, 8, 5, 0.7, 'Calculate % Change:\n(120s - 90s) / (90s - 0s) × 100', color_process, fontsize=8)
+    draw_arrow(ax, 5, 8, 5, 7.3)
+    
+    # Check 4
+    draw_box(ax, 2.5, 6.5, 5, 0.7, '% Change < -6%?', color_decision, fontsize=9)
+    draw_arrow(ax, 2.5, 6.85, 1.5, 6.85)
+    draw_label(ax, 2.0, 7.05, 'YES', fontsize=8)
+    draw_box(ax, 0.3, 6.5, 1.1, 0.4, 'Add OT-', color_result, fontsize=8)
+    draw_arrow(ax, 5, 6.5, 5, 5.8)
+    draw_label(ax, 5.3, 6.15, 'NO', fontsize=8)
+    
+    # Check 5
+    draw_box(ax, 2.5, 5.0, 5, 0.7, '% Change > 30%?', color_decision, fontsize=9)
+    draw_arrow(ax, 2.5, 5.35, 1.5, 5.35)
+    draw_label(ax, 2.0, 5.55, 'YES', fontsize=8)
+    draw_box(ax, 0.3, 5.0, 1.1, 0.4, 'Add OT+', color_result, fontsize=8)
+    draw_arrow(ax, 5, 5.0, 5, 4.3)
+    
+    # End of test loop
+    draw_box(ax, 2.5, 3.5, 5, 0.7, 'Collect all failure codes\nfrom this test', color_process, fontsize=9)
+    draw_arrow(ax, 5, 3.5, 5, 2.8)
+    
+    # Loop back arrow
+    loop_x = 8.2
+    ax.plot([loop_x, loop_x], [3.85, 13.35], 'k-', linewidth=2)
+    ax.plot([loop_x, 7.9], [13.35, 13.35], 'k-', linewidth=2)
+    ax.plot([loop_x, 7.9], [3.85, 3.85], 'k-', linewidth=2)
+    ax.annotate('', xy=(7.9, 13.35), xytext=(loop_x, 13.35),
+                arrowprops=dict(arrowstyle='->', lw=2, color='black'))
+    ax.text(8.7, 8.6, 'LOOP\nBACK', ha='center', fontsize=8, style='italic')
+    
+    # Step 5
+    draw_box(ax, 2.5, 2.0, 5, 0.7, 'std_dev_120 > 0.3V?', color_decision, fontsize=9)
+    draw_arrow(ax, 2.5, 2.35, 1.5, 2.35)
+    draw_label(ax, 2.0, 2.55, 'YES', fontsize=8)
+    draw_box(ax, 0.3, 2.0, 1.1, 0.4, 'Add TT', color_result, fontsize=8)
+    draw_arrow(ax, 5, 2.0, 5, 1.3)
+    
+    # Step 6
+    draw_box(ax, 2, 0.5, 6, 0.7, 'Sort all failure codes by priority:\nFL > FH > OT- > TT > OT+ > DM > PASS', color_process, fontsize=8)
+    draw_arrow(ax, 5, 0.5, 5, -0.2)
+    
+    # Final result
+    draw_box(ax, 3, -1.0, 4, 0.7, 'Pass/Fail = Highest Priority Code', color_final, fontsize=10, bold=True)
+    
+    # Legend
+    legend_elements = [
+        mpatches.Patch(color=color_start, label='Start/Loop'),
+        mpatches.Patch(color=color_process, label='Process'),
+        mpatches.Patch(color=color_decision, label='Decision'),
+        mpatches.Patch(color=color_result, label='Status Code'),
+        mpatches.Patch(color=color_final, label='Final Result')
+    ]
+    ax.legend(handles=legend_elements, loc='upper right', fontsize=9)
+    
+    # Example box
+    example_text = """Example (Standard Thresholds):
+Test 1: 120s=1.2V (FL), %Chg=5%
+Test 2: 120s=1.8V, %Chg=35% (OT+)
+Test 3: 120s=1.5V, %Chg=8%
+std_dev=0.35V (TT triggered)
+
+Codes: FL, OT+, TT
+Result: FL (highest priority)"""
+    
+    draw_box(ax, 0.2, -1.8, 2.5, 2.5, example_text, '#E8F5E9', fontsize=12)
+    
+    plt.tight_layout()
+    
+    return fig
@@ -0,0 +1,455 @@
+"""Concurrent-session load test for the Sensor Analysis Dashboard.
+
+Starts a real `streamlit run app.py` server against a synthetic database and
+connects N simulated browser sessions to it over the Streamlit websocket,
+each running the same scripted workflow as benchmark_reruns.py. Records
+p50/p95 rerun latency, server RSS growth per session and st.cache_data hit
+rates, for sizing the lab server and checking that shared-data and caching
+changes actually scale.
+
+Requires the `websockets` package (installed alongside recent Streamlit).
+
+Usage:
+    python load_test.py --sessions 1,4,8 --size 5000 --json load.json
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from benchmark_reruns import (
+    APP_PATH,
+    DEFAULT_JOBS,
+    DEFAULT_TESTS_PER_SENSOR,
+    DEFAULT_TIMEOUT_S,
+    mock_job_number,
+    mock_serial,
+    mock_workspace,
+    run_workflow,
+)
+
+# ==================== CONFIGURATION ====================
+DEFAULT_SESSION_COUNTS = [1, 4, 8]
+DEFAULT_SIZE = 5000  # Total sensors in the synthetic database
+SERVER_START_TIMEOUT_S = 60
+RSS_SAMPLE_INTERVAL_S = 0.2
+STATS_DUMP_INTERVAL_S = 0.5  # How often the server writes cache stats
+
+# ==================== MEMORY SAMPLING ====================
+def process_rss_mb(pid):
+    """Resident set size of a process in MB (Linux /proc, else `ps`)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        out = subprocess.run(['ps', '-o', 'rss=', '-p', str(pid)],
+                             capture_output=True, text=True, check=True).stdout
+        return int(out.strip()) / 1024
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return float('nan')
+
+class RssSampler:
+    """Background thread recording the peak RSS of a process."""
+
+    def __init__(self, pid, interval=RSS_SAMPLE_INTERVAL_S):
+        self.pid = pid
+        self.interval = interval
+        self.peak_mb = process_rss_mb(pid)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, process_rss_mb(self.pid))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, process_rss_mb(self.pid))
+
+# ==================== CACHE HIT TRACKING (SERVER SIDE) ====================
+class CacheHitCounter:
+    """Counts st.cache_data hits and misses per cached function.
+
+    Wraps DataCache.read_result, which raises on a miss. Leaves Streamlit
+    untouched (and reports unavailable) if those internals have moved.
+    """
+
+    def __init__(self):
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._lock = threading.Lock()
+        self.available = False
+
+    def install(self):
+        try:
+            from streamlit.runtime.caching.cache_data_api import DataCache
+        except ImportError:
+            return self
+
+        counter = self
+        original = DataCache.read_result
+
+        def read_result(cache, value_key):
+            name = getattr(cache, 'display_name', 'unknown')
+            try:
+                result = original(cache, value_key)
+            except Exception:
+                with counter._lock:
+                    counter.misses[name] += 1
+                raise
+            with counter._lock:
+                counter.hits[name] += 1
+            return result
+
+        DataCache.read_result = read_result
+        self.available = True
+        return self
+
+    def summary(self):
+        """Per-function and overall hit rates."""
+        with self._lock:
+            hits, misses = dict(self.hits), dict(self.misses)
+        per_function = {}
+        for name in sorted(set(hits) | set(misses)):
+            h, m = hits.get(name, 0), misses.get(name, 0)
+            per_function[name] = {'hits': h, 'misses': m, 'hit_rate': h / (h + m) if h + m else 0.0}
+        total_hits = sum(hits.values())
+        total_lookups = total_hits + sum(misses.values())
+        return {
+            'available': self.available,
+            'hit_rate': total_hits / total_lookups if total_lookups else 0.0,
+            'functions': per_function,
+        }
+
+def serve_instrumented(stats_path, streamlit_args):
+    """Entry point for the server subprocess: count cache hits, then run Streamlit."""
+    counter = CacheHitCounter().install()
+
+    def dump_stats():
+        while True:
+            tmp_path = f"{stats_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(counter.summary(), f)
+            os.replace(tmp_path, stats_path)
+            time.sleep(STATS_DUMP_INTERVAL_S)
+
+    threading.Thread(target=dump_stats, daemon=True).start()
+
+    from streamlit.web import cli
+    sys.argv = ['streamlit', 'run', *streamlit_args]
+    cli.main()
+
+def free_port():
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class AppServer:
+    """A `streamlit run app.py` subprocess with cache-hit instrumentation."""
+
+    def __init__(self, workdir):
+        self.workdir = Path(workdir)
+        self.port = free_port()
+        self.stats_path = self.workdir / 'cache_stats.json'
+        self.process = None
+
+    def __enter__(self):
+        streamlit_args = [
+            str(APP_PATH),
+            '--server.headless', 'true',
+            '--server.port', str(self.port),
+            '--server.address', '127.0.0.1',
+            '--server.fileWatcherType', 'none',
+            '--browser.gatherUsageStats', 'false',
+        ]
+        bootstrap = (
+            "import sys, load_test; "
+            f"load_test.serve_instrumented({str(self.stats_path)!r}, {streamlit_args!r})"
+        )
+        env = dict(os.environ, PYTHONPATH=str(Path(__file__).parent))
+        self.process = subprocess.Popen(
+            [sys.executable, '-c', bootstrap], cwd=self.workdir, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self._wait_until_healthy()
+        return self
+
+    def _wait_until_healthy(self):
+        deadline = time.monotonic() + SERVER_START_TIMEOUT_S
+        url = f"http://127.0.0.1:{self.port}/_stcore/health"
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Streamlit server exited with code {self.process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        raise TimeoutError(f"Streamlit server did not become healthy within {SERVER_START_TIMEOUT_S}s")
+
+    def __exit__(self, *exc):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def cache_stats(self):
+        """Latest cache hit counts written by the server (after one dump interval)."""
+        time.sleep(STATS_DUMP_INTERVAL_S * 2)
+        try:
+            return json.loads(self.stats_path.read_text())
+        except (OSError, ValueError):
+            return {'available': False, 'hit_rate': 0.0, 'functions': {}}
+
+# ==================== WEBSOCKET SESSION ====================
+class RemoteSession:
+    """A browser-like session driving the app over the Streamlit websocket.
+
+    Exposes the same query/interaction API as AppTest by parsing each run's
+    ForwardMsgs with AppTest's element-tree parser and sending the resulting
+    widget states back as a rerun request.
+    """
+
+    def __init__(self, port, timeout=DEFAULT_TIMEOUT_S):
+        from websockets.sync.client import connect
+
+        from streamlit.runtime.state.common import TESTING_KEY
+
+        self.timeout = timeout
+        self._ws = connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                           subprotocols=['streamlit'], max_size=None,
+                           open_timeout=SERVER_START_TIMEOUT_S,
+                           ping_interval=None).__enter__()
+        self._tree = None
+        self._page_script_hash = ''
+        self._cleared_form_ids = set()
+        # Widget values live in the server's session state, not here: reading an
+        # untouched widget's value raises KeyError (see _changed_widget_states),
+        # and option widgets are set by label, so their format_func is str
+        self._session_state = {TESTING_KEY: defaultdict(lambda: str)}
+
+    def __getattr__(self, name):
+        # Element queries (sidebar, button, metric, exception, ...) go to the latest tree
+        if name.startswith('_') or self._tree is None:
+            raise AttributeError(name)
+        return getattr(self._tree, name)
+
+    def run(self, timeout=None):
+        widget_states = None if self._tree is None else self._changed_widget_states()
+        return self._run(widget_states, timeout)
+
+    def _changed_widget_states(self):
+        """Widget states for everything set or clicked since the last run.
+
+        Untouched widgets are left out; the server keeps their previous values.
+        """
+        from streamlit.proto.WidgetStates_pb2 import WidgetStates
+        from streamlit.testing.v1.element_tree import Widget
+
+        states = WidgetStates()
+        for node in self._tree:
+            if not isinstance(node, Widget):
+                continue
+            try:
+                state = node._widget_state
+            except KeyError:
+                continue
+            if state is not None:
+                states.widgets.append(state)
+        return states
+
+    def _run(self, widget_states, timeout=None):
+        """Send one rerun request and block until the script run finishes."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.testing.v1.element_tree import parse_tree_from_messages
+
+        back_msg = BackMsg()
+        back_msg.rerun_script.query_string = ''
+        back_msg.rerun_script.page_script_hash = self._page_script_hash
+        if widget_states is not None:
+            back_msg.rerun_script.widget_states.CopyFrom(widget_states)
+        self._ws.send(back_msg.SerializeToString())
+
+        deadline = time.monotonic() + (timeout or self.timeout)
+        messages = []
+        while True:
+            raw = self._ws.recv(timeout=max(0.0, deadline - time.monotonic()))
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof('type')
+            if kind == 'new_session':
+                # st.rerun() inside the script starts a fresh run; keep only the last one
+                messages = []
+                self._page_script_hash = msg.new_session.main_script_hash
+            elif kind == 'delta':
+                messages.append(msg)
+            elif kind == 'script_finished':
+                if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+
+        self._tree = parse_tree_from_messages(messages)
+        self._tree._runner = self
+        return self
+
+    def close(self):
+        self._ws.close()
+
+# ==================== LOAD RUN ====================
+def run_sessions(num_sessions, port, num_jobs, timeout):
+    """Run num_sessions workflows concurrently against the server."""
+    recorders = [None] * num_sessions
+    sessions = []
+    errors = []
+    lock = threading.Lock()
+
+    def session(idx):
+        # Spread sessions over jobs so some share cached work and some don't
+        job_idx = idx % num_jobs
+        try:
+            remote = RemoteSession(port, timeout)
+            with lock:
+                sessions.append(remote)
+            recorders[idx] = run_workflow(mock_job_number(job_idx), mock_serial(job_idx, 0),
+                                          timeout, session=remote)
+        except Exception as e:
+            errors.append(f"session {idx}: {type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=session, args=(i,), name=f"session-{i}")
+               for i in range(num_sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Sessions stay connected so the server still holds their state when RSS is read
+    return recorders, sessions, errors, elapsed
+
+def load_level(num_sessions, total_sensors, num_jobs, tests_per_sensor, timeout):
+    """Measure one concurrency level against a fresh server with cold caches."""
+    with mock_workspace(total_sensors, num_jobs, tests_per_sensor) as dataset:
+        with AppServer(os.getcwd()) as server:
+            # One throwaway render so module imports don't count as per-session memory
+            warmup = RemoteSession(server.port, timeout)
+            warmup.run()
+            warmup.close()
+            rss_before = process_rss_mb(server.pid)
+            with RssSampler(server.pid) as sampler:
+                recorders, sessions, errors, elapsed = run_sessions(
+                    num_sessions, server.port, num_jobs, timeout)
+            rss_after = process_rss_mb(server.pid)
+            cache = server.cache_stats()
+            for remote in sessions:
+                remote.close()
+
+    reruns = [r for rec in recorders if rec is not None
+              for item in rec.interactions for r in item['reruns']]
+
+    return {
+        'sessions': num_sessions,
+        'dataset': dataset,
+        'errors': errors,
+        'wall_s': elapsed,
+        'reruns': len(reruns),
+        'p50_s': float(np.percentile(reruns, 50)) if reruns else None,
+        'p95_s': float(np.percentile(reruns, 95)) if reruns else None,
+        'max_s': max(reruns) if reruns else None,
+        'rss_before_mb': rss_before,
+        'rss_after_mb': rss_after,
+        'rss_peak_mb': sampler.peak_mb,
+        'rss_per_session_mb': (rss_after - rss_before) / num_sessions,
+        'cache': cache,
+    }
+
+# ==================== REPORTING ====================
+def print_report(results):
+    """Print one row per concurrency level plus per-function cache hit rates."""
+    if not results:
+        return
+    dataset = results[0]['dataset']
+    print(f"\n=== {dataset['sensors']:,} sensors / {dataset['rows']:,} rows / {dataset['jobs']} jobs ===")
+    print(f"{'Sessions':>8}{'Reruns':>8}{'p50 (s)':>10}{'p95 (s)':>10}{'Max (s)':>10}"
+          f"{'RSS +MB':>10}{'MB/sess':>10}{'Peak MB':>10}{'Cache hit':>11}")
+    for r in results:
+        if r['reruns'] == 0:
+            print(f"{r['sessions']:>8}{0:>8}   (all sessions failed)")
+            continue
+        cache = f"{r['cache']['hit_rate'] * 100:.1f}%" if r['cache']['available'] else 'n/a'
+        print(f"{r['sessions']:>8}{r['reruns']:>8}{r['p50_s']:>10.3f}{r['p95_s']:>10.3f}"
+              f"{r['max_s']:>10.3f}{r['rss_after_mb'] - r['rss_before_mb']:>10.1f}"
+              f"{r['rss_per_session_mb']:>10.1f}{r['rss_peak_mb']:>10.1f}{cache:>11}")
+
+    for r in results:
+        for error in r['errors']:
+            print(f"  ! {r['sessions']} sessions: {error}")
+
+    print("\nCache hit rate by function:")
+    for r in results:
+        functions = r['cache']['functions']
+        detail = ', '.join(f"{name.rsplit('.', 1)[-1]} {stats['hit_rate'] * 100:.0f}% "
+                           f"({stats['hits']}/{stats['hits'] + stats['misses']})"
+                           for name, stats in functions.items())
+        print(f"  {r['sessions']:>3} sessions: {detail or 'no cached calls'}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', default=','.join(str(n) for n in DEFAULT_SESSION_COUNTS),
+                        help="Comma-separated concurrent session counts to run")
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE,
+                        help="Total sensors in the synthetic database")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help="Number of jobs the sensors are spread across")
+    parser.add_argument('--tests', type=int, default=DEFAULT_TESTS_PER_SENSOR,
+                        help="Tests (rows) per sensor")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT_S,
+                        help="Per-rerun timeout in seconds")
+    parser.add_argument('--json', dest='json_path', default=None,
+                        help="Optional path to write raw results as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    session_counts = [int(n) for n in args.sessions.split(',') if n.strip()]
+
+    results = []
+    for num_sessions in session_counts:
+        print(f"Running {num_sessions} concurrent session(s)...", file=sys.stderr)
+        results.append(load_level(num_sessions, args.size, args.jobs, args.tests, args.timeout))
+
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nRaw results written to {args.json_path}")
+
+if __name__ == '__main__':
+    main()
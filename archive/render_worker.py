@@ -0,0 +1,21 @@
+"""Process pool that renders figures off the Streamlit script thread.
+
+Workers are started with the spawn method, as forking the multi-threaded
+Streamlit server is unsafe. Only module-level functions of the Streamlit-free
+modules (figures, reports, dashboard_summary) are submitted to them, so no
+task refers to anything defined in the page script.
+"""
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import figures
+
+def start_pool(workers):
+    """Spawned process pool whose workers each load matplotlib once, as they start."""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=figures.warm_up)
+
+def streamlit_loaded():
+    """Whether this process has imported Streamlit."""
+    return 'streamlit' in sys.modules
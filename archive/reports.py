@@ -0,0 +1,480 @@
+"""Printable HTML reports for the Sensor Analysis Dashboard.
+
+Reports are rendered from small report models (plain dicts and frames) with
+string.Template templates compiled once at import. app.py builds the models
+once - the job comparison per dataset, the failed sensor list per analysis -
+and renders both the on-screen tables and the printable HTML from them.
+Kept free of Streamlit so reports can also be rendered outside the app, e.g.
+by bulk report generation in worker processes (render_job_reports).
+"""
+import io
+import json
+import re
+import zipfile
+from datetime import datetime
+from html import escape
+from string import Template
+
+import pandas as pd
+
+import analysis
+
+# ==================== CONFIGURATION ====================
+STATUS_ORDER = ['PASS', 'FL', 'FH', 'OT-', 'TT', 'OT+', 'DM']  # Status breakdown row order
+FAILED_STATUSES = analysis.FAILED_STATUSES
+MISSING = '—'  # Shown for missing readings and statuses
+
+# ==================== TEMPLATES ====================
+SUMMARY_REPORT_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Sensor Analysis Report - Job $job_number</title>
+    <style>
+        @page {
+            margin: 1in;
+        }
+
+        body {
+            font-family: Arial, sans-serif;
+            padding: 20px;
+            max-width: 100%;
+            margin: 0 auto;
+            color: #000;
+            background: #fff;
+        }
+
+        h1, h2, h3 {
+            color: #333;
+            page-break-after: avoid;
+        }
+
+        h1 {
+            font-size: 24px;
+            margin-bottom: 10px;
+            border-bottom: 3px solid #667eea;
+            padding-bottom: 10px;
+        }
+
+        h2 {
+            font-size: 20px;
+            margin-top: 30px;
+            margin-bottom: 15px;
+            color: #667eea;
+        }
+
+        h3 {
+            font-size: 16px;
+            margin-top: 20px;
+            margin-bottom: 10px;
+        }
+
+        .header-info {
+            color: #666;
+            font-size: 14px;
+            margin-bottom: 20px;
+        }
+
+        .section {
+            display: grid;
+            grid-template-columns: 1fr 1fr;
+            gap: 30px;
+            margin-bottom: 30px;
+            page-break-inside: avoid;
+        }
+
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 13px;
+            margin-bottom: 20px;
+            page-break-inside: avoid;
+        }
+
+        th, td {
+            padding: 8px;
+            text-align: left;
+            border: 1px solid #ddd;
+        }
+
+        th {
+            background-color: #f5f5f5;
+            font-weight: bold;
+            color: #333;
+        }
+
+        tr:nth-child(even) {
+            background-color: #f9f9f9;
+        }
+
+        .highlight-row {
+            background-color: #fff3cd !important;
+            font-weight: bold;
+        }
+
+        .no-print {
+            display: none;
+        }
+    </style>
+</head>
+<body>
+    <h1>Sensor Analysis Report - Job Summary</h1>
+    <p class="header-info">Analysis Date: $generated</p>
+
+    <div class="section">
+        <div>
+            <h2>Job $job_prefix Analysis</h2>
+            <table>
+                <tr>
+                    <th>Metric</th>
+                    <th>Value</th>
+                </tr>
+$metric_rows            </table>
+        </div>
+
+        <div>
+            <h2>Status Breakdown</h2>
+            <table>
+                <tr>
+                    <th>Status Code</th>
+                    <th>Count</th>
+                    <th>Percentage</th>
+                </tr>
+$status_rows            </table>
+        </div>
+    </div>
+
+    <h2>Job Analysis Comparison</h2>
+    <table>
+        <tr>
+            <th>Job Number</th>
+            <th>Total Sensors</th>
+            <th>Passed Qty</th>
+            <th>Passed %</th>
+            <th>Failed Qty</th>
+            <th>Failed %</th>
+        </tr>
+$comparison_rows    </table>
+</body>
+</html>
+""")
+
+METRIC_ROW_TEMPLATE = Template("""                <tr>
+                    <td>$metric</td>
+                    <td>$value</td>
+                </tr>
+""")
+
+STATUS_ROW_TEMPLATE = Template("""                <tr>
+                    <td>$status</td>
+                    <td>$count</td>
+                    <td>$percentage</td>
+                </tr>
+""")
+
+COMPARISON_ROW_TEMPLATE = Template("""        <tr$row_attrs>
+            <td>$job</td>
+            <td>$total</td>
+            <td>$passed</td>
+            <td>$passed_pct</td>
+            <td>$failed</td>
+            <td>$failed_pct</td>
+        </tr>
+""")
+
+FAILED_REPORT_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Failed Sensors Report - Job $job_number</title>
+    <style>
+        @page { margin: 1in; }
+        body { font-family: Arial, sans-serif; padding: 20px; color: #000; background: #fff; }
+        h1, h2 { color: #333; page-break-after: avoid; }
+        h1 { font-size: 24px; margin-bottom: 10px; border-bottom: 3px solid #dc2626; padding-bottom: 10px; }
+        .header-info { color: #666; font-size: 14px; margin-bottom: 20px; }
+        table { width: 100%; border-collapse: collapse; font-size: 13px; margin-bottom: 20px; page-break-inside: avoid; }
+        th, td { padding: 8px; text-align: left; border: 1px solid #ddd; }
+        th { background-color: #fee2e2; font-weight: bold; color: #7f1d1d; }
+        tr:nth-child(even) { background-color: #f9f9f9; }
+    </style>
+</head>
+<body>
+    <h1>Failed Sensors Report</h1>
+    <p class="header-info">Job: $job_number</p>
+    <p class="header-info">Generated: $generated</p>
+    <p class="header-info">Total Failed: $total_failed sensors</p>
+
+    <table>
+        <tr>
+            <th>Serial Number</th>
+            <th>Channel</th>
+            <th>Status</th>
+            <th>T1 Status</th>
+            <th>T2 Status</th>
+            <th>Std Dev</th>
+        </tr>
+$failed_rows    </table>
+</body>
+</html>
+""")
+
+FAILED_ROW_TEMPLATE = Template("""        <tr>
+            <td>$serial</td>
+            <td>$channel</td>
+            <td>$status</td>
+            <td>$t1_status</td>
+            <td>$t2_status</td>
+            <td>$std_dev</td>
+        </tr>
+""")
+
+PRINT_BUTTON_TEMPLATE = Template("""
+<button onclick="printReport()" style="
+    background: linear-gradient(135deg, $color_from 0%, $color_to 100%);
+    color: white;
+    border: none;
+    padding: 0.7rem 1.8rem;
+    border-radius: 25px;
+    font-weight: bold;
+    cursor: pointer;
+    font-size: 1rem;
+    width: 100%;
+    box-shadow: 0 4px 15px rgba($shadow_rgb, 0.3);
+    transition: transform 0.2s;
+">
+    $label
+</button>
+<style>
+    button:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 6px 20px rgba($shadow_rgb, 0.4);
+    }
+</style>
+<script>
+    function printReport() {
+        var reportContent = $report_json;
+        var printWindow = window.open('', '', 'height=800,width=1000');
+        printWindow.document.write(reportContent);
+        printWindow.document.close();
+        printWindow.focus();
+        setTimeout(function() {
+            printWindow.print();
+            printWindow.close();
+        }, $delay_ms);
+    }
+</script>
+""")
+
+PRINT_BUTTON_STYLES = {
+    'summary': {'color_from': '#667eea', 'color_to': '#764ba2', 'shadow_rgb': '102, 126, 234'},
+    'failed': {'color_from': '#dc2626', 'color_to': '#991b1b', 'shadow_rgb': '220, 38, 38'},
+}
+
+# ==================== REPORT MODELS ====================
+def job_prefix(job):
+    """Whole-number prefix of a job number, e.g. '267' for '267.1'."""
+    job_str = str(job).strip()
+    return job_str.split('.')[0] if '.' in job_str else job_str
+
+def prefix_sort_key(prefix):
+    """Numeric prefixes first, in numeric order, then the rest alphabetically."""
+    digits = prefix.replace('.', '')
+    return (not digits.isdigit(), digits.zfill(10) if digits.isdigit() else prefix)
+
+def build_comparison_model(historical):
+    """Group per-job pass/fail counts by whole-number prefix for the comparison table.
+
+    historical is a list of per-job dicts with 'job', 'total', 'passed' and 'failed'.
+    Returns {'rows': [...], 'average': {...} or None}; the current job is only
+    highlighted at render time, so one model serves every job of a dataset.
+    """
+    job_groups = {}
+    for job in historical:
+        group = job_groups.setdefault(job_prefix(job['job']), {'total': 0, 'passed': 0, 'failed': 0})
+        group['total'] += job['total']
+        group['passed'] += job['passed']
+        group['failed'] += job['failed']
+
+    rows = []
+    for prefix in sorted(job_groups, key=prefix_sort_key):
+        group = job_groups[prefix]
+        passed_pct = (group['passed'] / group['total'] * 100) if group['total'] > 0 else 0
+        rows.append({'job': prefix, **group, 'passed_pct': passed_pct, 'failed_pct': 100 - passed_pct})
+
+    average = None
+    if len(rows) > 1:
+        totals = {key: sum(row[key] for row in rows) for key in ['total', 'passed', 'failed']}
+        avg_pass_pct = (totals['passed'] / totals['total'] * 100) if totals['total'] > 0 else 0
+        average = {'job': 'Average:', **{key: value / len(rows) for key, value in totals.items()},
+                   'passed_pct': avg_pass_pct, 'failed_pct': 100 - avg_pass_pct}
+
+    return {'rows': rows, 'average': average}
+
+def build_summary_model(info, job_number):
+    """Job metrics and status breakdown rows shared by the on-screen and printed summary."""
+    status_counts = info['status_counts']
+    return {
+        'job_number': str(job_number),
+        'job_prefix': info['matched_jobs'][0].split('.')[0],
+        'metrics': [
+            ('Job Number', str(job_number)),
+            ('Total Sensors', str(info['total_sensors'])),
+            ('Sensors Passed', f"{info['passed_sensors']} ({info['pass_rate']:.1f}%)"),
+            ('Sensors Failed', f"{info['failed_sensors']} ({info['fail_rate']:.1f}%)"),
+            ('Data Missing', str(info['dm_sensors'])),
+            ('Threshold Set', info['threshold_set']),
+        ],
+        'statuses': [
+            (status, status_counts[status], f"{status_counts[status] / info['total_sensors'] * 100:.1f}%")
+            for status in STATUS_ORDER if status_counts.get(status, 0) > 0
+        ],
+    }
+
+def build_failed_model(results):
+    """Failed sensors as display-ready strings, for the on-screen table and the printed report."""
+    failed = results[results['Pass/Fail'].isin(FAILED_STATUSES)]
+    columns = ['Serial Number', 'Channel', 'Pass/Fail']
+    columns += [c for c in ['Status(T1)', 'Status(T2)'] if c in failed.columns]
+    model = failed[[c for c in columns if c in failed.columns]].astype(object).fillna(MISSING)
+    std_dev = pd.to_numeric(failed['120s(St.Dev.)'], errors='coerce')
+    model['120s(St.Dev.)'] = std_dev.map(lambda value: MISSING if pd.isna(value) else f"{value:.3f}")
+    return model.reset_index(drop=True)
+
+# ==================== RENDERERS ====================
+def comparison_frame(comparison):
+    """Comparison model as the on-screen table, with an Average row for several prefixes."""
+    rows = comparison['rows'] + ([comparison['average']] if comparison['average'] else [])
+    return pd.DataFrame({
+        'Job Number': [row['job'] for row in rows],
+        'Total Sensors': [round(row['total']) for row in rows],
+        'Passed Qty': [round(row['passed']) for row in rows],
+        'Passed %': [f"{row['passed_pct']:.2f}%" for row in rows],
+        'Failed Qty': [round(row['failed']) for row in rows],
+        'Failed %': [f"{row['failed_pct']:.2f}%" for row in rows],
+    })
+
+def _comparison_rows_html(comparison, job_number):
+    """Comparison table rows with the current job's prefix highlighted."""
+    if comparison is None:
+        return ''
+    current = job_prefix(job_number)
+    html = []
+    for row in comparison['rows']:
+        html.append(COMPARISON_ROW_TEMPLATE.substitute(
+            row_attrs=' class="highlight-row"' if row['job'] == current else '',
+            job=escape(row['job']), total=row['total'], passed=row['passed'],
+            passed_pct=f"{row['passed_pct']:.2f}%", failed=row['failed'],
+            failed_pct=f"{row['failed_pct']:.2f}%"
+        ))
+    average = comparison['average']
+    if average:
+        html.append(COMPARISON_ROW_TEMPLATE.substitute(
+            row_attrs=' style="border-top: 2px solid #333; font-weight: bold;"',
+            job=average['job'], total=f"{average['total']:.0f}", passed=f"{average['passed']:.0f}",
+            passed_pct=f"{average['passed_pct']:.2f}%", failed=f"{average['failed']:.0f}",
+            failed_pct=f"{average['failed_pct']:.2f}%"
+        ))
+    return ''.join(html)
+
+def render_summary_html(summary, comparison=None, generated=None):
+    """Printable summary report from build_summary_model() and build_comparison_model() output."""
+    return SUMMARY_REPORT_TEMPLATE.substitute(
+        job_number=escape(summary['job_number']),
+        job_prefix=escape(summary['job_prefix']),
+        generated=generated or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        metric_rows=''.join(METRIC_ROW_TEMPLATE.substitute(metric=metric, value=escape(value))
+                            for metric, value in summary['metrics']),
+        status_rows=''.join(STATUS_ROW_TEMPLATE.substitute(status=escape(status), count=count, percentage=pct)
+                            for status, count, pct in summary['statuses']),
+        comparison_rows=_comparison_rows_html(comparison, summary['job_number']),
+    )
+
+def render_failed_html(failed, job_number, generated=None):
+    """Printable failed sensors report from build_failed_model() output."""
+    records = failed.to_dict('records')
+    return FAILED_REPORT_TEMPLATE.substitute(
+        job_number=escape(str(job_number)),
+        generated=generated or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        total_failed=len(records),
+        failed_rows=''.join(FAILED_ROW_TEMPLATE.substitute(
+            serial=escape(str(row['Serial Number'])),
+            channel=escape(str(row.get('Channel', 'N/A'))),
+            status=escape(str(row['Pass/Fail'])),
+            t1_status=escape(str(row.get('Status(T1)', MISSING))),
+            t2_status=escape(str(row.get('Status(T2)', MISSING))),
+            std_dev=row['120s(St.Dev.)']
+        ) for row in records),
+    )
+
+def render_print_button(report_html, label, style, delay_ms):
+    """Button markup that opens report_html in a new window and prints it."""
+    return PRINT_BUTTON_TEMPLATE.substitute(
+        label=label, report_json=json.dumps(report_html), delay_ms=delay_ms,
+        **PRINT_BUTTON_STYLES[style]
+    )
+
+# ==================== BULK REPORTS ====================
+def _job_value(job):
+    """Numeric value of a job number such as '250.3', or None."""
+    try:
+        return float(str(job).strip())
+    except ValueError:
+        return None
+
+def resolve_job_selection(selection, jobs):
+    """Expand a comma-separated job selection against the known job numbers.
+    
+    Each term is an exact job ('250.3'), a whole-number prefix ('250' takes
+    every 250.x), a wildcard prefix ('25*') or an inclusive numeric range
+    ('250-252' takes every 252.x too; '250.2-250.4' for sub-job bounds).
+    Returns (selected jobs in job order, terms that matched nothing).
+    """
+    stripped = {str(job).strip(): job for job in jobs}
+    selected, unmatched = set(), []
+    for term in (t.strip() for t in selection.split(',')):
+        if not term:
+            continue
+        bounds = [b.strip() for b in term.split('-')]
+        if len(bounds) == 2 and all(_job_value(b) is not None for b in bounds):
+            low, high = _job_value(bounds[0]), _job_value(bounds[1])
+            whole_upper = '.' not in bounds[1]
+            matches = [job for key, job in stripped.items()
+                       if (value := _job_value(key)) is not None and low <= value
+                       and (value < high + 1 if whole_upper else value <= high)]
+        elif term.endswith('*'):
+            matches = [job for key, job in stripped.items() if key.startswith(term[:-1])]
+        else:
+            matches = [job for key, job in stripped.items() if key == term or key.startswith(term + '.')]
+        if matches:
+            selected.update(matches)
+        else:
+            unmatched.append(term)
+    return sorted(selected, key=lambda job: (_job_value(job) is None, _job_value(job) or 0, str(job))), unmatched
+
+def report_filename(job_number, report):
+    """File name of one job's report inside the bulk archive."""
+    return f"job_{re.sub(r'[^A-Za-z0-9._-]+', '_', str(job_number).strip())}_{report}.html"
+
+def render_job_reports(job_data, job_number, threshold_set, comparison, generated=None):
+    """Analyze one job's rows and render its summary and failed sensors reports.
+    
+    Runs in bulk report worker processes; returns {file name: html}.
+    """
+    info = analysis.analyze_job_rows(job_data, threshold_set)
+    return {
+        report_filename(job_number, 'summary'):
+            render_summary_html(build_summary_model(info, job_number), comparison, generated),
+        report_filename(job_number, 'failed_sensors'):
+            render_failed_html(build_failed_model(info['results']), job_number, generated),
+    }
+
+def build_report_archive(files):
+    """Zip {file name: html} into an in-memory archive and return its bytes."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, html in files.items():
+            archive.writestr(name, html)
+    return buffer.getvalue()
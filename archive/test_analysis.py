@@ -0,0 +1,223 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+from conftest import make_readings
+
+
+@pytest.fixture
+def job_rows():
+    """Metrics of a multi-job selection with uneven tests per sensor and sensors without 120s readings."""
+    df = make_readings(jobs=[f'250.{i}' for i in range(1, 6)], sensors_per_job=40, tests_per_sensor=3)
+    df = df.drop(df.index[::7])
+    df.loc[df.index[::11], '120'] = np.nan
+    df.loc[df['Serial Number'] == 'SN000005', '120'] = np.nan  # A sensor without any 120s reading
+    return analysis.calculate_metrics(df)
+
+
+# ==================== PROGRESSIVE ANALYSIS ====================
+def test_stratified_order_covers_each_serial_once(job_rows):
+    order = analysis.stratified_serial_order(job_rows)
+    assert sorted(order) == sorted(job_rows['Serial Number'].unique())
+    assert list(order) == list(analysis.stratified_serial_order(job_rows))  # Seeded
+
+
+def test_stratified_order_leading_runs_are_proportional(job_rows):
+    order = analysis.stratified_serial_order(job_rows)
+    job_of = job_rows.drop_duplicates('Serial Number').set_index('Serial Number')['Job #']
+    for n in (10, 25, 50):
+        counts = job_of.loc[order[:n]].value_counts()
+        assert counts.max() - counts.min() <= 1  # Equal-sized jobs: at most one apart
+
+
+@pytest.mark.parametrize('bounds', [[0, 200], [0, 7, 60, 200], [0, 1, 2, 150, 200]])
+def test_combined_chunks_equal_a_single_pass(job_rows, bounds):
+    order = analysis.stratified_serial_order(job_rows)
+    positions = job_rows.groupby('Serial Number', sort=False).indices
+    chunks = []
+    for start, stop in zip(bounds, bounds[1:]):
+        rows = job_rows.take(np.concatenate([positions[serial] for serial in order[start:stop]]))
+        if rows['120'].notna().any():
+            chunks.append(analysis.determine_pass_fail(rows))
+    pd.testing.assert_frame_equal(analysis.combine_results(chunks), analysis.determine_pass_fail(job_rows))
+
+
+def test_rate_interval_contains_rate_and_narrows():
+    wide = analysis.rate_interval(45, 50, 10_000)
+    narrow = analysis.rate_interval(900, 1_000, 10_000)
+    assert wide[0] < 90 < wide[1]
+    assert narrow[0] < 90 < narrow[1]
+    assert narrow[1] - narrow[0] < wide[1] - wide[0]
+
+
+def test_rate_interval_closes_on_the_whole_population():
+    assert analysis.rate_interval(45, 50, 50) == pytest.approx((90.0, 90.0))
+    assert analysis.rate_interval(0, 50, 1_000)[0] == 0.0
+    assert analysis.rate_interval(50, 50, 1_000)[1] == 100.0
+    assert analysis.rate_interval(0, 0, 1_000) == (0.0, 100.0)
+
+
+def test_estimate_rates_adds_intervals_to_summary(job_rows):
+    results = analysis.determine_pass_fail(job_rows)
+    estimate = analysis.estimate_rates(results.iloc[:50], population=len(results))
+    assert estimate['total_sensors'] == 50 and estimate['population'] == len(results)
+    low, high = estimate['pass_rate_ci']
+    assert low <= estimate['pass_rate'] <= high
+    exact = analysis.estimate_rates(results, population=len(results))
+    assert exact['pass_rate_ci'] == pytest.approx((exact['pass_rate'],) * 2)
+
+
+def test_rates_close_once_every_sensor_with_a_result_is_in(job_rows):
+    results = analysis.determine_pass_fail(job_rows)
+    population = analysis.result_population(job_rows)
+    assert population == len(results) < job_rows['Serial Number'].nunique()
+    final = analysis.estimate_rates(results, population)
+    assert final['pass_rate_ci'] == pytest.approx((final['pass_rate'],) * 2)
+    assert final['fail_rate_ci'] == pytest.approx((final['fail_rate'],) * 2)
+
+
+# ==================== JOB INDEX ====================
+@pytest.fixture
+def index_readings():
+    return make_readings(jobs=['300.1', '250.2', ' 251.1 ', '251.10', '250.1', 'A17.3'], sensors_per_job=3)
+
+
+@pytest.mark.parametrize('query', ['250.1', '251.1', ' 250 ', ' 251.1 ', '25', 'a17', 'A1', '3', '999'])
+def test_match_agrees_with_get_job_data(index_readings, query):
+    index = analysis.JobIndex(index_readings)
+    expected = analysis.get_job_data(index_readings, query)
+    assert sorted(index.jobs[index.match(query)]) == sorted(expected['Job #'].unique())
+    estimate = index.estimate(query)
+    assert estimate['rows'] == len(expected)
+    assert estimate['sensors'] == expected.groupby('Job #')['Serial Number'].nunique().sum()
+
+
+def test_neighbors_step_through_sorted_job_numbers(index_readings):
+    index = analysis.JobIndex(index_readings)
+    assert index.neighbors('250.1') == (None, '250.2')
+    assert index.neighbors('251.1') == ('250.2', '251.10')
+    assert index.neighbors('251') == ('250.2', '300.1')  # Around the whole prefix match
+    assert index.neighbors('A17.3') == ('300.1', None)
+    assert index.neighbors('999') == (None, None)
+
+
+def test_complete_lists_prefix_matches_in_order(index_readings):
+    index = analysis.JobIndex(index_readings)
+    assert index.complete('25', limit=10) == (['250.1', '250.2', '251.1', '251.10'], 4)
+    assert index.complete('25', limit=2) == (['250.1', '250.2'], 4)
+    assert index.complete(' 251.1', limit=10) == (['251.1', '251.10'], 2)
+    assert index.complete('a1', limit=10) == (['A17.3'], 1)  # Case-insensitive fallback
+    assert index.complete('9', limit=10) == ([], 0)
+
+
+def test_suggest_ranks_by_edit_distance(index_readings):
+    index = analysis.JobIndex(index_readings)
+    assert index.suggest('250.3', limit=2) == ['250.1', '250.2']
+    assert index.suggest('a17.4', limit=1) == ['A17.3']
+    assert index.suggest('215.10', limit=1) == ['251.10']
+    assert len(index.suggest('25', limit=3)) == 3
+
+
+@pytest.mark.parametrize('a, b, distance', [('', '', 0), ('250.1', '250.1', 0), ('250.1', '250.2', 1),
+                                            ('250.1', '25.1', 1), ('251.10', '215.10', 2), ('', 'abc', 3)])
+def test_edit_distance(a, b, distance):
+    assert analysis.edit_distance(a, b) == analysis.edit_distance(b, a) == distance
+
+
+LIMITS = {'warn_rows': 1_000, 'max_rows': 10_000, 'time_budget_s': 60}
+
+
+@pytest.mark.parametrize('rows, seconds, verdict', [
+    (0, 0, 'ok'), (1_000, 60, 'ok'),  # Limits are inclusive
+    (1_001, 1, 'warn'), (10_000, 60, 'warn'),
+    (10_001, 1, 'refuse'), (500, 60.5, 'refuse'), (5_000, 61, 'refuse'),  # Either limit refuses
+])
+def test_judge_query(rows, seconds, verdict):
+    assert analysis.judge_query({'jobs': 1, 'rows': rows, 'sensors': rows // 2, 'seconds': seconds},
+                                LIMITS) == verdict
+
+
+# ==================== SERIAL LOOKUPS ====================
+SERIALS = pd.Series(['SN000123', 'sn000124', 'AB-12.5', 'ab-13', 'X(1)+', 'SN0001', 'Q', 'ABCAB', 'sn1.2x'])
+
+
+def contains_filter(serials, query):
+    """The app's original serial filter: rows containing any comma-separated term, ignoring case."""
+    terms = [term.strip() for term in query.split(',') if term.strip()]
+    if not terms:
+        return np.arange(len(serials))
+    pattern = '|'.join(re.escape(term) for term in terms)
+    return np.flatnonzero(serials.str.contains(pattern, case=False, na=False, regex=True))
+
+
+@pytest.mark.parametrize('query', [
+    's', 'Q', '1', '.',  # Single characters scan every serial
+    'n0', 'B-', '(1', '2x',  # As do two
+    '000', 'SN0', 'sn000123', 'AB-12.5', '2.5', '1.2', 'X(1)+', '(1)', '1)+',  # Trigram lookups, metacharacters
+    'cabc', 'bca', 'zzz', 'sn0001234',  # Trigrams present out of order, absent, longer than any serial
+    'sn0001, q', 'ab-1,AB-1', ' , ', '',  # Several terms, overlapping terms, no terms
+])
+def test_serial_search_matches_contains_filter(query):
+    index = analysis.SerialSearchIndex(SERIALS)
+    np.testing.assert_array_equal(index.search(query), contains_filter(SERIALS, query))
+
+
+def test_serial_row_ranges_match_boolean_masks():
+    df = make_readings(jobs=['250.1', '250.2'], sensors_per_job=4, tests_per_sensor=3, seed=3)
+    df['Serial Number'] = df['Serial Number'].str[-2:]  # The same serials in both jobs
+    df = df.sample(frac=1, random_state=1)  # Tests of each serial interleaved with the others
+    df = pd.concat([df, df[df['Serial Number'] == '01'].head(2)])  # Duplicated rows, including Test #
+    sorted_rows, ranges = analysis.build_serial_row_ranges(df)
+
+    assert sorted(ranges) == sorted(df['Serial Number'].unique())
+    assert sum(stop - start for start, stop in ranges.values()) == len(df)
+    for serial, (start, stop) in ranges.items():
+        expected = df[df['Serial Number'] == serial].sort_values('Test #', kind='stable')
+        pd.testing.assert_frame_equal(sorted_rows.iloc[start:stop].reset_index(drop=True),
+                                      expected.reset_index(drop=True))
+
+
+def test_serial_row_ranges_of_no_rows():
+    sorted_rows, ranges = analysis.build_serial_row_ranges(make_readings().iloc[0:0])
+    assert len(sorted_rows) == 0 and ranges == {}
+
+
+@pytest.fixture
+def history_readings():
+    df = make_readings(jobs=['250.1', '251.1'], sensors_per_job=6, tests_per_sensor=2)
+    df['Serial Number'] = np.tile(np.repeat(['SN001', ' sn001', 'SN0010', 'SN002', '', 'zz9'], 2), 2)
+    df.loc[df.index[-2:], 'Serial Number'] = np.nan
+    return df.sample(frac=1, random_state=2)
+
+
+def history_rows(df, selected):
+    """Rows of df the index should return for the selected lowercase serial keys, in its order."""
+    rows = df.assign(_key=df['Serial Number'].str.strip().str.lower())
+    rows = rows[rows['_key'].map(selected, na_action='ignore').fillna(False).astype(bool)]
+    rows = rows.sort_values(['_key', 'Job #', 'Test #'], kind='stable').drop(columns='_key')
+    return rows[[c for c in analysis.GlobalSerialIndex.HISTORY_COLUMNS if c in df.columns]].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('query, exact, expected', [
+    ('SN001', True, {'sn001'}),
+    ('  Sn001 ', True, {'sn001'}),
+    ('sn00', True, set()),
+    ('sn001', False, {'sn001', 'sn0010'}),
+    ('SN00', False, {'sn001', 'sn0010', 'sn002'}),
+    ('zz', False, {'zz9'}),  # Prefix of the last serial in sort order
+    ('zz9', True, {'zz9'}),
+    ('zz9z', False, set()),
+    ('~', False, set()),  # Sorts after every serial
+    ('', False, set()),
+    ('   ', True, set()),
+    ('nan', True, set()),  # Missing serials are not indexed under 'nan'
+    ('na', False, set()),
+])
+def test_global_serial_lookup(history_readings, query, exact, expected):
+    index = analysis.GlobalSerialIndex(history_readings)
+    found = index.lookup(query, exact=exact)
+    pd.testing.assert_frame_equal(found.reset_index(drop=True),
+                                  history_rows(history_readings, lambda key: key in expected))
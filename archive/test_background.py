@@ -0,0 +1,218 @@
+import threading
+import time
+
+import pytest
+
+import background
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def gate():
+    """Holds blocked() task bodies until set."""
+    return threading.Event()
+
+
+@pytest.fixture
+def worker(clock, gate):
+    worker = background.BackgroundWorker(1, 1, result_ttl_s=60, max_queued_prefetches=2, clock=clock)
+    yield worker
+    gate.set()
+    worker.executor.shutdown(cancel_futures=True)
+    worker.prefetch_executor.shutdown(cancel_futures=True)
+
+
+def blocked(gate, calls=None):
+    """Task body that waits for gate, reporting progress so it can be cancelled meanwhile."""
+    def body(task, value):
+        if calls is not None:
+            calls.append(value)
+        while not gate.wait(0.01):
+            task.report(0.5)
+        return value
+    return body
+
+
+def wait_running(task):
+    while task.state == 'queued':
+        time.sleep(0.01)
+
+
+def finish(task):
+    task.future.result(timeout=10)
+    assert task.finished
+
+
+def test_same_key_shares_one_task(worker, gate):
+    calls = []
+    first = worker.submit('k', 'Job', 'session-a', blocked(gate, calls), 1)
+    second = worker.submit('k', 'Job', 'session-b', blocked(gate, calls), 2)
+    other = worker.submit('other', 'Job', 'session-a', blocked(gate, calls), 3)
+    assert second is first and other is not first
+    assert set(first.subscribers) == {'session-a', 'session-b'}
+    gate.set()
+    finish(first)
+    finish(other)
+    assert first.result == 1 and calls == [1, 3]
+
+
+def test_task_is_cancelled_once_every_subscriber_leaves(worker, gate):
+    task = worker.submit('k', 'Job', 'session-a', blocked(gate), 1)
+    worker.submit('k', 'Job', 'session-b', blocked(gate), 1)
+    worker.release(task, 'session-a', cancel=True)
+    assert not task.cancel_event.is_set()  # session-b still waits on it
+    worker.release(task, 'session-b', cancel=True)
+    finish(task)
+    assert task.state == 'cancelled' and 'k' not in worker.tasks
+    with pytest.raises(background.TaskCancelled):
+        task.report(0.9)
+
+
+def test_queued_task_is_cancelled_before_it_starts(worker, gate):
+    calls = []
+    running = worker.submit('running', 'Job', 'session-a', blocked(gate, calls), 1)
+    queued = worker.submit('queued', 'Job', 'session-a', blocked(gate, calls), 2)
+    worker.release(queued, 'session-a', cancel=True)
+    assert queued.state == 'cancelled'
+    gate.set()
+    finish(running)
+    assert calls == [1]
+
+
+def test_time_budget_stops_task_with_timeout_error(worker, clock, gate):
+    def slow(task):
+        task.report(0.1)
+        clock.now += 30
+        task.report(0.2)  # Within the larger budget of the two sessions
+        clock.now += 31
+        task.report(0.3)
+        return 'too late'
+
+    worker.submit('busy', 'Job', 'session-a', blocked(gate), 1)  # Hold the only thread while subscribing
+    task = worker.submit('k', 'Job', 'session-a', slow, time_budget_s=20)
+    worker.submit('k', 'Job', 'session-b', slow, time_budget_s=60)
+    gate.set()
+    finish(task)
+    assert task.state == 'failed' and isinstance(task.error, TimeoutError)
+    assert task.progress == 0.2
+    assert '60 s' in str(task.error)
+
+
+def test_no_budget_when_any_subscriber_has_none(worker):
+    task = worker.submit('k', 'Job', 'session-a', lambda task: None, time_budget_s=20)
+    worker.join(task, 'session-b', None)
+    assert task.time_budget_s is None
+    finish(task)
+
+
+def test_failed_task_is_retried_by_the_next_request(worker):
+    def fail(task):
+        raise ValueError('bad job')
+
+    task = worker.submit('k', 'Job', 'session-a', fail)
+    finish(task)
+    assert task.state == 'failed' and isinstance(task.error, ValueError)
+    retry = worker.submit('k', 'Job', 'session-b', lambda task: 'ok')
+    finish(retry)
+    assert retry is not task and retry.result == 'ok'
+
+
+def test_uncollected_results_are_dropped_after_ttl(worker, clock):
+    calls = []
+    task = worker.prefetch('k', 'Prefetch', lambda task: calls.append(1) or 'result')
+    finish(task)
+    clock.now += 60
+    assert worker.submit('k', 'Job', 'session-a', lambda task: 'again') is task  # Picked up within the TTL
+    worker.release(task, 'session-a')
+    assert worker.tasks['k'] is task  # Finished prefetches stay for other sessions
+
+    abandoned = worker.submit('gone', 'Job', 'session-b', lambda task: 'never collected')
+    finish(abandoned)
+    clock.now += 61
+    assert worker.prefetch('other', 'Prefetch', lambda task: None) is not None
+    assert 'k' not in worker.tasks and 'gone' not in worker.tasks
+    rerun = worker.submit('k', 'Job', 'session-a', lambda task: 'again')
+    finish(rerun)
+    assert rerun is not task and rerun.result == 'again' and calls == [1]
+
+
+def test_prefetches_beyond_the_queue_limit_are_skipped(worker, gate):
+    running = worker.prefetch('running', 'Prefetch', blocked(gate), 0)
+    wait_running(running)
+    queued = [worker.prefetch(f'queued {i}', 'Prefetch', blocked(gate), i) for i in range(3)]
+    assert queued[0] is not None and queued[1] is not None and queued[2] is None
+    assert worker.prefetch('running', 'Prefetch', blocked(gate), 0) is None  # Already known
+    gate.set()
+    for task in [running, *queued[:2]]:
+        finish(task)
+    assert worker.prefetch('queued 2', 'Prefetch', blocked(gate), 2) is not None
+
+
+def test_request_for_a_queued_prefetch_runs_it_on_the_request_threads(worker, gate):
+    worker.prefetch('running', 'Prefetch', blocked(gate), 0)
+    prefetched = worker.prefetch('k', 'Prefetch', lambda task: 'prefetched')
+    task = worker.submit('k', 'Job', 'session-a', lambda task: 'requested')
+    finish(task)
+    assert task is not prefetched and task.result == 'requested'
+    assert prefetched.cancel_event.is_set()
+
+
+def test_running_task_records_spans_on_the_timing_thread_local(clock):
+    timing = threading.local()
+    worker = background.BackgroundWorker(1, 0, timing=timing, clock=clock)
+    try:
+        assert worker.prefetch('k', 'Prefetch', lambda task: None) is None  # Prefetching disabled
+        task = worker.submit('k', 'Job', 'session-a', lambda task: timing.state['timing_spans'] is task.spans)
+        finish(task)
+        assert task.result is True and task.started_at == task.finished_at == clock.now
+    finally:
+        worker.executor.shutdown()
+
+
+# ==================== PREFETCHING ====================
+VERDICTS = {'250.1': 'ok', '250.2': 'warn', '250.3': 'refuse', '251.1': 'ok', '251.2': 'ok', '251.3': 'ok'}
+
+
+def analysis_task_of(threshold_set):
+    return lambda job_number: (('analysis', job_number, threshold_set), (job_number,))
+
+
+def test_prefetch_skips_jobs_that_are_not_ok(worker, gate):
+    queued = background.prefetch_jobs(worker, [None, '250.1', '250.2', '250.3', None], VERDICTS.get,
+                                      analysis_task_of('Standard'), blocked(gate))
+    assert [task.key for task in queued] == [('analysis', '250.1', 'Standard')]
+    assert set(worker.tasks) == {('analysis', '250.1', 'Standard')}
+
+
+def test_prefetch_stops_at_the_queue_cap(worker, gate):
+    first = background.prefetch_jobs(worker, ['250.1'], VERDICTS.get, analysis_task_of('Standard'), blocked(gate))
+    wait_running(first[0])
+    queued = background.prefetch_jobs(worker, ['251.1', '251.2', '251.3', '250.1'], VERDICTS.get,
+                                      analysis_task_of('Standard'), blocked(gate))
+    assert [task.key[1] for task in queued] == ['251.1', '251.2']  # Two may wait; 250.1 is already running
+
+
+def test_recent_jobs_prefetch_once_per_dataset_and_threshold_set(worker, gate):
+    state, prefetched = {}, []
+    for fingerprint, threshold_set in [('a', 'Standard'), ('a', 'Standard'), ('a', 'High Range'),
+                                       ('a', 'High Range'), ('b', 'High Range'), ('a', 'High Range')]:
+        if background.first_time(state, 'prefetched_recent', (fingerprint, threshold_set)):
+            def task_of(job_number):
+                return ('analysis', fingerprint, job_number, threshold_set), (job_number,)
+            prefetched += background.prefetch_jobs(worker, ['250.1'], VERDICTS.get, task_of, blocked(gate))
+    # Switching back to ('a', 'High Range') asks again, but that prefetch is already known
+    assert [task.key for task in prefetched] == [('analysis', 'a', '250.1', 'Standard'),
+                                                 ('analysis', 'a', '250.1', 'High Range'),
+                                                 ('analysis', 'b', '250.1', 'High Range')]
@@ -0,0 +1,109 @@
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+import dashboard_summary
+
+
+@pytest.fixture
+def summary_path(tmp_path):
+    return str(tmp_path / dashboard_summary.SUMMARY_FILE_NAME)
+
+
+def publish(path, df, watermark='w1'):
+    """Bring the artifact up to date with df, as the app does; returns (changed, removed, counts)."""
+    signatures = dashboard_summary.job_signatures(df)
+    changed, removed = dashboard_summary.plan_update(path, signatures)
+    rows = [row for job in changed
+            for row in dashboard_summary.summarize_job(df[df['Job #'] == job], job, signatures[job])]
+    return changed, removed, dashboard_summary.write_update(path, rows, removed, watermark, 'test')
+
+
+def table(path, name):
+    conn = sqlite3.connect(path)
+    try:
+        return pd.read_sql_query(f'SELECT * FROM {name}', conn)
+    finally:
+        conn.close()
+
+
+def test_signatures_change_only_with_the_jobs_readings(readings):
+    before = dashboard_summary.job_signatures(readings)
+    changed = readings.copy()
+    changed.loc[changed['Job #'] == '250.2', '120'] += 0.01
+    after = dashboard_summary.job_signatures(changed)
+    assert [job for job in before if before[job] != after[job]] == ['250.2']
+    assert dashboard_summary.job_signatures(readings[readings['Job #'] != '251.1'])['250.1'] == before['250.1']
+
+
+def test_first_publish_summarizes_every_job(readings, summary_path):
+    changed, removed, counts = publish(summary_path, readings)
+    assert sorted(changed) == ['250.1', '250.2', '251.1'] and removed == []
+    assert counts == {'updated': 3, 'removed': 0, 'jobs': 3}
+
+    jobs = table(summary_path, 'summary_jobs')
+    assert len(jobs) == 3 * len(analysis.THRESHOLDS)
+    row = jobs[(jobs['Job #'] == '250.1') & (jobs['Threshold Set'] == 'Standard')].iloc[0]
+    summary = analysis.analyze_job_rows(readings[readings['Job #'] == '250.1'], 'Standard')
+    assert row['Sensors'] == summary['total_sensors']
+    assert row['Passed'] == summary['passed_sensors'] and row['Failed'] == summary['failed_sensors']
+    assert row['Pass Rate'] == pytest.approx(summary['pass_rate'])
+    assert sum(json.loads(row['120s Histogram'])) == readings.loc[readings['Job #'] == '250.1', '120'].notna().sum()
+
+
+def test_prefix_totals_add_up_job_rows(readings, summary_path):
+    publish(summary_path, readings)
+    jobs = table(summary_path, 'summary_jobs')
+    prefixes = table(summary_path, 'summary_prefixes').set_index(['Prefix', 'Threshold Set'])
+    standard_250 = jobs[(jobs['Prefix'] == '250') & (jobs['Threshold Set'] == 'Standard')]
+    total = prefixes.loc[('250', 'Standard')]
+    assert total['Jobs'] == 2
+    for col in dashboard_summary.COUNT_COLUMNS:
+        assert total[col] == standard_250[col].sum()
+    histograms = np.sum([json.loads(h) for h in standard_250['120s Histogram']], axis=0)
+    assert json.loads(total['120s Histogram']) == histograms.tolist()
+
+
+def test_republish_updates_only_changed_and_removed_jobs(readings, summary_path):
+    publish(summary_path, readings)
+    assert publish(summary_path, readings)[:2] == ([], [])
+
+    changed = readings[readings['Job #'] != '251.1'].copy()
+    changed.loc[changed['Job #'] == '250.2', '120'] = 0.5  # Every sensor of 250.2 now fails low
+    updated, removed, counts = publish(summary_path, changed, watermark='w2')
+    assert updated == ['250.2'] and removed == ['251.1']
+    assert counts == {'updated': 1, 'removed': 1, 'jobs': 2}
+
+    jobs = table(summary_path, 'summary_jobs').set_index(['Job #', 'Threshold Set'])
+    assert jobs.loc[('250.2', 'Standard'), 'Pass Rate'] == 0
+    assert '251.1' not in jobs.index.get_level_values('Job #')
+    assert set(table(summary_path, 'summary_prefixes')['Prefix']) == {'250'}
+    meta = dict(table(summary_path, 'summary_meta').itertuples(index=False))
+    assert meta['watermark'] == 'w2'
+
+
+def test_incomplete_job_is_summarized_again(readings, summary_path):
+    publish(summary_path, readings)
+    conn = sqlite3.connect(summary_path)
+    conn.execute('DELETE FROM summary_jobs WHERE "Job #" = ? AND "Threshold Set" = ?', ('250.1', 'High Range'))
+    conn.commit()
+    conn.close()
+    changed, _ = dashboard_summary.plan_update(summary_path, dashboard_summary.job_signatures(readings))
+    assert changed == ['250.1']
+
+
+def test_failed_update_rolls_back(readings, summary_path, monkeypatch):
+    publish(summary_path, readings)
+    before = table(summary_path, 'summary_jobs')
+
+    def fail(jobs):
+        raise ValueError('boom')
+
+    monkeypatch.setattr(dashboard_summary, 'prefix_rows', fail)
+    with pytest.raises(ValueError):
+        publish(summary_path, readings[readings['Job #'] != '251.1'])
+    pd.testing.assert_frame_equal(table(summary_path, 'summary_jobs'), before)
@@ -0,0 +1,97 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+import exports
+
+
+def read_csv(export_file):
+    return pd.read_csv(io.BytesIO(export_file.read()), dtype={'Job #': str, 'Serial Number': str})
+
+
+def test_csv_export_matches_frame_across_chunks(readings):
+    chunks = exports.frame_chunks(readings, chunk_rows=7)
+    with exports.write_export(chunks, 'CSV') as export_file:
+        exported = read_csv(export_file)
+    pd.testing.assert_frame_equal(exported, readings, check_dtype=False)
+
+
+def test_raw_reading_chunks_take_only_selected_jobs(readings):
+    chunks = list(exports.raw_reading_chunks(readings, ['250.2', '251.1'], chunk_rows=5))
+    assert all(len(chunk) <= 5 for chunk in chunks)
+    combined = pd.concat(chunks)
+    pd.testing.assert_frame_equal(combined, readings[readings['Job #'].isin(['250.2', '251.1'])])
+
+
+def test_job_result_chunks_share_columns_and_match_analysis(readings):
+    readings = readings[~((readings['Job #'] == '251.1') & (readings['Test #'] == 2))]  # Fewer tests in one job
+    chunks = list(exports.job_result_chunks(readings, ['250.1', '251.1', 'missing'], 'Standard'))
+    assert [chunk['Job #'].iloc[0] for chunk in chunks] == ['250.1', '251.1']
+    assert list(chunks[0].columns) == list(chunks[1].columns)
+    assert chunks[1]['Status(T2)'].isna().all()
+
+    expected = analysis.analyze_job_rows(readings[readings['Job #'] == '250.1'])['results']
+    assert chunks[0]['Pass/Fail'].tolist() == expected['Pass/Fail'].tolist()
+    assert chunks[0]['Serial Number'].tolist() == expected['Serial Number'].tolist()
+
+
+def test_job_result_chunks_empty_selection(readings):
+    assert list(exports.job_result_chunks(readings, ['missing'], 'Standard')) == []
+
+
+def test_row_counts_match_chunks(readings):
+    readings = readings.copy()
+    readings.loc[readings['Serial Number'] == 'SN010001', '120'] = np.nan  # A sensor without results
+    jobs = ['250.1', '250.2', 'missing']
+    assert exports.raw_reading_count(readings, jobs) == sum(map(len, exports.raw_reading_chunks(readings, jobs)))
+    assert exports.job_result_count(readings, jobs) == sum(map(len, exports.job_result_chunks(readings, jobs,
+                                                                                              'Standard')))
+
+
+def test_export_is_a_read_only_file_at_its_start(readings):
+    with exports.write_export(exports.frame_chunks(readings, chunk_rows=7), 'CSV') as export_file:
+        assert isinstance(export_file, io.BufferedReader)  # A type st.download_button accepts
+        assert export_file.tell() == 0
+        assert export_file.read().startswith(b'Job #,')
+
+
+@pytest.mark.parametrize('export_format', ['Parquet', 'Arrow IPC'])
+def test_arrow_exports_round_trip(readings, export_format):
+    pa = pytest.importorskip('pyarrow')
+    chunks = exports.frame_chunks(readings, chunk_rows=7)
+    with exports.write_export(chunks, export_format) as export_file:
+        if export_format == 'Parquet':
+            table = pytest.importorskip('pyarrow.parquet').read_table(export_file)
+        else:
+            table = pa.ipc.open_file(export_file).read_all()
+    pd.testing.assert_frame_equal(table.to_pandas(), readings, check_dtype=False)
+
+
+def test_excel_export_round_trip(readings):
+    pytest.importorskip('openpyxl')
+    with exports.write_export(exports.frame_chunks(readings, chunk_rows=7), 'Excel') as export_file:
+        exported = pd.read_excel(export_file, dtype={'Job #': str, 'Serial Number': str})
+    pd.testing.assert_frame_equal(exported, readings, check_dtype=False)
+
+
+def test_too_many_rows_for_excel_are_refused_before_writing(readings, monkeypatch):
+    monkeypatch.setitem(exports.EXPORT_FORMATS, 'Excel', {**exports.EXPORT_FORMATS['Excel'], 'max_rows': 10})
+    monkeypatch.setattr(exports, 'Workbook', object)  # Installed or not, nothing may be written
+
+    def chunks():
+        pytest.fail('chunks were read')
+        yield
+
+    with pytest.raises(ValueError, match='at most 10 rows'):
+        exports.write_export(chunks(), 'Excel', rows=len(readings))
+
+
+def test_unavailable_format_is_refused(readings, monkeypatch):
+    monkeypatch.setattr(exports, 'Workbook', None)
+    assert 'Excel' not in exports.available_formats()
+    assert exports.missing_formats()['Excel'] == 'openpyxl'
+    with pytest.raises(ValueError, match='openpyxl'):
+        exports.write_export(exports.frame_chunks(readings), 'Excel')
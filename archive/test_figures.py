@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import figures
+from conftest import make_readings
+
+
+@pytest.fixture
+def band_readings():
+    df = make_readings(jobs=['250.1', '250.2', '251.1'], sensors_per_job=40, tests_per_sensor=3)
+    df['5'] = np.nan  # No readings at this time point
+    df['15'] = np.nan
+    df.loc[4, '15'] = 1.2  # A single reading: std is undefined
+    df['30'] = np.where(np.arange(len(df)) % 3 == 0, np.nan, df['90'] * 0.9)
+    return df
+
+
+def loop_band_summary(job_data):
+    """The per-time-point loop compute_band_summary() replaced."""
+    time_data = []
+    for time_point in figures.TIME_POINTS:
+        if time_point in job_data.columns:
+            readings = job_data[time_point].dropna()
+            if len(readings) > 0:
+                time_data.append({
+                    'time': float(time_point),
+                    'mean': readings.mean(),
+                    'std': readings.std(),
+                    **{name: readings.quantile(q) for name, q in figures.BAND_QUANTILES.items()}
+                })
+    return pd.DataFrame(time_data)
+
+
+# ==================== RENDERED FIGURE CACHE ====================
+def test_figure_cache_evicts_least_recently_used_beyond_budget():
+    cache = figures.FigureCache(max_bytes=10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    assert cache.get('a') == b'aaaa'  # Now more recently used than b
+    cache.put('c', b'cccc')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'aaaa' and cache.get('c') == b'cccc'
+    assert cache.total_bytes == 8
+
+
+def test_figure_cache_replacing_an_entry_counts_its_new_size():
+    cache = figures.FigureCache(max_bytes=10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bb')
+    cache.put('a', b'aaaaaaa')
+    assert cache.total_bytes == 9
+    assert list(cache.entries) == ['b', 'a']
+    cache.put('c', b'cc')
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.total_bytes == 9
+
+
+def test_figure_cache_skips_oversized_images():
+    cache = figures.FigureCache(max_bytes=10)
+    cache.put('a', b'aaaa')
+    cache.put('huge', b'x' * 11)
+    assert cache.get('huge') is None
+    assert cache.get('a') == b'aaaa'  # Nothing was evicted to make room
+    cache.put('full', b'x' * 10)
+    assert list(cache.entries) == ['full'] and cache.total_bytes == 10
+
+
+def test_figure_keys_separate_kind_theme_and_inputs():
+    cache = figures.FigureCache(max_bytes=100)
+    key = figures.figure_key('trend', 'dark', ('fp', '250.1', 'Standard'))
+    assert key == ('trend', 'dark', 'fp', '250.1', 'Standard')
+    cache.put(key, b'dark trend')
+    assert cache.get(figures.figure_key('trend', 'dark', ('fp', '250.1', 'Standard'))) == b'dark trend'
+    for kind, theme, key in [('trend', 'light', ('fp', '250.1', 'Standard')),
+                             ('box', 'dark', ('fp', '250.1', 'Standard')),
+                             ('trend', 'dark', ('fp', '250.1', 'High Range')),
+                             ('trend', 'dark', ('other', '250.1', 'Standard'))]:
+        assert cache.get(figures.figure_key(kind, theme, key)) is None
+
+
+# ==================== SUMMARY STATISTICS ====================
+def test_band_summary_matches_per_time_point_loop(band_readings):
+    summary = figures.compute_band_summary(band_readings)
+    expected = loop_band_summary(band_readings)
+    assert list(summary['time']) == [0.0, 15.0, 30.0, 90.0, 120.0]
+    pd.testing.assert_frame_equal(summary[expected.columns], expected)
+    assert not summary['approximate'].any()
+
+
+def test_band_summary_of_no_readings(band_readings):
+    assert len(figures.compute_band_summary(band_readings.iloc[0:0])) == 0
+    assert len(figures.compute_band_summary(band_readings[['Job #', '5']])) == 0
+
+
+def test_approximate_band_summary_is_seeded(band_readings):
+    first = figures.compute_band_summary(band_readings, approximate=True, sample_size=50, seed=7)
+    pd.testing.assert_frame_equal(
+        first, figures.compute_band_summary(band_readings, approximate=True, sample_size=50, seed=7))
+    assert first['approximate'].all()
+    other_seed = figures.compute_band_summary(band_readings, approximate=True, sample_size=50, seed=8)
+    assert not first['p95'].equals(other_seed['p95'])
+
+    exact = figures.compute_band_summary(band_readings)
+    pd.testing.assert_frame_equal(first[['time', 'mean', 'std']], exact[['time', 'mean', 'std']])
+    whole_sample = figures.compute_band_summary(band_readings, approximate=True, sample_size=len(band_readings))
+    pd.testing.assert_frame_equal(whole_sample, exact)  # Nothing left to sample
+
+
+# ==================== CURVE OVERLAY ====================
+@pytest.fixture
+def curves():
+    rng = np.random.default_rng(5)
+    values = rng.uniform(1.0, 4.0, size=(2_000, 7))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    statuses = np.array(['PASS'] * 1_900 + ['OT-'] * 60 + ['FL'] * 25 + ['FH'] * 15, dtype=object)
+    return values, statuses
+
+
+def extreme_rows(values):
+    """Rows holding the lowest and highest reading at each time point."""
+    return set(np.nanargmin(values, axis=0)) | set(np.nanargmax(values, axis=0))
+
+
+def test_overlay_keeps_extremes_and_failed_curves(curves):
+    values, statuses = curves
+    chosen = figures.select_overlay_curves(values, statuses, max_curves=200, stratified=50)
+    assert len(chosen) <= 200 and len(np.unique(chosen)) == len(chosen)
+    assert extreme_rows(values) <= set(chosen)
+    drawable = (~np.isnan(values)).sum(axis=1) >= 2
+    assert set(np.flatnonzero(np.isin(statuses, ['FL', 'FH']) & drawable)) <= set(chosen)
+    assert set(statuses[chosen]) == {'PASS', 'OT-', 'FL', 'FH'}
+    np.testing.assert_array_equal(chosen, figures.select_overlay_curves(values, statuses, max_curves=200,
+                                                                        stratified=50))
+
+
+@pytest.mark.parametrize('max_curves', [1, 14, 30, 60, 300])
+def test_overlay_respects_max_curves(curves, max_curves):
+    values, statuses = curves
+    chosen = figures.select_overlay_curves(values, statuses, max_curves=max_curves, stratified=20)
+    assert 0 < len(chosen) <= max_curves
+    failed_rows = set(np.flatnonzero(np.isin(statuses, ['FL', 'FH'])))
+    if max_curves >= len(extreme_rows(values)) + 20 + len(failed_rows):
+        assert failed_rows - extreme_rows(values) <= set(chosen)
+
+
+def test_density_counts_each_curve_once_per_time_bin():
+    times = np.array([0.0, 60.0, 120.0])
+    values = np.array([[2.5, 2.5, 2.5]] * 7 + [[6.0, 6.0, 6.0]])  # The last curve is off the voltage scale
+    density, extent = figures.rasterize_curve_density(values, times, bins=(12, 10), voltage_limits=(0, 5))
+    assert extent == (0.0, 120.0, 0, 5)
+    assert density.shape == (12, 10)
+    np.testing.assert_array_equal(density[:, 5], 7)
+    assert density.sum() == 7 * 12
+    chunked, _ = figures.rasterize_curve_density(values, times, bins=(12, 10), voltage_limits=(0, 5), chunk_rows=3)
+    np.testing.assert_array_equal(chunked, density)
+    sampled, _ = figures.rasterize_curve_density(values, times, bins=(12, 10), voltage_limits=(0, 5), max_rows=4)
+    assert sampled.sum() <= 4 * 12
@@ -0,0 +1,37 @@
+import sys
+import threading
+
+import figures
+import render_worker
+
+
+def test_workers_render_module_level_functions():
+    pool = render_worker.start_pool(2)
+    try:
+        images = [pool.submit(figures.render_png, figures.create_status_flowchart, {}, 600, 50) for _ in range(2)]
+        assert all(image.result(timeout=120).startswith(b'\x89PNG') for image in images)
+        assert pool.submit(render_worker.streamlit_loaded).result(timeout=60) is False
+    finally:
+        pool.shutdown()
+
+
+def test_starting_workers_leaves_main_module_alone():
+    main = sys.modules['__main__']
+    seen, stop = set(), threading.Event()
+
+    def watch():
+        # What other threads (e.g. other sessions' script runs) see while workers are spawned
+        while not stop.is_set():
+            seen.add(id(sys.modules['__main__']))
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    pool = render_worker.start_pool(2)
+    try:
+        for task in [pool.submit(figures.warm_up) for _ in range(4)]:
+            task.result(timeout=60)
+    finally:
+        stop.set()
+        watcher.join()
+        pool.shutdown()
+    assert seen == {id(main)}
@@ -0,0 +1,39 @@
+import pytest
+
+from reports import report_filename, resolve_job_selection
+
+JOBS = ['250.1', '250.2', '251.1', '252.1', '252.2', '253.1', '26.1', 'ABC.1', ' 254.1 ']
+
+
+@pytest.mark.parametrize('selection, expected', [
+    ('250.2', ['250.2']),
+    ('250', ['250.1', '250.2']),
+    ('25*', ['250.1', '250.2', '251.1', '252.1', '252.2', '253.1', ' 254.1 ']),
+    ('251-252', ['251.1', '252.1', '252.2']),
+    ('250.2-252.1', ['250.2', '251.1', '252.1']),
+    ('253, 250.1, 253', ['250.1', '253.1']),
+    ('AB*', ['ABC.1']),
+    ('254', [' 254.1 ']),
+])
+def test_selection_terms(selection, expected):
+    assert resolve_job_selection(selection, JOBS) == (expected, [])
+
+
+def test_prefix_does_not_match_longer_numbers():
+    # '25' is a whole-number prefix, not a string prefix: it must not take 250.x or 251.x
+    assert resolve_job_selection('25', JOBS) == ([], ['25'])
+
+
+def test_unmatched_terms_are_reported_and_blanks_ignored():
+    jobs, unmatched = resolve_job_selection('250.1, , 999, 300-310', JOBS)
+    assert jobs == ['250.1']
+    assert unmatched == ['999', '300-310']
+
+
+def test_selection_is_in_numeric_job_order():
+    jobs, _ = resolve_job_selection('ABC*, 26, 253, 250.1', JOBS)
+    assert jobs == ['26.1', '250.1', '253.1', 'ABC.1']
+
+
+def test_report_filename_is_safe():
+    assert report_filename(' 250/3 ', 'summary') == 'job_250_3_summary.html'
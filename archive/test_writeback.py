@@ -0,0 +1,127 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+import writeback
+from conftest import make_readings
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'sensor_data.db')
+
+
+def query(db_path, sql, *params):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def results_of(readings, job, threshold_set='Standard'):
+    return analysis.analyze_job_rows(readings[readings['Job #'] == job], threshold_set)['results']
+
+
+def test_write_results_stores_jobs_sensors_and_tests(readings, db_path):
+    jobs = ['250.1', '250.2']
+    counts = writeback.write_results(db_path, writeback.job_results(readings, jobs, 'Standard'), 'Standard', 'w1')
+
+    sensors = sum(len(results_of(readings, job)) for job in jobs)
+    assert counts == {'jobs': 2, 'sensors': sensors, 'tests': sensors * 2}
+    assert query(db_path, 'SELECT COUNT(*) FROM analysis_results')[0][0] == sensors
+    stored = dict(query(db_path, 'SELECT "Serial Number", "Pass/Fail" FROM analysis_results WHERE "Job #" = ?',
+                        '250.1'))
+    expected = results_of(readings, '250.1')
+    assert stored == dict(zip(expected['Serial Number'], expected['Pass/Fail']))
+    summary = analysis.summarize_results(expected)
+    assert query(db_path, 'SELECT "Total Sensors", "Passed", "Failed", "Watermark" FROM analysis_jobs '
+                          'WHERE "Job #" = ?', '250.1') == [
+        (summary['total_sensors'], summary['passed_sensors'], summary['failed_sensors'], 'w1')]
+
+
+def test_test_rows_unpack_readings_and_percent_change(readings):
+    results = results_of(readings, '250.1')
+    rows = writeback.test_result_rows(results, '250.1', 'Standard', 'w1')
+    first = dict(zip(writeback.TEST_RESULT_COLUMNS, rows[0]))
+    assert first['Test #'] == 1
+    assert first['120s'] == pytest.approx(results['120s(T1)'].iloc[0])
+    assert first['%Chg'] == pytest.approx(float(results['%Chg(T1)'].iloc[0].rstrip('%')))
+
+
+def test_rewrite_replaces_rows_of_the_same_threshold_set_only(readings, db_path):
+    writeback.write_results(db_path, writeback.job_results(readings, ['250.1'], 'Standard'), 'Standard', 'w1')
+    writeback.write_results(db_path, writeback.job_results(readings, ['250.1'], 'High Range'), 'High Range', 'w1')
+    changed = readings.copy()
+    changed = changed[~((changed['Job #'] == '250.1') & (changed['Serial Number'] == 'SN000000'))]
+    writeback.write_results(db_path, writeback.job_results(changed, ['250.1'], 'Standard'), 'Standard', 'w2')
+
+    per_set = dict(query(db_path, 'SELECT "Threshold Set", COUNT(*) FROM analysis_results GROUP BY 1'))
+    assert per_set == {'Standard': 5, 'High Range': 6}
+    assert dict(query(db_path, 'SELECT "Threshold Set", "Watermark" FROM analysis_jobs')) == {
+        'Standard': 'w2', 'High Range': 'w1'}
+    assert query(db_path, 'SELECT COUNT(*) FROM analysis_test_results WHERE "Serial Number" = ? '
+                          'AND "Threshold Set" = ?', 'SN000000', 'Standard') == [(0,)]
+
+
+def test_unchanged_jobs_match_watermark_and_threshold_set(readings, db_path):
+    writeback.write_results(db_path, writeback.job_results(readings, ['250.1', '250.2'], 'Standard'),
+                            'Standard', 'w1')
+    jobs = ['250.1', '250.2', '251.1']
+    assert writeback.unchanged_jobs(db_path, jobs, 'Standard', 'w1') == {'250.1', '250.2'}
+    assert writeback.unchanged_jobs(db_path, jobs, 'Standard', 'w2') == set()
+    assert writeback.unchanged_jobs(db_path, jobs, 'High Range', 'w1') == set()
+
+
+def test_failed_write_rolls_back(readings, db_path, monkeypatch):
+    writeback.write_results(db_path, writeback.job_results(readings, ['250.1'], 'Standard'), 'Standard', 'w1')
+    before = query(db_path, 'SELECT * FROM analysis_results ORDER BY 2')
+
+    def fail(conn, table, columns, rows):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(writeback, '_insert_batches', fail)
+    with pytest.raises(sqlite3.OperationalError):
+        writeback.write_results(db_path, writeback.job_results(readings, ['250.1'], 'Standard'), 'Standard', 'w2')
+    assert query(db_path, 'SELECT * FROM analysis_results ORDER BY 2') == before
+    assert query(db_path, 'SELECT "Watermark" FROM analysis_jobs') == [('w1',)]
+
+
+def test_nothing_to_write(tmp_path):
+    db_path = tmp_path / 'sensor_data.db'
+    assert writeback.write_results(str(db_path), [], 'Standard', 'w1') == {'jobs': 0, 'sensors': 0, 'tests': 0}
+    assert not db_path.exists()
+
+
+def test_small_batches_store_every_row(readings, db_path, monkeypatch):
+    monkeypatch.setattr(writeback, 'WRITE_BATCH_ROWS', 4)
+    counts = writeback.write_results(db_path, writeback.job_results(readings, ['250.1'], 'Standard'),
+                                     'Standard', 'w1')
+    assert query(db_path, 'SELECT COUNT(*) FROM analysis_test_results')[0][0] == counts['tests'] == 12
+
+
+def test_split_results_match_analyzing_each_job_alone():
+    df = make_readings(jobs=['250.1', '250.2', '251.1', '251.2'], tests_per_sensor=3)
+    df = df[~((df['Job #'] == '250.2') & (df['Test #'] == 3))]  # Fewer tests than the other jobs
+    df.loc[df['Job #'] == '251.2', '120'] = np.nan  # No results
+    df.loc[(df['Job #'] == '251.1') & (df['Serial Number'] == 'SN020001'), 'Serial Number'] = 'SN000001'
+    combined = analysis.analyze_job_rows(df, 'Standard')['results']
+    split, left_over = writeback.split_results(combined, df)
+
+    assert sorted(split) == ['250.2'] and left_over == ['250.1', '251.1', '251.2']
+    alone = results_of(df, '250.2')
+    assert writeback.result_rows(split['250.2'], '250.2', 'Standard', 'w1') == \
+        writeback.result_rows(alone, '250.2', 'Standard', 'w1')
+    assert writeback.test_result_rows(split['250.2'], '250.2', 'Standard', 'w1') == \
+        writeback.test_result_rows(alone, '250.2', 'Standard', 'w1')
+
+
+def test_split_results_of_a_single_job(readings):
+    job_data = readings[readings['Job #'] == '250.1']
+    results = results_of(readings, '250.1')
+    split, left_over = writeback.split_results(results, job_data)
+    assert left_over == []
+    pd.testing.assert_frame_equal(split['250.1'], results.reset_index(drop=True))
@@ -0,0 +1,211 @@
+"""Write-back of analysis results into the sensor database.
+
+Per-sensor results and per-test statuses are stored next to sensor_readings
+so other tools (Database Viewer, Fail Rate Analysis) can read precomputed
+rows instead of repeating the analysis. Every row is tagged with its threshold
+set and the watermark (content fingerprint) of the dataset it was computed
+from. Rows are inserted with batched executemany() calls inside one
+transaction per write, so readers never see a partially written job. Kept free
+of Streamlit, like analysis.py.
+"""
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+import analysis
+
+# ==================== CONFIGURATION ====================
+WRITE_BATCH_ROWS = 5_000  # Rows per executemany() call
+WRITE_TIMEOUT_S = 30  # Wait this long for other writers to release the database
+
+JOBS_TABLE = 'analysis_jobs'
+RESULTS_TABLE = 'analysis_results'
+TEST_RESULTS_TABLE = 'analysis_test_results'
+
+SCHEMA = [
+    f'''CREATE TABLE IF NOT EXISTS {JOBS_TABLE} (
+        "Job #" TEXT NOT NULL,
+        "Threshold Set" TEXT NOT NULL,
+        "Watermark" TEXT NOT NULL,
+        "Analyzed At" TEXT NOT NULL,
+        "Total Sensors" INTEGER,
+        "Passed" INTEGER,
+        "Failed" INTEGER,
+        "Pass Rate" REAL,
+        PRIMARY KEY ("Job #", "Threshold Set"))''',
+    f'''CREATE TABLE IF NOT EXISTS {RESULTS_TABLE} (
+        "Job #" TEXT NOT NULL,
+        "Serial Number" TEXT NOT NULL,
+        "Channel" TEXT,
+        "Pass/Fail" TEXT,
+        "120s(St.Dev.)" REAL,
+        "Tests" INTEGER,
+        "Threshold Set" TEXT NOT NULL,
+        "Watermark" TEXT NOT NULL,
+        PRIMARY KEY ("Job #", "Serial Number", "Threshold Set"))''',
+    f'''CREATE TABLE IF NOT EXISTS {TEST_RESULTS_TABLE} (
+        "Job #" TEXT NOT NULL,
+        "Serial Number" TEXT NOT NULL,
+        "Test #" INTEGER NOT NULL,
+        "0s" REAL,
+        "90s" REAL,
+        "120s" REAL,
+        "%Chg" REAL,
+        "Status" TEXT,
+        "Threshold Set" TEXT NOT NULL,
+        "Watermark" TEXT NOT NULL,
+        PRIMARY KEY ("Job #", "Serial Number", "Threshold Set", "Test #"))''',
+]
+
+RESULT_COLUMNS = ['Job #', 'Serial Number', 'Channel', 'Pass/Fail', '120s(St.Dev.)', 'Tests',
+                  'Threshold Set', 'Watermark']
+JOB_COLUMNS = ['Job #', 'Threshold Set', 'Watermark', 'Analyzed At', 'Total Sensors', 'Passed', 'Failed',
+               'Pass Rate']
+TEST_RESULT_COLUMNS = ['Job #', 'Serial Number', 'Test #', '0s', '90s', '120s', '%Chg', 'Status',
+                       'Threshold Set', 'Watermark']
+
+# ==================== ROW BUILDERS ====================
+def job_results(df, jobs, threshold_set):
+    """(job, determine_pass_fail() results) for each job with readings, analyzed one job at a time."""
+    for job in jobs:
+        job_data = df[df['Job #'] == job]
+        if len(job_data) > 0:
+            yield job, analysis.analyze_job_rows(job_data, threshold_set)['results']
+
+def split_results(results, job_data):
+    """Split the results of an analysis spanning several jobs into ({job: results}, jobs left over).
+
+    A sensor's result depends only on its own tests, so each job gets the result rows of
+    its serials as they are. Jobs sharing a serial with another job, whose tests were
+    combined into one result, and jobs without result rows are left over to be analyzed alone.
+    """
+    serial_jobs = job_data[['Serial Number', 'Job #']].drop_duplicates()
+    shared = serial_jobs['Serial Number'].duplicated(keep=False)
+    job_of = serial_jobs[~shared].set_index('Serial Number')['Job #']
+    result_jobs = results['Serial Number'].map(job_of)
+    split, left_over = {}, []
+    for job in sorted(serial_jobs['Job #'].unique()):
+        rows = results[(result_jobs == job).to_numpy()]
+        if len(rows) > 0 and not shared[serial_jobs['Job #'] == job].any():
+            split[job] = rows.reset_index(drop=True)
+        else:
+            left_over.append(job)
+    return split, left_over
+
+def _records(frame):
+    """Frame rows as tuples of plain Python values, with NaN as NULL."""
+    return list(frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None))
+
+def result_rows(results, job, threshold_set, watermark):
+    """One analysis_results row per sensor."""
+    test_count = results.filter(regex=r'^Status\(T\d+\)$').notna().sum(axis=1)
+    rows = pd.DataFrame({
+        'Job #': job,
+        'Serial Number': results['Serial Number'].astype(str),
+        'Channel': results['Channel'],
+        'Pass/Fail': results['Pass/Fail'],
+        '120s(St.Dev.)': results['120s(St.Dev.)'].astype(float),
+        'Tests': test_count.astype(int),
+        'Threshold Set': threshold_set,
+        'Watermark': watermark,
+    }, columns=RESULT_COLUMNS)
+    return _records(rows)
+
+def test_result_rows(results, job, threshold_set, watermark):
+    """One analysis_test_results row per sensor test, unpacked from the T1..Tn result columns."""
+    frames = []
+    test = 1
+    while f'Status(T{test})' in results.columns:
+        tested = results[f'Status(T{test})'].notna()
+        pct_change = results.loc[tested, f'%Chg(T{test})'].astype('string').str.rstrip('%')
+        frames.append(pd.DataFrame({
+            'Job #': job,
+            'Serial Number': results.loc[tested, 'Serial Number'].astype(str),
+            'Test #': test,
+            '0s': results.loc[tested, f'0s(T{test})'].astype(float),
+            '90s': results.loc[tested, f'90s(T{test})'].astype(float),
+            '120s': results.loc[tested, f'120s(T{test})'].astype(float),
+            '%Chg': pd.to_numeric(pct_change, errors='coerce').astype(float),
+            'Status': results.loc[tested, f'Status(T{test})'],
+            'Threshold Set': threshold_set,
+            'Watermark': watermark,
+        }, columns=TEST_RESULT_COLUMNS))
+        test += 1
+    return _records(pd.concat(frames)) if frames else []
+
+def job_row(results, job, threshold_set, watermark, analyzed_at):
+    """analysis_jobs row with the job's summary counts."""
+    summary = analysis.summarize_results(results)
+    return (job, threshold_set, watermark, analyzed_at, summary['total_sensors'],
+            summary['passed_sensors'], summary['failed_sensors'], summary['pass_rate'])
+
+# ==================== DATABASE ====================
+def connect(db_path):
+    """Connection in autocommit mode, so transactions are opened explicitly."""
+    conn = sqlite3.connect(db_path, timeout=WRITE_TIMEOUT_S, isolation_level=None)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    return conn
+
+def stored_watermarks(conn, jobs, threshold_set):
+    """{job: watermark} of the jobs already written for this threshold set."""
+    stored = {}
+    jobs = list(jobs)
+    for start in range(0, len(jobs), 500):  # Stay under SQLite's bound-parameter limit
+        batch = jobs[start:start + 500]
+        cursor = conn.execute(
+            f'SELECT "Job #", "Watermark" FROM {JOBS_TABLE} '
+            f'WHERE "Threshold Set" = ? AND "Job #" IN ({", ".join("?" * len(batch))})',
+            [threshold_set, *batch])
+        stored.update(cursor.fetchall())
+    return stored
+
+def _insert_batches(conn, table, columns, rows):
+    column_list = ', '.join(f'"{col}"' for col in columns)
+    statement = f'INSERT INTO {table} ({column_list}) VALUES ({", ".join("?" * len(columns))})'
+    for start in range(0, len(rows), WRITE_BATCH_ROWS):
+        conn.executemany(statement, rows[start:start + WRITE_BATCH_ROWS])
+
+def unchanged_jobs(db_path, jobs, threshold_set, watermark):
+    """Jobs already stored for this threshold set from the same dataset watermark."""
+    conn = connect(db_path)
+    try:
+        stored = stored_watermarks(conn, jobs, threshold_set)
+    finally:
+        conn.close()
+    return {job for job, stored_watermark in stored.items() if stored_watermark == watermark}
+
+def write_results(db_path, results_by_job, threshold_set, watermark):
+    """Replace the stored results of each job for this threshold set, in a single transaction.
+
+    results_by_job yields (job, determine_pass_fail() results). Returns
+    {'jobs': ..., 'sensors': ..., 'tests': ...} row counts written.
+    """
+    # Build every row before taking the write lock, so the transaction is only inserts
+    analyzed_at = datetime.now().isoformat(timespec='seconds')
+    jobs, sensors, tests = [], [], []
+    for job, results in results_by_job:
+        jobs.append(job_row(results, job, threshold_set, watermark, analyzed_at))
+        sensors.extend(result_rows(results, job, threshold_set, watermark))
+        tests.extend(test_result_rows(results, job, threshold_set, watermark))
+
+    if jobs:
+        conn = connect(db_path)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                keys = [(row[0], threshold_set) for row in jobs]
+                for table in (JOBS_TABLE, RESULTS_TABLE, TEST_RESULTS_TABLE):
+                    conn.executemany(f'DELETE FROM {table} WHERE "Job #" = ? AND "Threshold Set" = ?', keys)
+                _insert_batches(conn, JOBS_TABLE, JOB_COLUMNS, jobs)
+                _insert_batches(conn, RESULTS_TABLE, RESULT_COLUMNS, sensors)
+                _insert_batches(conn, TEST_RESULTS_TABLE, TEST_RESULT_COLUMNS, tests)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+    return {'jobs': len(jobs), 'sensors': len(sensors), 'tests': len(tests)}